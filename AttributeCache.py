@@ -0,0 +1,64 @@
+from maya import cmds
+
+import Profiler as PRF
+import SceneQuery as SQ
+
+
+class AttributeCache:
+    def __init__(self, sceneQuery=None):
+        self.sceneQuery = sceneQuery
+        if self.sceneQuery is None:
+            self.sceneQuery = SQ.SceneQuery()
+        self.__typeAttributes = {}
+        self.__values = {}
+
+    def attributes(self, nodeType, node):
+        # type: (str, str) -> list
+        # listed once per light type, every light of a type has the same attributes
+        attributes = self.__typeAttributes.get(nodeType)
+        if attributes is None:
+            attributes = cmds.listAttr(node, keyable=True) or []
+            PRF.count("mayaCalls")
+            self.__typeAttributes[nodeType] = attributes
+        return attributes
+
+    def values(self, nodes, attributes):
+        # type: (list, list) -> list
+        """Returns one {attribute: value} dict per node for attributes[i] of nodes[i], reading misses in bulk."""
+        missingNodes = []
+        missingAttributes = []
+        for node, nodeAttributes in zip(nodes, attributes):
+            cached = self.__values.get(node, {})
+            missing = [attribute for attribute in nodeAttributes if attribute not in cached]
+            if missing:
+                missingNodes.append(node)
+                missingAttributes.append(missing)
+
+        if missingNodes:
+            PRF.count("attributeCacheMisses", len(missingNodes))
+            for node, nodeValues in zip(missingNodes, self.sceneQuery.readAttributes(missingNodes, missingAttributes)):
+                self.__values.setdefault(node, {}).update(nodeValues)
+
+        return [self.__values.get(node, {}) for node in nodes]
+
+    def update(self, nodes, attribute, values):
+        # type: (list, str, list) -> None
+        for node, value in zip(nodes, values):
+            self.__values.setdefault(node, {})[attribute] = value
+
+    def invalidate(self, node, attributes=None):
+        # type: (str, set) -> None
+        if attributes is None:
+            self.__values.pop(node, None)
+            return
+        cached = self.__values.get(node)
+        if cached is None:
+            return
+        for attribute in attributes:
+            cached.pop(attribute, None)
+            # a changed child plug also changes its compound parent and the other way around
+            for name in [name for name in cached if name.startswith(attribute) or attribute.startswith(name)]:
+                cached.pop(name, None)
+
+    def clear(self):
+        self.__values.clear()
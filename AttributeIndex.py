@@ -0,0 +1,191 @@
+import bisect
+import json
+import re
+
+from maya import cmds
+
+import Profiler as PRF
+
+
+words = re.compile(r"[A-Z]?[a-z]+|[A-Z]+(?![a-z])|\d+")
+
+
+def tokenize(text):
+    # type: (str) -> list
+    """camelCase, snake_case and nice names as lower case words, "aiShadowDensity" -> ["ai", "shadow", "density"]."""
+    return [word.lower() for word in words.findall(text or "")]
+
+
+def isSubsequence(term, text):
+    # type: (str, str) -> bool
+    # "emdif" matches "emitdiffuse"
+    position = 0
+    for character in term:
+        position = text.find(character, position) + 1
+        if not position:
+            return False
+    return True
+
+
+class AttributeEntry(object):
+    __slots__ = ("longName", "shortName", "niceName", "categories", "tokens", "text")
+
+    def __init__(self, longName, shortName="", niceName="", categories=()):
+        self.longName = longName
+        self.shortName = shortName or ""
+        self.niceName = niceName or ""
+        self.categories = tuple(category.lower() for category in categories or ())
+        self.tokens = frozenset(tokenize(longName) + tokenize(self.niceName) + [self.shortName.lower()])
+        # what substring and fuzzy terms are matched against
+        self.text = (longName + " " + self.niceName).lower()
+
+
+class AttributeIndex:
+    """Attribute names per light type, queried from maya once per type and searched by token."""
+
+    def __init__(self):
+        # node type -> {long name: AttributeEntry}
+        self.__types = {}
+        # token -> set of long names, tokens sorted for prefix lookups
+        self.__tokenNames = {}
+        self.__tokens = []
+        # category -> set of long names
+        self.__categoryNames = {}
+
+    def __contains__(self, nodeType):
+        return nodeType in self.__types
+
+    def build(self, nodeType, node, attributes):
+        # type: (str, str, list) -> None
+        """Indexes the attributes of nodeType, queried on node. Types that are already indexed are skipped."""
+        if nodeType in self.__types:
+            return
+        with PRF.span("AttributeIndex.build"):
+            entries = {}
+            for attribute in attributes:
+                entries[attribute] = self.__query(node, attribute)
+            PRF.count("mayaCalls", 3 * len(attributes))
+            self.add(nodeType, entries.values())
+
+    def add(self, nodeType, entries):
+        # type: (str, iter) -> None
+        typeEntries = self.__types.setdefault(nodeType, {})
+        newTokens = False
+        for entry in entries:
+            typeEntries[entry.longName] = entry
+            for token in entry.tokens:
+                if token not in self.__tokenNames:
+                    self.__tokenNames[token] = set()
+                    newTokens = True
+                self.__tokenNames[token].add(entry.longName)
+            for category in entry.categories:
+                self.__categoryNames.setdefault(category, set()).add(entry.longName)
+        if newTokens:
+            self.__tokens = sorted(self.__tokenNames)
+
+    def entries(self, nodeTypes):
+        # type: (iter) -> dict
+        entries = {}
+        for nodeType in nodeTypes:
+            entries.update(self.__types.get(nodeType, {}))
+        return entries
+
+    def search(self, text, nodeTypes):
+        # type: (str, iter) -> set
+        """Long names of nodeTypes' attributes matching text, None for an empty query.
+
+        Comma or | separated alternatives, any of which may match. Within one, every space separated term
+        has to match: a word prefix, a substring of the long or nice name, the short name or, failing those,
+        the letters of the term in order. "cat:name" matches an attribute category, "=name" only the attribute
+        with that long or short name.
+        """
+        alternatives = [alternative.split() for alternative in re.split(r"[,|]", text or "")]
+        alternatives = [terms for terms in alternatives if terms]
+        if not alternatives:
+            return None
+
+        entries = self.entries(nodeTypes)
+        names = set()
+        for terms in alternatives:
+            matches = None
+            for term in terms:
+                termMatches = self.__match(term.lower(), entries)
+                matches = termMatches if matches is None else matches & termMatches
+                if not matches:
+                    break
+            names.update(matches or ())
+        return names
+
+    def __match(self, term, entries):
+        if term.startswith("="):
+            name = term[1:]
+            return set(key for key, entry in entries.items() if name in (key.lower(), entry.shortName.lower()))
+        if term.startswith("cat:"):
+            category = term[4:]
+            return set(name for key, categoryNames in self.__categoryNames.items() if key.startswith(category)
+                       for name in categoryNames if name in entries)
+
+        # word prefixes through the sorted tokens, no attribute is looked at
+        names = set()
+        start = bisect.bisect_left(self.__tokens, term)
+        for token in self.__tokens[start:]:
+            if not token.startswith(term):
+                break
+            names.update(name for name in self.__tokenNames[token] if name in entries)
+        names.update(name for name, entry in entries.items() if term in entry.text or term == entry.shortName.lower())
+        if names:
+            return names
+        return set(name for name, entry in entries.items() if isSubsequence(term, entry.text.replace(" ", "")))
+
+    @staticmethod
+    def __query(node, attribute):
+        shortName = cmds.attributeQuery(attribute, node=node, shortName=True)
+        niceName = cmds.attributeQuery(attribute, node=node, niceName=True)
+        categories = cmds.attributeQuery(attribute, node=node, categories=True)
+        return AttributeEntry(attribute, shortName, niceName, categories)
+
+
+class AttributeFilterPresets:
+    """Named attribute filter queries, kept in a maya option var across sessions."""
+
+    optionVar = "LightListerAttributeFilters"
+    defaults = {
+        "Intensity & Color": "=intensity, =color",
+        "Emission": "emit",
+        "Shadows": "shadow",
+        "Decay": "decay",
+    }
+
+    def __init__(self):
+        self.__presets = None
+
+    def names(self):
+        # type: () -> list
+        return sorted(self.__load())
+
+    def query(self, name):
+        # type: (str) -> str
+        return self.__load().get(name, "")
+
+    def save(self, name, query):
+        # type: (str, str) -> None
+        self.__load()[name] = query
+        self.__store()
+
+    def remove(self, name):
+        # type: (str) -> None
+        if self.__load().pop(name, None) is not None:
+            self.__store()
+
+    def __load(self):
+        if self.__presets is None:
+            self.__presets = dict(self.defaults)
+            if cmds.optionVar(exists=self.optionVar):
+                try:
+                    self.__presets = json.loads(cmds.optionVar(query=self.optionVar))
+                except (TypeError, ValueError):
+                    pass
+        return self.__presets
+
+    def __store(self):
+        cmds.optionVar(stringValue=(self.optionVar, json.dumps(self.__presets)))
@@ -0,0 +1,296 @@
+from PySide2 import QtCore
+
+from maya import cmds
+
+import AttributeCache as AC
+import Profiler as PRF
+
+
+class AttributeModel(QtCore.QAbstractTableModel):
+    NameColumn = 0
+    ValueColumn = 1
+
+    Union = 0
+    Intersection = 1
+
+    Absolute = 0
+    Relative = 1
+
+    ValueRole = QtCore.Qt.UserRole + 1
+    MixedRole = QtCore.Qt.UserRole + 2
+    AttributeRole = QtCore.Qt.UserRole + 3
+
+    headers = ("Attribute", "Value")
+    mixedText = "--"
+
+    def __init__(self, cache=None, index=None, parent=None):
+        super(AttributeModel, self).__init__(parent)
+        self.cache = cache
+        if self.cache is None:
+            self.cache = AC.AttributeCache()
+        # built the first time a filter is used
+        self.attributeIndex = index
+        self.filterText = ""
+        self.mode = self.Intersection
+        self.editMode = self.Absolute
+
+        self.__nodes = []
+        self.__nodeTypes = []
+        self.__nodeAttributes = []
+        # node type -> (a node of the type, its attributes)
+        self.__typeAttributes = {}
+        # every shown attribute before the filter, and the rows left after it
+        self.__allAttributes = []
+        self.__attributes = []
+        # attribute -> (value, mixed)
+        self.__values = {}
+        # (attribute, value at press, nodes, node values at press) while a drag is in progress
+        self.__drag = None
+
+    def rowCount(self, parent=QtCore.QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self.__attributes)
+
+    def columnCount(self, parent=QtCore.QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self.headers)
+
+    def headerData(self, section, orientation, role=QtCore.Qt.DisplayRole):
+        if orientation == QtCore.Qt.Horizontal and role == QtCore.Qt.DisplayRole:
+            return self.headers[section]
+        return None
+
+    def data(self, index, role=QtCore.Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        attribute = self.__attributes[index.row()]
+        if role == self.AttributeRole:
+            return attribute
+        if index.column() == self.NameColumn:
+            if role == QtCore.Qt.DisplayRole:
+                return attribute
+            return None
+
+        value, mixed = self.__values.get(attribute, (None, False))
+        if role == QtCore.Qt.DisplayRole:
+            if mixed:
+                return self.mixedText
+            return self.formatValue(value)
+        if role in (QtCore.Qt.EditRole, self.ValueRole):
+            return value
+        if role == self.MixedRole:
+            return mixed
+        return None
+
+    def flags(self, index):
+        if not index.isValid():
+            return QtCore.Qt.NoItemFlags
+        flags = QtCore.Qt.ItemIsEnabled | QtCore.Qt.ItemIsSelectable
+        if index.column() == self.ValueColumn:
+            value = self.__values.get(self.__attributes[index.row()], (None, False))[0]
+            if isinstance(value, (bool, int, float)):
+                flags |= QtCore.Qt.ItemIsEditable
+        return flags
+
+    def setData(self, index, value, role=QtCore.Qt.EditRole):
+        if role != QtCore.Qt.EditRole or index.column() != self.ValueColumn:
+            return False
+        self.writeValues(self.__attributes[index.row()], value)
+        return True
+
+    def nodes(self):
+        return self.__nodes
+
+    def nodesWith(self, attribute):
+        # type: (str) -> list
+        return [node for node, attributes in zip(self.__nodes, self.__nodeAttributes) if attribute in attributes]
+
+    def attributes(self):
+        return self.__attributes
+
+    def setNodes(self, nodes, nodeTypes):
+        # type: (list, list) -> None
+        with PRF.span("AttributeModel.setNodes"):
+            self.beginResetModel()
+            self.__nodes = list(nodes)
+            self.__nodeTypes = list(nodeTypes)
+            self.__collectAttributes()
+            self.__readValues()
+            self.endResetModel()
+
+    def setMode(self, mode):
+        if mode == self.mode:
+            return
+        self.mode = mode
+        self.setNodes(self.__nodes, self.__nodeTypes)
+
+    def setFilterText(self, text):
+        # type: (str) -> None
+        """Shows only the attributes matching text in the attribute index, an empty text shows them all."""
+        text = text.strip()
+        if text == self.filterText:
+            return
+        with PRF.span("AttributeModel.setFilterText"):
+            self.beginResetModel()
+            self.filterText = text
+            self.__filterAttributes()
+            # values of attributes the filter hid before were never read
+            self.__readValues()
+            self.endResetModel()
+
+    def refresh(self, nodes=None):
+        # type: (set) -> None
+        """Re-reads the values of nodes (all shown nodes by default) and updates the rows that changed."""
+        if nodes is not None and not any(node in nodes for node in self.__nodes):
+            return
+        previous = self.__values
+        self.__readValues()
+        for row, attribute in enumerate(self.__attributes):
+            if previous.get(attribute) != self.__values.get(attribute):
+                index = self.index(row, self.ValueColumn)
+                self.dataChanged.emit(index, index)
+
+    def writeValues(self, attribute, values):
+        # type: (str, object) -> None
+        """Writes one value for every node, or values[i] for node i, through the cache's scene query."""
+        self.__write(attribute, self.nodesWith(attribute), values)
+
+    def setEditMode(self, mode):
+        self.editMode = mode
+
+    def isDragging(self):
+        return self.__drag is not None
+
+    def beginDrag(self, attribute, value):
+        # type: (str, object) -> None
+        """Opens the undo chunk every write of the drag goes into, until endDrag."""
+        if self.__drag is not None:
+            self.endDrag()
+        nodes = self.nodesWith(attribute)
+        startValues = [nodeValues.get(attribute) for nodeValues in self.cache.values(nodes, [[attribute]] * len(nodes))]
+        self.__drag = (attribute, value, nodes, startValues)
+        self.cache.sceneQuery.openUndoChunk("LightLister drag %s" % attribute)
+
+    def dragTo(self, value):
+        # type: (object) -> None
+        if self.__drag is None:
+            return
+        attribute, startValue, nodes, startValues = self.__drag
+        if self.editMode == self.Relative and self.__isScalar(value) and self.__isScalar(startValue):
+            # every light moves by the same amount from its own value at press
+            delta = value - startValue
+            values = [type(nodeValue)(nodeValue + delta) if self.__isScalar(nodeValue) else nodeValue
+                      for nodeValue in startValues]
+        else:
+            values = [value] * len(nodes)
+        self.__write(attribute, nodes, values)
+
+    def endDrag(self, value=None):
+        # type: (object) -> None
+        if self.__drag is None:
+            return
+        try:
+            if value is not None:
+                self.dragTo(value)
+        finally:
+            self.__drag = None
+            self.cache.sceneQuery.closeUndoChunk()
+
+    def __write(self, attribute, nodes, values):
+        if not nodes:
+            return
+        if not isinstance(values, (list, tuple)) or len(values) != len(nodes):
+            values = [values] * len(nodes)
+        failed = set()
+        for node, error in self.cache.sceneQuery.writeAttribute(nodes, attribute, values):
+            cmds.warning("Could not set %s.%s: %s" % (node, attribute, error))
+            failed.add(node)
+            # the value maya kept is read back by refresh
+            self.cache.invalidate(node, [attribute])
+        written = [(node, value) for node, value in zip(nodes, values) if node not in failed]
+        self.cache.update([node for node, value in written], attribute, [value for node, value in written])
+        self.refresh()
+
+    @staticmethod
+    def __isScalar(value):
+        return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+    def __collectAttributes(self):
+        typeAttributes = {}
+        self.__typeAttributes = {}
+        for node, nodeType in zip(self.__nodes, self.__nodeTypes):
+            if nodeType not in typeAttributes:
+                typeAttributes[nodeType] = self.cache.attributes(nodeType, node)
+                self.__typeAttributes[nodeType] = (node, typeAttributes[nodeType])
+        self.__nodeAttributes = [set(typeAttributes[nodeType]) for nodeType in self.__nodeTypes]
+
+        attributes = []
+        if typeAttributes:
+            lists = list(typeAttributes.values())
+            common = set(lists[0])
+            for names in lists[1:]:
+                if self.mode == self.Union:
+                    common.update(names)
+                else:
+                    common.intersection_update(names)
+            # first seen order keeps each type's own attribute ordering
+            seen = set()
+            for names in lists:
+                for name in names:
+                    if name in common and name not in seen:
+                        seen.add(name)
+                        attributes.append(name)
+        self.__allAttributes = attributes
+        self.__filterAttributes()
+
+    def __filterAttributes(self):
+        if not self.filterText:
+            self.__attributes = self.__allAttributes
+            return
+        if self.attributeIndex is None:
+            import AttributeIndex as AI
+            self.attributeIndex = AI.AttributeIndex()
+        # maya is only asked about a type the first time a filter is used on it
+        for nodeType, (node, attributes) in self.__typeAttributes.items():
+            self.attributeIndex.build(nodeType, node, attributes)
+        matches = self.attributeIndex.search(self.filterText, self.__typeAttributes)
+        if matches is None:
+            self.__attributes = self.__allAttributes
+        else:
+            self.__attributes = [attribute for attribute in self.__allAttributes if attribute in matches]
+
+    def __readValues(self):
+        wanted = [[attribute for attribute in self.__attributes if attribute in nodeAttributes]
+                  for nodeAttributes in self.__nodeAttributes]
+        nodeValues = self.cache.values(self.__nodes, wanted)
+
+        values = {}
+        for attribute in self.__attributes:
+            value = None
+            mixed = False
+            found = False
+            for nodeAttributes, nodeValue in zip(self.__nodeAttributes, nodeValues):
+                if attribute not in nodeAttributes or attribute not in nodeValue:
+                    continue
+                if not found:
+                    value = nodeValue[attribute]
+                    found = True
+                elif nodeValue[attribute] != value:
+                    mixed = True
+                    break
+            values[attribute] = (value, mixed)
+        self.__values = values
+
+    @staticmethod
+    def formatValue(value):
+        if value is None:
+            return ""
+        if isinstance(value, bool):
+            return "on" if value else "off"
+        if isinstance(value, float):
+            return "%.4g" % value
+        if isinstance(value, (list, tuple)):
+            return ", ".join(AttributeModel.formatValue(item) for item in value)
+        return str(value)
@@ -0,0 +1,188 @@
+"""Applies one light preset to many scene files, without the UI.
+
+    mayapy BatchApply.py preset.lightpreset shots/*.ma --processes 8 --report report.json
+    python BatchApply.py preset.lightpreset scenes/*.scene --fake --dry-run
+
+Every scene is opened by a worker process running its own standalone interpreter. The worker diffs the
+scene against the preset, writes only the attributes that differ and saves the scene. --fake runs the
+workers against the in-memory maya.cmds from benchmarks/FakeMaya.py and its text scene files.
+"""
+import argparse
+import atexit
+import json
+import multiprocessing
+import multiprocessing.util
+import os
+import sys
+import time
+import traceback
+
+root = os.path.dirname(os.path.abspath(__file__))
+
+# set by initWorker, once per worker process
+cmds = None
+presets = {}
+
+
+def initWorker(fake):
+    # type: (bool) -> None
+    global cmds
+    if fake:
+        sys.path.insert(0, os.path.join(root, "benchmarks"))
+        import FakeMaya
+        cmds = FakeMaya.install()
+        return
+    import maya.standalone
+    maya.standalone.initialize(name="python")
+    # workers recycled by maxtasksperchild exit on their own, mayapy can hang on exit without this. Forked
+    # workers leave through os._exit, which skips atexit and only runs multiprocessing's finalizers
+    atexit.register(uninitializeWorker)
+    multiprocessing.util.Finalize(None, uninitializeWorker, exitpriority=0)
+    from maya import cmds as mayaCmds
+    cmds = mayaCmds
+
+
+def uninitializeWorker():
+    global cmds
+    if cmds is None:
+        return
+    cmds = None
+    import maya.standalone
+    maya.standalone.uninitialize()
+
+
+def loadPreset(fileName):
+    # type: (str) -> dict
+    # a worker applies the same preset to every scene it gets, it is opened once per process
+    preset = presets.get(fileName)
+    if preset is None:
+        import JSonUtils as JSU
+        preset = presets[fileName] = JSU.JSonUtils().open(fileName)
+    return preset
+
+
+def applyScene(task):
+    # type: (dict) -> dict
+    import LightLister as LL
+    import PresetDiff as PD
+
+    result = {"scene": task["scene"], "ok": False, "error": "", "timings": {}, "writes": 0, "lights": 0,
+              "skipped": 0, "attributes": {}, "failedWrites": [], "pid": os.getpid()}
+    timings = result["timings"]
+    start = time.time()
+    try:
+        preset = loadPreset(task["preset"])
+        timings["preset"] = time.time() - start
+
+        mark = time.time()
+        cmds.file(task["scene"], open=True, force=True)
+        timings["open"] = time.time() - mark
+
+        mark = time.time()
+        logic = LL.LightLister()
+        logic.loadedData = preset
+        plan = PD.computePlan(logic)
+        timings["diff"] = time.time() - mark
+        result["writes"] = len(plan)
+        result["lights"] = len(plan.lights)
+        result["skipped"] = len(plan.skipped)
+        result["attributes"] = dict((attribute, len(nodes)) for attribute, (nodes, values) in plan.groups.items())
+
+        if not task["dryRun"]:
+            mark = time.time()
+            for attribute, nodes, values in plan.chunks(task["chunkSize"]):
+                for node, error in logic.sceneQuery.writeAttribute(nodes, attribute, values):
+                    result["failedWrites"].append("%s.%s: %s" % (node, attribute, error))
+            timings["apply"] = time.time() - mark
+
+            mark = time.time()
+            if task["outputDir"]:
+                cmds.file(rename=os.path.join(task["outputDir"], os.path.basename(task["scene"])))
+            if plan or task["outputDir"]:
+                cmds.file(save=True, force=True)
+            timings["save"] = time.time() - mark
+        result["ok"] = True
+    except Exception:
+        # one broken shot must not take the rest of the batch down with it
+        result["error"] = traceback.format_exc()
+    timings["total"] = time.time() - start
+    return result
+
+
+def runBatch(preset, scenes, processes=None, outputDir=None, dryRun=False, fake=False, chunkSize=1000,
+             scenesPerProcess=20, callback=None):
+    # type: (str, list, int, str, bool, bool, int, int, callable) -> list
+    """Applies preset to every scene in a pool of worker processes and returns one result per scene.
+
+    Workers are replaced after scenesPerProcess scenes, so memory a scene leaves behind does not pile up.
+    """
+    tasks = [{"preset": os.path.abspath(preset), "scene": os.path.abspath(scene), "outputDir": outputDir,
+              "dryRun": dryRun, "chunkSize": chunkSize} for scene in scenes]
+    if outputDir and not os.path.exists(outputDir):
+        os.makedirs(outputDir)
+
+    results = []
+    pool = multiprocessing.Pool(processes, initializer=initWorker, initargs=(fake,),
+                                maxtasksperchild=scenesPerProcess)
+    try:
+        for result in pool.imap_unordered(applyScene, tasks):
+            results.append(result)
+            if callback is not None:
+                callback(result, len(results), len(tasks))
+    finally:
+        pool.close()
+        pool.join()
+    return results
+
+
+def printResult(result, done, total):
+    # type: (dict, int, int) -> None
+    status = "ok" if result["ok"] else "FAILED"
+    print("[%d/%d] %-6s %7.2fs %6d writes on %5d lights  %s" % (done, total, status, result["timings"]["total"],
+                                                                result["writes"], result["lights"], result["scene"]))
+    if not result["ok"]:
+        print(result["error"])
+    for failure in result["failedWrites"]:
+        print("    could not set %s" % failure)
+
+
+def summary(results, elapsed):
+    # type: (list, float) -> str
+    failures = [result for result in results if not result["ok"]]
+    writes = sum(result["writes"] for result in results)
+    sceneTime = sum(result["timings"]["total"] for result in results)
+    lines = ["%d scenes, %d failed, %d writes in %.2fs (%.2fs of scene time)"
+             % (len(results), len(failures), writes, elapsed, sceneTime)]
+    for result in failures:
+        lines.append("    failed: %s" % result["scene"])
+    return "\n".join(lines)
+
+
+def main(arguments=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("preset", help="light preset to apply")
+    parser.add_argument("scenes", nargs="+", help="scene files")
+    parser.add_argument("--processes", type=int, default=None, help="worker processes, one per core by default")
+    parser.add_argument("--output-dir", help="save the scenes here instead of overwriting them")
+    parser.add_argument("--dry-run", action="store_true", help="report the differences without writing")
+    parser.add_argument("--report", help="write the per scene results as json")
+    parser.add_argument("--scenes-per-process", type=int, default=20)
+    parser.add_argument("--fake", action="store_true", help="use the in-memory maya.cmds and text scenes")
+    options = parser.parse_args(arguments)
+
+    start = time.time()
+    results = runBatch(options.preset, options.scenes, options.processes, options.output_dir, options.dry_run,
+                       options.fake, scenesPerProcess=options.scenes_per_process, callback=printResult)
+    elapsed = time.time() - start
+    print(summary(results, elapsed))
+
+    if options.report:
+        with open(options.report, "w") as reportFile:
+            json.dump({"preset": os.path.abspath(options.preset), "dryRun": options.dry_run, "elapsed": elapsed,
+                       "results": sorted(results, key=lambda result: result["scene"])},
+                      reportFile, indent=2, sort_keys=True)
+    return 0 if all(result["ok"] for result in results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,80 +2,192 @@ from PySide2 import QtSvg, QtCore, QtGui
 from maya import cmds
 import os
 
+import LightStatus as LS
+import LightStore as LSt
+import Profiler as PRF
+
+
+class IconCache:
+    # budget in kilobytes, shared by every IconRenderer in the process
+    cacheLimit = 4096
+
+    __configured = False
+
+    def __init__(self):
+        pass
+
+    @classmethod
+    def key(cls, name, size, ratio):
+        # type: (str, int, float) -> str
+        return "LightLister:%s@%d@%g" % (name, size, ratio)
+
+    @classmethod
+    def find(cls, key):
+        # type: (str) -> QtGui.QPixmap
+        cls.__configure()
+        pixmap = QtGui.QPixmap()
+        if QtGui.QPixmapCache.find(key, pixmap):
+            return pixmap
+        return None
+
+    @classmethod
+    def insert(cls, key, pixmap):
+        # type: (str, QtGui.QPixmap) -> QtGui.QPixmap
+        cls.__configure()
+        QtGui.QPixmapCache.insert(key, pixmap)
+        return pixmap
+
+    @classmethod
+    def __configure(cls):
+        if cls.__configured:
+            return
+        cls.__configured = True
+        if QtGui.QPixmapCache.cacheLimit() < cls.cacheLimit:
+            QtGui.QPixmapCache.setCacheLimit(cls.cacheLimit)
+
+
+class StatusAtlas:
+    glyphs = ("checkmark", "cross", "exclamation", "plus")
+
+    __atlases = {}
+
+    def __init__(self, size, ratio):
+        self.size = size
+        self.ratio = ratio
+        PRF.count("iconsLoaded", len(self.glyphs))
+        pixelSize = int(round(size * ratio))
+
+        self.pixmap = QtGui.QPixmap(pixelSize * len(self.glyphs), pixelSize)
+        self.pixmap.fill(QtCore.Qt.transparent)
+        painter = QtGui.QPainter(self.pixmap)
+        painter.setRenderHint(QtGui.QPainter.Antialiasing)
+        for i, glyph in enumerate(self.glyphs):
+            painter.save()
+            painter.translate(i * pixelSize, 0)
+            painter.scale(pixelSize / float(IconRenderer.canvasSize), pixelSize / float(IconRenderer.canvasSize))
+            painter.setClipRect(QtCore.QRect(0, 0, IconRenderer.canvasSize, IconRenderer.canvasSize))
+            IconRenderer.drawGlyph(painter, glyph)
+            painter.restore()
+        painter.end()
+
+        self.__icons = {}
+        for i, glyph in enumerate(self.glyphs):
+            icon = self.pixmap.copy(QtCore.QRect(i * pixelSize, 0, pixelSize, pixelSize))
+            icon.setDevicePixelRatio(ratio)
+            self.__icons[glyph] = icon
+
+    def icon(self, glyph):
+        # type: (str) -> QtGui.QPixmap
+        return self.__icons[glyph]
+
+    @classmethod
+    def get(cls, size, ratio):
+        # type: (int, float) -> StatusAtlas
+        atlas = cls.__atlases.get((size, ratio))
+        if atlas is None:
+            atlas = StatusAtlas(size, ratio)
+            cls.__atlases[(size, ratio)] = atlas
+        return atlas
+
 
 class IconRenderer:
+    canvasSize = 512
+    goldenRatio = 0.666
+
+    statusGlyphs = {
+        LS.LightStatus.Found: "checkmark",
+        LS.LightStatus.Outdated: "exclamation",
+        LS.LightStatus.Add: "plus",
+        LS.LightStatus.Missing: "cross",
+    }
+
+    __shared = None
+
     def __init__(self, startDir=None):
+        # only the svg export writes to disk, the directory is resolved and created when that runs
         self.__startDir = startDir
-        if not startDir:
-            self.__startDir = os.path.join(cmds.internalVar(userScriptDir=True), "/LightLister/Icons")
 
-        self.__checkDir()
-
-        self.__width = self.__height = 512
-        self.__thickness = self.__width / 10
-        self.__goldenRatio = 0.666
+        self.__width = self.__height = self.canvasSize
         self.__scale = 48
 
-        self.__ratio = self.__width * self.__goldenRatio
-        self.__invertedRatio = self.__width * (1 - self.__goldenRatio)
-
-        self.__loadedIcons = {}
-        self.requiredChecked = False
-
-    def getIcons(self, **kwargs):
-        icons = []
-        if "checkmark" in kwargs and kwargs["checkmark"]:
-            icon = self.__loadIcon("checkmark.svg")
-            if icon:
-                icons.append(icon)
-        if "cross" in kwargs and kwargs["cross"]:
-            icon = self.__loadIcon("cross.svg")
-            if icon:
-                icons.append(icon)
-        if "exclamation" in kwargs and kwargs["exclamation"]:
-            icon = self.__loadIcon("exclamation.svg")
-            if icon:
-                icons.append(icon)
-        if "plus" in kwargs and kwargs["plus"]:
-            icon = self.__loadIcon("plus.svg")
-            if icon:
-                icons.append(icon)
-        return icons
+        # the final pixmaps by type code and by status, a painted cell costs one dict lookup
+        self.__ratio = None
+        self.__typeIcons = {}
+        self.__statusIcons = {}
+
+    @property
+    def startDir(self):
+        # type: () -> str
+        if not self.__startDir:
+            self.__startDir = os.path.join(cmds.internalVar(userScriptDir=True), "LightLister", "Icons")
+        return self.__startDir
+
+    @classmethod
+    def shared(cls):
+        # type: () -> IconRenderer
+        if cls.__shared is None:
+            cls.__shared = IconRenderer()
+        return cls.__shared
+
+    @staticmethod
+    def devicePixelRatio():
+        application = QtGui.QGuiApplication.instance()
+        if application is None:
+            return 1.0
+        return application.devicePixelRatio()
+
+    def pixelRatio(self):
+        # type: () -> float
+        # read once, invalidate() when the window moves to a screen with another ratio
+        if self.__ratio is None:
+            self.__ratio = self.devicePixelRatio()
+        return self.__ratio
+
+    def invalidate(self):
+        self.__ratio = None
+        self.__typeIcons.clear()
+        self.__statusIcons.clear()
+
+    def typeIcon(self, typeCode):
+        # type: (int) -> QtGui.QPixmap
+        icon = self.__typeIcons.get(typeCode)
+        if icon is None:
+            icon = self.__typeIcons[typeCode] = self.getIcon('%s.svg' % LSt.LightTypes.name(typeCode))
+        return icon
 
     def getIcon(self, path="", **kwargs):
         if len(path) > 0:
-            icon = QtGui.QPixmap(":/%s" % path)
-            return icon.scaledToWidth(self.__scale)
-        if "checkmark" in kwargs and kwargs["checkmark"]:
-            icon = self.__loadIcon("checkmark.svg")
-            if icon:
-                return icon
-        if "cross" in kwargs and kwargs["cross"]:
-            icon = self.__loadIcon("cross.svg")
-            if icon:
-                return icon
-        if "exclamation" in kwargs and kwargs["exclamation"]:
-            icon = self.__loadIcon("exclamation.svg")
-            if icon:
-                return icon
-        if "plus" in kwargs and kwargs["plus"]:
-            icon = self.__loadIcon("plus.svg")
-            if icon:
-                return icon
-        return QtGui.QPixmap(":/greasePencilHelp.png")
-        # return QtGui.QPixmap(":/greasePencilHelp.png").scaledToWidth(self.__scale)
-
-    def __loadIcon(self, path):
-        if path in self.__loadedIcons:
-            return self.__loadedIcons[path]
-
-        icon = QtGui.QPixmap(os.path.join(self.__startDir, path))
-        if not icon.isNull():
-            self.__loadedIcons[path] = icon.scaledToWidth(self.__scale)
-            return self.__loadedIcons[path]
-
-        cmds.warning("%s not found" % path)
-        return None
+            return self.__loadResource(path, self.__scale)
+        for glyph in ("checkmark", "cross", "exclamation", "plus"):
+            if glyph in kwargs and kwargs[glyph]:
+                return self.__atlas().icon(glyph)
+        return self.__loadResource("greasePencilHelp.png", 0)
+
+    def statusIcon(self, status):
+        # type: (int) -> QtGui.QPixmap
+        icon = self.__statusIcons.get(status)
+        if icon is None:
+            glyph = self.statusGlyphs.get(status)
+            icon = self.getIcon() if glyph is None else self.__atlas().icon(glyph)
+            self.__statusIcons[status] = icon
+        return icon
+
+    def __atlas(self):
+        return StatusAtlas.get(self.__scale, self.pixelRatio())
+
+    def __loadResource(self, path, width):
+        ratio = self.pixelRatio()
+        key = IconCache.key(path, width, ratio)
+        icon = IconCache.find(key)
+        if icon is not None:
+            return icon
+
+        PRF.count("iconsLoaded")
+        icon = QtGui.QPixmap(":/%s" % path)
+        if width and not icon.isNull():
+            icon = icon.scaledToWidth(int(round(width * ratio)), QtCore.Qt.SmoothTransformation)
+            icon.setDevicePixelRatio(ratio)
+        return IconCache.insert(key, icon)
 
     def renderAll(self):
         self.renderCheckmark()
@@ -83,74 +195,63 @@ class IconRenderer:
         self.renderExclamation()
         self.renderPlus()
 
-    def renderRequired(self):
-        self.requiredChecked = True
-        if not self.__checkDir():
-            self.renderAll()
-            return
-        if not self.__fileExists("checkmark.svg"):
-            self.renderCheckmark()
-        if not self.__fileExists("cross.svg"):
-            self.renderCross()
-        if not self.__fileExists("exclamation.svg"):
-            self.renderExclamation()
-        if not self.__fileExists("plus.svg"):
-            self.renderPlus()
-
-    def __fileExists(self, path):
-        return os.path.exists(os.path.join(self.__startDir, path))
-
     def __initSVGFile(self, filename):
+        if not os.path.exists(self.startDir):
+            os.makedirs(self.startDir)
         generator = QtSvg.QSvgGenerator()
-        generator.setFileName(os.path.join(self.__startDir, filename))
+        generator.setFileName(os.path.join(self.startDir, filename))
         generator.setSize(QtCore.QSize(self.__width, self.__height))
         generator.setViewBox(QtCore.QRect(0, 0, self.__width, self.__height))
         painter = QtGui.QPainter(generator)
         painter.setClipRect(QtCore.QRect(0, 0, self.__width, self.__height))
         return generator, painter
 
-    def __checkDir(self):
-        if not os.path.exists(self.__startDir):
-            os.makedirs(self.__startDir)
-            return False
-        return True
+    def __renderSVG(self, glyph):
+        generator, painter = self.__initSVGFile("%s.svg" % glyph)
+        self.drawGlyph(painter, glyph)
+        painter.end()
 
     def renderCheckmark(self):
-        invertedRatio = self.__width * (1 - self.__goldenRatio)
-        ratio = self.__width * self.__goldenRatio
-
-        generator, painter = self.__initSVGFile("checkmark.svg")
-        painter.translate(invertedRatio, self.__height - 2.5 * self.__thickness)
-        painter.setPen(QtGui.QPen(QtCore.Qt.green, self.__thickness))
-        marginRatio = ratio * 0.85
-        invertedRatio *= 0.75
-        painter.drawLine(QtCore.QLine(0, 0, marginRatio, -marginRatio))
-        painter.drawLine(QtCore.QLine(0, 0, -invertedRatio, -invertedRatio))
-        painter.end()
+        self.__renderSVG("checkmark")
 
     def renderCross(self):
-        generator, painter = self.__initSVGFile("cross.svg")
-        painter.setPen(QtGui.QPen(QtCore.Qt.red, self.__thickness))
-        painter.drawLine(QtCore.QLine(self.__thickness, self.__thickness, self.__width - self.__thickness, self.__height - self.__thickness))
-        painter.drawLine(QtCore.QLine(self.__width - self.__thickness, self.__thickness, self.__thickness, self.__height - self.__thickness))
-        painter.end()
+        self.__renderSVG("cross")
 
     def renderExclamation(self):
-        ratio = self.__width * self.__goldenRatio
+        self.__renderSVG("exclamation")
 
-        generator, painter = self.__initSVGFile("exclamation.svg")
-        painter.setPen(QtGui.QPen(QtCore.Qt.yellow, self.__thickness))
-        painter.translate(self.__width / 2, self.__thickness / 2)
-        painter.drawLine(QtCore.QLine(0, 0, 0, ratio))
-        painter.drawLine(QtCore.QLine(0, self.__height - self.__thickness / 2, 0, self.__height - self.__thickness))
-        painter.end()
-        
     def renderPlus(self):
-        generator, painter = self.__initSVGFile("plus.svg")
-        painter.setPen(QtGui.QPen(QtCore.Qt.white, self.__thickness))
-        painter.drawLine(QtCore.QLine(self.__thickness, self.__height / 2, self.__width - self.__thickness, self.__height / 2))
-        painter.drawLine(QtCore.QLine(self.__width / 2, self.__thickness, self.__width / 2, self.__height - self.__thickness))
-        painter.end()
+        self.__renderSVG("plus")
+
+    @classmethod
+    def drawGlyph(cls, painter, glyph):
+        # type: (QtGui.QPainter, str) -> None
+        # glyphs are drawn on a canvasSize square canvas
+        width = height = cls.canvasSize
+        thickness = width / 10
+        ratio = width * cls.goldenRatio
+        invertedRatio = width * (1 - cls.goldenRatio)
+
+        if glyph == "checkmark":
+            painter.translate(invertedRatio, height - 2.5 * thickness)
+            painter.setPen(QtGui.QPen(QtCore.Qt.green, thickness))
+            marginRatio = ratio * 0.85
+            invertedRatio *= 0.75
+            painter.drawLine(QtCore.QLineF(0, 0, marginRatio, -marginRatio))
+            painter.drawLine(QtCore.QLineF(0, 0, -invertedRatio, -invertedRatio))
+        elif glyph == "cross":
+            painter.setPen(QtGui.QPen(QtCore.Qt.red, thickness))
+            painter.drawLine(QtCore.QLineF(thickness, thickness, width - thickness, height - thickness))
+            painter.drawLine(QtCore.QLineF(width - thickness, thickness, thickness, height - thickness))
+        elif glyph == "exclamation":
+            painter.setPen(QtGui.QPen(QtCore.Qt.yellow, thickness))
+            painter.translate(width / 2, thickness / 2)
+            painter.drawLine(QtCore.QLineF(0, 0, 0, ratio))
+            painter.drawLine(QtCore.QLineF(0, height - thickness / 2, 0, height - thickness))
+        elif glyph == "plus":
+            painter.setPen(QtGui.QPen(QtCore.Qt.white, thickness))
+            painter.drawLine(QtCore.QLineF(thickness, height / 2, width - thickness, height / 2))
+            painter.drawLine(QtCore.QLineF(width / 2, thickness, width / 2, height - thickness))
 
     @property
     def scale(self):
@@ -1,12 +1,441 @@
 import json
+import mmap
+import os
+import struct
+import zlib
+from collections import OrderedDict
+
+
+# Preset file layout:
+#   header   magic, flags, index offset and index size (headerSize bytes)
+#   records  one encoded attribute dict per light, each optionally its own gzip member
+#   index    [[light, type, offset, size], ...] encoded like the records, never compressed
+# The header points at the index so a reader can find any light without parsing the others.
+magic = b"LPRESET\x01"
+headerFormat = "<8sBxxxxxxxQQ"
+headerSize = struct.calcsize(headerFormat)
+
+Compressed = 1
+Binary = 2
+
+
+class PresetFormatError(ValueError):
+    pass
+
+
+def encodeBinary(value):
+    # type: (object) -> bytes
+    chunks = []
+    _encode(value, chunks)
+    return b"".join(chunks)
+
+
+def decodeBinary(data):
+    # type: (bytes) -> object
+    value, offset = _decode(memoryview(data), 0)
+    return value
+
+
+def _encodeText(text, chunks, lengthFormat="<I"):
+    data = text.encode("utf-8")
+    chunks.append(struct.pack(lengthFormat, len(data)))
+    chunks.append(data)
+
+
+def _encode(value, chunks):
+    if value is None:
+        chunks.append(b"N")
+    elif value is True:
+        chunks.append(b"T")
+    elif value is False:
+        chunks.append(b"F")
+    elif isinstance(value, int) and -2 ** 63 <= value < 2 ** 63:
+        chunks.append(b"i" + struct.pack("<q", value))
+    elif isinstance(value, float):
+        chunks.append(b"d" + struct.pack("<d", value))
+    elif isinstance(value, (list, tuple)):
+        if value and all(type(item) is float for item in value):
+            # colours and vectors, the most common compound attribute values
+            chunks.append(b"v" + struct.pack("<I%dd" % len(value), len(value), *value))
+            return
+        chunks.append(b"l" + struct.pack("<I", len(value)))
+        for item in value:
+            _encode(item, chunks)
+    elif isinstance(value, dict):
+        chunks.append(b"m" + struct.pack("<I", len(value)))
+        for key, item in value.items():
+            _encodeText(key, chunks, "<H")
+            _encode(item, chunks)
+    else:
+        chunks.append(b"s")
+        _encodeText(value if isinstance(value, type(u"")) else str(value), chunks)
+
+
+def _decode(data, offset):
+    tag = data[offset:offset + 1].tobytes()
+    offset += 1
+    if tag == b"N":
+        return None, offset
+    if tag == b"T":
+        return True, offset
+    if tag == b"F":
+        return False, offset
+    if tag == b"i":
+        return struct.unpack_from("<q", data, offset)[0], offset + 8
+    if tag == b"d":
+        return struct.unpack_from("<d", data, offset)[0], offset + 8
+    if tag == b"s":
+        size = struct.unpack_from("<I", data, offset)[0]
+        offset += 4
+        return data[offset:offset + size].tobytes().decode("utf-8"), offset + size
+    if tag == b"v":
+        size = struct.unpack_from("<I", data, offset)[0]
+        offset += 4
+        return list(struct.unpack_from("<%dd" % size, data, offset)), offset + 8 * size
+    if tag == b"l":
+        size = struct.unpack_from("<I", data, offset)[0]
+        offset += 4
+        items = []
+        for i in range(size):
+            item, offset = _decode(data, offset)
+            items.append(item)
+        return items, offset
+    if tag == b"m":
+        size = struct.unpack_from("<I", data, offset)[0]
+        offset += 4
+        items = {}
+        for i in range(size):
+            keySize = struct.unpack_from("<H", data, offset)[0]
+            offset += 2
+            key = data[offset:offset + keySize].tobytes().decode("utf-8")
+            offset += keySize
+            items[key], offset = _decode(data, offset)
+        return items, offset
+    raise PresetFormatError("unknown value tag %r" % tag)
+
+
+def encodeRecord(attributes, flags):
+    # type: (dict, int) -> bytes
+    if flags & Binary:
+        data = encodeBinary(attributes)
+    else:
+        data = json.dumps(attributes, separators=(",", ":")).encode("utf-8")
+    if flags & Compressed:
+        compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+        data = compressor.compress(data) + compressor.flush()
+    return data
+
+
+def decodeRecord(data, flags):
+    # type: (bytes, int) -> dict
+    if flags & Compressed:
+        data = zlib.decompress(bytes(data), 16 + zlib.MAX_WBITS)
+    if flags & Binary:
+        return decodeBinary(data)
+    return json.loads(bytes(data).decode("utf-8"))
+
+
+def encodeIndex(entries, flags):
+    if flags & Binary:
+        return encodeBinary(entries)
+    return json.dumps(entries, separators=(",", ":")).encode("utf-8")
+
+
+def decodeIndex(data, flags):
+    if flags & Binary:
+        return decodeBinary(data)
+    return json.loads(bytes(data).decode("utf-8"))
+
+
+def readHeader(header, fileName):
+    # type: (bytes, str) -> tuple
+    """Returns (flags, index offset, index size) of a preset header."""
+    if len(header) < headerSize:
+        raise PresetFormatError("%s is not a light preset" % fileName)
+    fileMagic, flags, indexOffset, indexSize = struct.unpack(headerFormat, header[:headerSize])
+    if fileMagic != magic:
+        raise PresetFormatError("%s is not a light preset" % fileName)
+    if not indexOffset:
+        raise PresetFormatError("%s was not closed properly, its index is missing" % fileName)
+    return flags, indexOffset, indexSize
+
+
+def isPreset(fileName):
+    # type: (str) -> bool
+    with open(fileName, "rb") as presetFile:
+        return presetFile.read(len(magic)) == magic
+
+
+def replaceFile(source, target):
+    # type: (str, str) -> None
+    """Renames source over target, atomically where os.replace exists. Python 2 removes target first."""
+    if not hasattr(os, "replace"):
+        if os.path.exists(target):
+            os.remove(target)
+        os.rename(source, target)
+        return
+    os.replace(source, target)
+
+
+class PresetWriter:
+    """Streams records into a preset file, the index is written on close.
+
+    With append the existing records are kept and written or removed lights replace them. New records go
+    after the old index, so the file stays readable until the header is patched. Replaced records are left
+    in place as garbage until JSonUtils.compact rewrites the file.
+    """
+
+    def __init__(self, fileName, compress=False, binary=False, append=False):
+        self.fileName = fileName
+        self.flags = (Compressed if compress else 0) | (Binary if binary else 0)
+        # bytes no longer referenced by the index
+        self.garbage = 0
+        self.__index = {}
+        if not append:
+            self.__file = open(fileName, "wb")
+            self.__file.write(struct.pack(headerFormat, magic, self.flags, 0, 0))
+            self.__offset = headerSize
+            return
+
+        # the existing flags win, records of one file are all encoded the same way
+        self.__file = open(fileName, "r+b")
+        try:
+            self.flags, indexOffset, indexSize = readHeader(self.__file.read(headerSize), fileName)
+            self.__file.seek(indexOffset)
+            for entry in decodeIndex(self.__file.read(indexSize), self.flags):
+                self.__index[entry[0]] = entry
+        except Exception:
+            self.__file.close()
+            raise
+        self.__offset = indexOffset + indexSize
+        self.garbage = self.__offset - headerSize - self.live
+        self.__file.seek(self.__offset)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+        return False
+
+    @property
+    def live(self):
+        # type: () -> int
+        return sum(entry[3] for entry in self.__index.values())
+
+    def __contains__(self, light):
+        return light in self.__index
+
+    def write(self, light, attributes):
+        # type: (str, dict) -> None
+        data = encodeRecord(attributes, self.flags)
+        self.__file.write(data)
+        if light in self.__index:
+            self.garbage += self.__index[light][3]
+        self.__index[light] = [light, attributes.get("Type", ""), self.__offset, len(data)]
+        self.__offset += len(data)
+
+    def remove(self, light):
+        # type: (str) -> None
+        entry = self.__index.pop(light, None)
+        if entry is not None:
+            self.garbage += entry[3]
+
+    def close(self):
+        if self.__file is None:
+            return
+        index = encodeIndex(list(self.__index.values()), self.flags)
+        self.__file.write(index)
+        self.__file.truncate()
+        self.__file.flush()
+        self.__file.seek(0)
+        self.__file.write(struct.pack(headerFormat, magic, self.flags, self.__offset, len(index)))
+        self.__file.close()
+        self.__file = None
+
+
+class PresetReader:
+    def __init__(self, fileName):
+        self.fileName = fileName
+        self.__file = open(fileName, "rb")
+        try:
+            self.flags, indexOffset, indexSize = readHeader(self.__file.read(headerSize), fileName)
+        except PresetFormatError:
+            self.close()
+            raise
+
+        self.__file.seek(indexOffset)
+        # light -> (type, offset, size)
+        self.index = dict((entry[0], (entry[1], entry[2], entry[3]))
+                          for entry in decodeIndex(self.__file.read(indexSize), self.flags))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+        return False
+
+    def __len__(self):
+        return len(self.index)
+
+    def __contains__(self, light):
+        return light in self.index
+
+    def __iter__(self):
+        return self.readMany(self.index)
+
+    def keys(self):
+        return self.index.keys()
+
+    def lightType(self, light):
+        # type: (str) -> str
+        return self.index[light][0]
+
+    def read(self, light):
+        # type: (str) -> dict
+        lightType, offset, size = self.index[light]
+        self.__file.seek(offset)
+        return decodeRecord(self.__file.read(size), self.flags)
+
+    def readMany(self, lights):
+        # in file order, so a subset is read front to back
+        entries = sorted((self.index[light][1], self.index[light][2], light) for light in lights if light in self.index)
+        for offset, size, light in entries:
+            self.__file.seek(offset)
+            yield light, decodeRecord(self.__file.read(size), self.flags)
+
+    def close(self):
+        if self.__file is not None:
+            self.__file.close()
+            self.__file = None
+
+
+class LazyPreset(object):
+    """Read-only mapping of light -> attributes over a memory mapped preset, decoded on access.
+
+    Decoded lights are kept in an LRU of cacheSize. It serves what reads a preset, the status engine,
+    PresetDiff and BatchApply. LightLister.extendLoadedData copies it into a dict before editing it.
+    """
+
+    def __init__(self, fileName, cacheSize=1024):
+        self.fileName = fileName
+        self.cacheSize = cacheSize
+        self.__cache = OrderedDict()
+
+        with open(fileName, "rb") as presetFile:
+            self.__map = mmap.mmap(presetFile.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            self.flags, indexOffset, indexSize = readHeader(self.__map[:headerSize], fileName)
+        except PresetFormatError:
+            self.close()
+            raise
+
+        # light -> (type, offset, size), the only part that is parsed up front
+        self.index = dict((entry[0], (entry[1], entry[2], entry[3]))
+                          for entry in decodeIndex(self.__map[indexOffset:indexOffset + indexSize], self.flags))
+
+    def __len__(self):
+        return len(self.index)
+
+    def __contains__(self, light):
+        return light in self.index
+
+    def __iter__(self):
+        return iter(self.index)
+
+    def keys(self):
+        return self.index.keys()
+
+    def lightType(self, light):
+        # type: (str) -> str
+        return self.index[light][0]
+
+    def __getitem__(self, light):
+        attributes = self.__cache.get(light)
+        if attributes is not None:
+            self.__touch(light)
+            return attributes
+
+        lightType, offset, size = self.index[light]
+        attributes = decodeRecord(self.__map[offset:offset + size], self.flags)
+        self.__cache[light] = attributes
+        if len(self.__cache) > self.cacheSize:
+            self.__cache.popitem(last=False)
+        return attributes
+
+    def get(self, light, default=None):
+        if light not in self.index:
+            return default
+        return self[light]
+
+    def items(self):
+        # streams through the file without filling the cache
+        for light, (lightType, offset, size) in sorted(self.index.items(), key=lambda item: item[1][1]):
+            attributes = self.__cache.get(light)
+            if attributes is None:
+                attributes = decodeRecord(self.__map[offset:offset + size], self.flags)
+            yield light, attributes
+
+    def cached(self):
+        return len(self.__cache)
+
+    def close(self):
+        self.__cache.clear()
+        if self.__map is not None:
+            self.__map.close()
+            self.__map = None
+
+    def __touch(self, light):
+        if hasattr(self.__cache, "move_to_end"):
+            self.__cache.move_to_end(light)
+        else:
+            self.__cache[light] = self.__cache.pop(light)
 
 
 class JSonUtils:
-    def __init__(self):
-        pass
+    def __init__(self, compress=False, binary=False):
+        self.compress = compress
+        self.binary = binary
 
     def save(self, data, fileName):
-        pass
+        # type: (dict, str) -> None
+        items = data.items() if hasattr(data, "items") else data
+        with PresetWriter(fileName, self.compress, self.binary) as writer:
+            for light, attributes in items:
+                writer.write(light, attributes)
+
+    def compact(self, fileName):
+        # type: (str) -> None
+        """Rewrites a preset without the records that appending left behind."""
+        compactName = fileName + ".compact"
+        with PresetReader(fileName) as reader:
+            flags = reader.flags
+            with PresetWriter(compactName, flags & Compressed, flags & Binary) as writer:
+                for light, attributes in reader.readMany(reader.index):
+                    writer.write(light, attributes)
+        replaceFile(compactName, fileName)
+
+    def open(self, fileName, cacheSize=1024):
+        # type: (str, int) -> LazyPreset
+        if not isPreset(fileName):
+            return self.load(fileName)
+        return LazyPreset(fileName, cacheSize)
+
+    def load(self, fileName, lights=None):
+        # type: (str, list) -> dict
+        return dict(self.iterLights(fileName, lights))
+
+    def iterLights(self, fileName, lights=None):
+        if not isPreset(fileName):
+            # plain json presets are still readable, they just cannot be streamed
+            with open(fileName) as presetFile:
+                data = json.load(presetFile)
+            for light, attributes in data.items():
+                if lights is None or light in lights:
+                    yield light, attributes
+            return
 
-    def load(self, fileName):
-        pass
+        with PresetReader(fileName) as reader:
+            for light, attributes in reader.readMany(reader.index if lights is None else lights):
+                yield light, attributes
@@ -0,0 +1,143 @@
+import fnmatch
+import re
+
+import Profiler as PRF
+
+
+class LightFilterQuery:
+    Substring = 0
+    Glob = 1
+    Regex = 2
+
+    def __init__(self, text, mode=Substring):
+        self.mode = mode
+        self.text = text
+        self.terms = []
+        self.typeTerms = []
+        self.valid = True
+
+        # searched text is lower case, regex tokens keep their case since \D is not \d
+        for token in text.split(" "):
+            if not token:
+                continue
+            if token[:len("type:")].lower() == "type:":
+                token = token[len("type:"):]
+                if token:
+                    self.typeTerms.append(self.__compile(token))
+                continue
+            self.terms.append(self.__compile(token))
+
+    def __compile(self, token):
+        if self.mode == self.Regex:
+            try:
+                return self.Regex, re.compile(token, re.IGNORECASE)
+            except re.error:
+                self.valid = False
+                return self.Substring, token.lower()
+        token = token.lower()
+        if self.mode == self.Glob or any(char in token for char in "*?["):
+            return self.Glob, re.compile(fnmatch.translate(token))
+        return self.Substring, token
+
+    def isEmpty(self):
+        return not self.terms and not self.typeTerms
+
+    def narrows(self, previous):
+        # type: (LightFilterQuery) -> bool
+        # every previous substring must be contained in one of ours, then our hits are a subset
+        if previous is None:
+            return False
+        return self.__covers(previous.terms, self.terms) and self.__covers(previous.typeTerms, self.typeTerms)
+
+    @classmethod
+    def __covers(cls, previousTerms, terms):
+        for previousKind, previousTerm in previousTerms:
+            if previousKind != cls.Substring:
+                return False
+            if not any(kind == cls.Substring and previousTerm in term for kind, term in terms):
+                return False
+        return True
+
+    @classmethod
+    def __match(cls, term, text):
+        kind, value = term
+        if kind == cls.Substring:
+            return value in text
+        if kind == cls.Glob:
+            return value.match(text) is not None
+        return value.search(text) is not None
+
+    def matches(self, entry):
+        # type: (LightSearchEntry) -> bool
+        for term in self.typeTerms:
+            if not self.__match(term, entry.type):
+                return False
+        for term in self.terms:
+            if self.__match(term, entry.name) or self.__match(term, entry.type):
+                continue
+            if not any(self.__match(term, segment) for segment in entry.segments):
+                return False
+        return True
+
+
+class LightSearchEntry(object):
+    __slots__ = ("name", "type", "segments", "typeCode")
+
+    def __init__(self, record):
+        # type: (LSt.LightRecord) -> None
+        self.name = record.displayName.lower()
+        self.type = record.lightType.lower()
+        self.segments = tuple(segment for segment in record.path.lower().split('|') if segment)
+        self.typeCode = record.typeCode
+
+
+class LightSearchIndex:
+    def __init__(self):
+        self.__store = None
+        self.__entries = {}
+        self.__lastQuery = None
+        self.__lastMatches = None
+
+    def __len__(self):
+        return len(self.__entries)
+
+    def update(self, store):
+        # type: (LSt.LightStore) -> bool
+        # a store only ever replaces records with others of the same path and type
+        if store is self.__store:
+            return False
+        self.__store = store
+        changed = False
+        for path in [path for path in self.__entries if path not in store]:
+            del self.__entries[path]
+            changed = True
+        for record in store:
+            entry = self.__entries.get(record.path)
+            if entry is not None and entry.typeCode == record.typeCode:
+                continue
+            self.__entries[record.path] = LightSearchEntry(record)
+            changed = True
+        if changed:
+            self.__lastQuery = None
+            self.__lastMatches = None
+        return changed
+
+    def query(self, text, mode=LightFilterQuery.Substring):
+        # type: (str, int) -> set
+        """Returns the matching paths, or None when the query is empty and everything matches."""
+        query = LightFilterQuery(text, mode)
+        if query.isEmpty():
+            self.__lastQuery = None
+            self.__lastMatches = None
+            return None
+
+        candidates = self.__entries
+        if query.narrows(self.__lastQuery):
+            candidates = self.__lastMatches
+
+        PRF.count("filterCandidates", len(candidates))
+        entries = self.__entries
+        matches = set(path for path in candidates if query.matches(entries[path]))
+        self.__lastQuery = query
+        self.__lastMatches = matches
+        return matches
@@ -1,29 +1,139 @@
-from maya import cmds
+import LightStatus as LS
+import LightStore as LSt
+import SceneQuery as SQ
+import StatusEngine as SE
 
 
-class LightLister:
-    def __init__(self):
-        self.lightShapes = cmds.ls(lights=True)
-        self.lightTransforms = [cmds.listRelatives(light, p=True)[0] for light in self.lightShapes]
-        self.loadedData = {}
+class LightLister(object):
+    def __init__(self, sceneQuery=None):
+        self.sceneQuery = sceneQuery
+        if self.sceneQuery is None:
+            self.sceneQuery = SQ.SceneQuery()
+        self.statusEngine = SE.StatusEngine(self.sceneQuery.readAttributes)
+        self.dataGeneration = 0
+        self.statusGeneration = 0
+        self.__loadedData = {}
+        self.__store = None
+        self.__storeGeneration = None
 
-    def _update(self):
-        self.lightShapes = cmds.ls(lights=True, long=True)
-        self.lightTransforms = [cmds.listRelatives(light, p=True, fullPath=True)[0] for light in self.lightShapes]
+    @property
+    def loadedData(self):
+        return self.__loadedData
+
+    @loadedData.setter
+    def loadedData(self, data):
+        self.__loadedData = data
+        self.statusEngine.setPreset(data)
+        self.dataGeneration += 1
+
+    def extendLoadedData(self, lights, removed=()):
+        # type: (dict, list) -> None
+        """Adds or replaces lights in the loaded preset and drops removed, only those lights are classified again."""
+        if not isinstance(self.__loadedData, dict):
+            # lazy presets are read-only, one that is edited is held in full from then on
+            self.__loadedData = dict(self.__loadedData.items())
+            self.statusEngine.setPreset(self.__loadedData)
+        for light in removed:
+            self.__loadedData.pop(light, None)
+        self.__loadedData.update(lights)
+        self.statusEngine.updatePreset(list(lights) + list(removed))
+        self.dataGeneration += 1
+
+    def dataType(self, light):
+        # type: (str) -> str
+        # lazy presets know the type from their index without decoding the light
+        if hasattr(self.__loadedData, "lightType"):
+            return self.__loadedData.lightType(light)
+        return self.__loadedData[light]["Type"]
+
+    @property
+    def lightShapes(self):
+        return self.sceneQuery.lights().shapes
+
+    @property
+    def lightTransforms(self):
+        return self.sceneQuery.lights().transforms
+
+    def invalidate(self):
+        self.sceneQuery.invalidate()
+
+    def markDirty(self, paths):
+        # type: (iter) -> None
+        """Classifies the lights paths, light transforms or shapes, again on the next getLights."""
+        if not self.__loadedData:
+            return
+        scene = self.sceneQuery.lights()
+        index = self.sceneQuery.lightIndex()
+        # statuses are kept per transform
+        lights = [scene.transforms[index[path]] if path in index else path for path in paths]
+        self.__markLights([light for light in lights if light in self.__loadedData])
+
+    def attributesChanged(self, changes):
+        # type: (dict) -> None
+        """Scene attribute changes, {node path: attributes}. Only shape plugs the preset compares mark a light."""
+        if not self.__loadedData:
+            return
+        scene = self.sceneQuery.lights()
+        index = self.sceneQuery.lightIndex()
+        lights = []
+        for path, attributes in changes.items():
+            # statuses compare shape attributes, moving a light's transform changes none
+            i = index.get(path)
+            if i is None or scene.shapes[i] != path:
+                continue
+            light = scene.transforms[i]
+            if light in self.__loadedData and self.statusEngine.compares(light, attributes):
+                lights.append(light)
+        self.__markLights(lights)
+
+    def __markLights(self, lights):
+        if lights:
+            self.statusEngine.markDirty(lights)
+            self.statusGeneration += 1
+
+    def changedLights(self):
+        # type: () -> list
+        """Scene lights that differ from the loaded preset or are not in it."""
+        return [record.path for record in self.getLights()
+                if record.status in (LS.LightStatus.Outdated, LS.LightStatus.Add)]
 
     def getLights(self):
-        self._update()
-        dataLights = self.loadedData.keys()
-        invalidLights = [light for light in self.lightTransforms if light in dataLights]
-        invalidLightTypes = [self.loadedData[light]["Type"] for light in invalidLights]
+        # type: () -> LSt.LightStore
+        scene = self.sceneQuery.lights()
+        generation = (self.sceneQuery.generation, self.dataGeneration, self.statusGeneration)
+        if self.__store is not None and self.__storeGeneration == generation:
+            return self.__store
+        if self.__store is not None and self.__storeGeneration[:2] == generation[:2] and self.loadedData \
+                and not self.statusEngine.isAllDirty():
+            # only statuses changed, the dirty lights are classified again and only their records replaced
+            self.__updateStatuses(scene)
+            self.__storeGeneration = generation
+            return self.__store
 
-        lightDisplay = [light[1:].replace('|', ' > ') for light in self.lightTransforms]
+        store = LSt.LightStore()
+        if not self.loadedData:
+            for i in range(len(scene.shapes)):
+                store.add(scene.transforms[i], scene.shapes[i], scene.types[i], scene.uuids[i], LS.LightStatus.Found)
+        else:
+            statuses = self.statusEngine.classify(scene.transforms, scene.shapes)
+            for i in range(len(scene.shapes)):
+                store.add(scene.transforms[i], scene.shapes[i], scene.types[i], scene.uuids[i],
+                          statuses[scene.transforms[i]])
 
-        # print "scene lights: %s" % str(self.lightTransforms)
-        # print "json lights not yet added: %s" % str(invalidLights)
+            # preset lights that are not in the scene
+            for light in self.loadedData:
+                if light not in store:
+                    store.add(light, lightType=self.dataType(light), status=LS.LightStatus.Missing)
 
-        return lightDisplay, self.lightShapes, invalidLights, invalidLightTypes
+        self.__store = store
+        self.__storeGeneration = generation
+        return store
 
+    def __updateStatuses(self, scene):
+        index = self.sceneQuery.lightIndex()
+        shapes = dict((light, scene.shapes[index[light]]) for light in self.statusEngine.dirty() if light in index)
+        for light, status in self.statusEngine.classifyDirty(shapes).items():
+            record = self.__store.find(light)
+            if record is not None and record.status != status:
+                self.__store.replace(record.withStatus(status))
 
-# todo FEATURE on list selection change, select the sel scene items for clear selection, visa versa on selecting others
-# todo implement attributes on the right panel
@@ -1,19 +1,45 @@
 import time
 
+# startup is measured from the first import, see show()
+importStarted = time.time()
+
+import contextlib
+import os
+import sys
+
 from PySide2 import QtCore, QtGui, QtWidgets
-from PySide2.QtWidgets import QSizePolicy, QTableWidget, QTableWidgetItem
+from PySide2.QtWidgets import QSizePolicy, QTableWidget
 import maya.OpenMayaUI as MayaUI
 import shiboken2
 
 from maya import cmds
 from maya.app.general.mayaMixin import MayaQWidgetDockableMixin
 
+try:
+    import maya.api.OpenMaya as om
+except ImportError:
+    om = None
+
 import QTableWidgetIcon as QTWI
 import IconRenderer as ICO
-import LightStatus as LS
 import LightLister as LL
+import LightTableModel as LTM
+import LightFilter as LF
+import SceneWatcher as SW
+import AttributeCache as AC
+import AttributeModel as AM
+
+import Profiler as PRF
+from Profiler import timeIt
+
 
-from OptimizationTests import timeIt
+def displayInfo(message):
+    # type: (str) -> None
+    """Reports message in the script editor, on stdout outside maya."""
+    if om is None:
+        sys.stdout.write(message + "\n")
+        return
+    om.MGlobal.displayInfo(message)
 
 
 class AttributeBox(QtWidgets.QLineEdit):
@@ -21,6 +47,13 @@ class AttributeBox(QtWidgets.QLineEdit):
     floatField = 1
     boolField = 2
 
+    # scene writes per second while dragging, every mouse move in between only updates the text
+    dragRate = 30
+
+    dragStarted = QtCore.Signal(object)
+    dragged = QtCore.Signal(object)
+    dragFinished = QtCore.Signal(object)
+
     def __init__(self, fieldType, value=0.0, parent=None):
         super(AttributeBox, self).__init__(parent)
 
@@ -33,6 +66,12 @@ class AttributeBox(QtWidgets.QLineEdit):
         self.steps = 1
         self.value_at_press = None
         self.pos_at_press = None
+        self.pendingDrag = False
+
+        self.dragTimer = QtCore.QTimer(self)
+        self.dragTimer.setSingleShot(True)
+        self.dragTimer.timeout.connect(self.flushDrag)
+        self.setDragRate(self.dragRate)
 
         if fieldType == self.intField:
             self.setValidator(QtGui.QIntValidator(parent=self))
@@ -46,17 +85,30 @@ class AttributeBox(QtWidgets.QLineEdit):
         self.setValue(value)
         self.fieldType = fieldType
 
+    def setDragRate(self, rate):
+        # type: (float) -> None
+        self.dragRate = rate
+        self.dragTimer.setInterval(int(1000.0 / rate) if rate > 0 else 0)
+
     def mousePressEvent(self, event):
         if event.buttons() == QtCore.Qt.MiddleButton:
             self.value_at_press = self.value()
             self.pos_at_press = event.pos()
             self.setCursor(QtGui.QCursor(QtCore.Qt.SizeHorCursor))
+            self.dragStarted.emit(self.value_at_press)
         else:
             super(AttributeBox, self).mousePressEvent(event)
             self.selectAll()
 
     def mouseReleaseEvent(self, event):
         if event.button() == QtCore.Qt.MiddleButton:
+            if self.pos_at_press is not None:
+                # the last value always reaches the scene, even if the timer has not fired yet. A click
+                # without a move writes nothing, a mixed value would otherwise be set on every light
+                self.dragTimer.stop()
+                moved = self.pendingDrag or self.value() != self.value_at_press
+                self.pendingDrag = False
+                self.dragFinished.emit(self.value() if moved else None)
             self.value_at_press = None
             self.pos_at_press = None
             self.setCursor(QtGui.QCursor(QtCore.Qt.IBeamCursor))
@@ -71,13 +123,23 @@ class AttributeBox(QtWidgets.QLineEdit):
 
         delta = event.pos().x() - self.pos_at_press.x()
         delta /= 6  # Make movement less sensitive.
-        delta *= self.steps * self.getStepsMultiplier(event)
+        delta *= self.steps * self.getMultiplier(event)
 
         value = self.value_at_press + delta
         self.setValue(value)
 
+        self.pendingDrag = True
+        if not self.dragTimer.isActive():
+            self.dragTimer.start()
+
         super(AttributeBox, self).mouseMoveEvent(event)
 
+    def flushDrag(self):
+        if not self.pendingDrag or self.pos_at_press is None:
+            return
+        self.pendingDrag = False
+        self.dragged.emit(self.value())
+
     @staticmethod
     def getMultiplier(event):
         if event.modifiers() == QtCore.Qt.CTRL:
@@ -105,7 +167,7 @@ class AttributeBox(QtWidgets.QLineEdit):
             return int(self.text())
         if self.fieldType == self.floatField:
             return float(self.text())
-        return int(self.text())
+        return int(self.text() in ("on", "1"))
 
     def setValue(self, value):
         if self.min is not None:
@@ -130,19 +192,89 @@ class AttributeBox(QtWidgets.QLineEdit):
             self.setText("off")
 
 
+class AttributeDelegate(QtWidgets.QStyledItemDelegate):
+    """One editor for the whole attribute table, created only while a cell is being edited."""
+
+    def __init__(self, parent=None):
+        super(AttributeDelegate, self).__init__(parent)
+        self.dragRate = AttributeBox.dragRate
+
+    def createEditor(self, parent, option, index):
+        value = index.data(QtCore.Qt.EditRole)
+        if isinstance(value, bool):
+            fieldType = AttributeBox.boolField
+        elif isinstance(value, int):
+            fieldType = AttributeBox.intField
+        else:
+            fieldType = AttributeBox.floatField
+        editor = AttributeBox(fieldType, value or 0, parent)
+        editor.setDragRate(self.dragRate)
+
+        model = index.model()
+        attribute = index.data(AM.AttributeModel.AttributeRole)
+        editor.dragStarted.connect(lambda value: model.beginDrag(attribute, self.__modelValue(editor, value)))
+        editor.dragged.connect(lambda value: model.dragTo(self.__modelValue(editor, value)))
+        editor.dragFinished.connect(lambda value: model.endDrag(self.__modelValue(editor, value)))
+        # an editor closed mid drag must not leave the undo chunk open
+        editor.destroyed.connect(lambda *args: model.endDrag())
+        return editor
+
+    @staticmethod
+    def __modelValue(editor, value):
+        if value is None:
+            return None
+        if editor.fieldType == AttributeBox.boolField:
+            return bool(value)
+        return value
+
+    def setEditorData(self, editor, index):
+        # the rows refresh after every drag write, the editor already shows the dragged value
+        if index.model().isDragging():
+            return
+        editor.setValue(index.data(QtCore.Qt.EditRole) or 0)
+
+    def setModelData(self, editor, model, index):
+        # drags already wrote their values, only typed text is committed here
+        if not editor.isModified():
+            return
+        try:
+            value = editor.value()
+        except ValueError:
+            return
+        model.setData(index, self.__modelValue(editor, value), QtCore.Qt.EditRole)
+
+
 class LightListerWindow(MayaQWidgetDockableMixin, QtWidgets.QMainWindow):
     toolName = 'LightPresetEditor'
 
-    def __init__(self, parent=None, logic=None):
-        self.__deleteInstances()
+    def __init__(self, parent=None, logic=None, sceneWatcher=None):
+        self.startupStarted = time.time()
+        # seconds since startupStarted, filled in by show() and populate()
+        self.startupTimes = {}
         if parent is None:
-            parent = shiboken2.wrapInstance(long(MayaUI.MQtUtil.mainWindow()), QtWidgets.QMainWindow)
+            parent = shiboken2.wrapInstance(int(MayaUI.MQtUtil.mainWindow()), QtWidgets.QMainWindow)
         super(self.__class__, self).__init__(parent=parent)
 
         self.logic = logic
         if self.logic is None:
             self.logic = LL.LightLister()
 
+        self.sceneWatcher = sceneWatcher
+        if self.sceneWatcher is None:
+            self.sceneWatcher = SW.SceneWatcher(parent=self)
+        self.populated = False
+        self.applyJob = None
+        self.presetFile = None
+        self.presetSnapshot = None
+        # the preset cache and worker pool, the selection sync and the filter presets are built on first use
+        self.__presetCache = None
+        self.__presetIO = None
+        self.presetLoad = None
+        # a reload whose first chunk has not arrived, the preset it replaces is still loaded
+        self.presetReplaced = False
+        self.selectionSync = None
+        self.attributeFilterPresets = None
+
         titleStyleSheet = "QLabel{color: white;}" \
                           "QToolTip{background-color: rgb(180, 180, 180); font-size: 13px; font-weight: bold;}"
         toolTipStyleSheet = "QToolTip{background-color: rgb(180, 180, 180); font-size: 13px; font-weight: bold;}"
@@ -154,7 +286,7 @@ class LightListerWindow(MayaQWidgetDockableMixin, QtWidgets.QMainWindow):
         self.resize(600, 550)
         self.setMouseTracking(True)
 
-        self.iconRenderer = ICO.IconRenderer()
+        self.iconRenderer = ICO.IconRenderer.shared()
 
         # create UI items
         self.centerWidget = QtWidgets.QWidget()
@@ -163,11 +295,21 @@ class LightListerWindow(MayaQWidgetDockableMixin, QtWidgets.QMainWindow):
         verticalLayout = QtWidgets.QVBoxLayout()
 
         menuBar = QtWidgets.QMenuBar()
-        self.lightList = QtWidgets.QTableWidget()
+        self.lightList = QtWidgets.QTableView()
+        self.lightModel = LTM.LightTableModel(self.iconRenderer, self)
+        self.lightProxy = LTM.LightFilterProxyModel(self)
+        self.lightStack = QtWidgets.QStackedWidget()
+        # built the first time tree mode is turned on
+        self.lightTree = None
+        self.lightTreeModel = None
         self.lightSBar = QtWidgets.QLineEdit()
-        self.attributeList = QtWidgets.QTableWidget()
+        self.attributeList = QtWidgets.QTableView()
+        self.attributeCache = AC.AttributeCache(self.logic.sceneQuery)
+        self.attributeModel = AM.AttributeModel(self.attributeCache, parent=self)
         self.attributeSBar = QtWidgets.QLineEdit()
         self.splitter = QtWidgets.QSplitter()
+        self.ioProgress = QtWidgets.QProgressBar()
+        self.ioCancel = QtWidgets.QToolButton()
 
         # set properties
         mainHorizontal.setSpacing(10)
@@ -180,40 +322,94 @@ class LightListerWindow(MayaQWidgetDockableMixin, QtWidgets.QMainWindow):
         menuBar.setObjectName("menubar")
         menuBar.setSizePolicy(QSizePolicy.Minimum, QSizePolicy.Fixed)
         fileMenu = menuBar.addMenu('&Light Preset')
-        fileMenu.addAction("&Load...", None)
-        fileMenu.addAction("&Unload...", None)
+        fileMenu.addAction("&Load...", self.openPreset)
+        fileMenu.addAction("&Unload...", self.unloadPreset)
         fileMenu.addAction("&Save...", None)
-        fileMenu.addAction("Save &As...", None)
-        recentMenu = fileMenu.addMenu("&Recent")
-        recentMenu.addAction("C:/your mom/bigJson.lightpeset", None)
-        recentMenu.addAction("C:/your mom/bigJson2.lightpeset", None)
-        fileMenu.addAction("Reload...", None)
+        fileMenu.addAction("Save &As...", self.savePresetAs)
+        self.recentMenu = fileMenu.addMenu("&Recent")
+        self.recentMenu.aboutToShow.connect(self.updateRecentMenu)
+        self.recentMenu.triggered.connect(lambda action: action.data() and self.loadPreset(action.data()))
+        fileMenu.addAction("Reload...", self.reloadPreset)
         syncMenu = menuBar.addMenu('&Sync')
-        syncMenu.addAction("&Scene -> Preset", None)
-        syncMenu.addAction("&Preset -> Scene", None)
+        syncMenu.addAction("&Scene -> Preset", self.snapshotPreset)
+        syncMenu.addAction("&Preset -> Scene", self.applyPreset)
+        syncMenu.addAction("Preset -> Scene (&Dry Run)", self.dryRunPreset)
         sortMenu = menuBar.addMenu('S&ort')
-        sortMenu.addAction("By &Type", None)  # TODO sorting
+        sortMenu.addAction("By &Type", lambda: self.sortLights(LTM.LightTableModel.TypeColumn))
+        sortMenu.addAction("By &Status", lambda: self.sortLights(LTM.LightTableModel.StatusColumn))
+        sortMenu.addAction("By &Name", lambda: self.sortLights(LTM.LightTableModel.NameColumn))
         preferencesMenu = menuBar.addMenu('&Preferences')
+        filterModeMenu = preferencesMenu.addMenu("Light &Filter Mode")
+        filterModeGroup = QtWidgets.QActionGroup(self)
+        for label, mode in (("&Substring", LF.LightFilterQuery.Substring),
+                            ("&Glob", LF.LightFilterQuery.Glob),
+                            ("&Regex", LF.LightFilterQuery.Regex)):
+            action = filterModeMenu.addAction(label)
+            action.setCheckable(True)
+            action.setChecked(mode == LF.LightFilterQuery.Substring)
+            action.setData(mode)
+            filterModeGroup.addAction(action)
+        filterModeGroup.triggered.connect(lambda action: self.setLightFilterMode(action.data()))
+        treeAction = preferencesMenu.addAction("&Tree View")
+        treeAction.setCheckable(True)
+        treeAction.toggled.connect(self.setTreeMode)
+        syncSelectionAction = preferencesMenu.addAction("S&ync Selection With Scene")
+        syncSelectionAction.setCheckable(True)
+        syncSelectionAction.setChecked(True)
+        syncSelectionAction.toggled.connect(self.setSyncSelection)
+        self.syncSelectionAction = syncSelectionAction
+        commonAction = preferencesMenu.addAction("&Common Attributes Only")
+        commonAction.setCheckable(True)
+        commonAction.setChecked(True)
+        commonAction.toggled.connect(lambda common: self.attributeModel.setMode(
+            AM.AttributeModel.Intersection if common else AM.AttributeModel.Union))
+        relativeAction = preferencesMenu.addAction("&Relative Multi-Edit")
+        relativeAction.setCheckable(True)
+        relativeAction.toggled.connect(lambda relative: self.attributeModel.setEditMode(
+            AM.AttributeModel.Relative if relative else AM.AttributeModel.Absolute))
+        self.attributeFilterMenu = preferencesMenu.addMenu("&Attribute Filter Presets")
+        self.attributeFilterMenu.aboutToShow.connect(self.updateAttributeFilterMenu)
+        profilingMenu = preferencesMenu.addMenu("&Profiling")
+        profilingAction = profilingMenu.addAction("&Enabled")
+        profilingAction.setCheckable(True)
+        profilingAction.setChecked(PRF.profiler.enabled)
+        profilingAction.toggled.connect(lambda enabled: PRF.profiler.setEnabled(enabled, tracing=enabled))
+        profilingMenu.addAction("&Print Report", self.printProfile)
+        profilingMenu.addAction("Export &Chrome Trace...", self.exportProfile)
+        profilingMenu.addAction("&Reset", PRF.profiler.reset)
         # menuBar.addAction("&Help", None)  # TODO update the lists instead repaint
 
-        self.__initTable(self.lightList, 3)
+        self.lightProxy.setSourceModel(self.lightModel)
+        self.lightList.setModel(self.lightProxy)
+        self.__initTable(self.lightList)
 
-        self.lightList.setItemDelegateForColumn(0, QTWI.QTableWidgetIconDelegate(self.parent(), self.lightList))
-        self.lightList.setItemDelegateForColumn(2, QTWI.QTableWidgetIconDelegate(self.parent(), self.lightList))
-        emptyFixedTableItem = QtWidgets.QTableWidgetItem("")
-        self.lightList.setHorizontalHeaderItem(0, emptyFixedTableItem)
-        self.lightList.setHorizontalHeaderItem(2, emptyFixedTableItem)
-        self.lightList.setHorizontalHeaderItem(1, QtWidgets.QTableWidgetItem("Name"))
+        self.lightList.setItemDelegateForColumn(0, QTWI.QTableWidgetIconDelegate(self.lightList))
+        self.lightList.setItemDelegateForColumn(2, QTWI.QTableWidgetIconDelegate(self.lightList))
 
-        self.lightList.setSizeAdjustPolicy(QtWidgets.QListWidget.AdjustToContents)
         self.lightList.autoFillBackground = True
         self.lightList.setIconSize(QtCore.QSize(15, 15))
-        
-        self.__initTable(self.attributeList, 2)
+
+        self.attributeList.setModel(self.attributeModel)
+        self.__initTable(self.attributeList)
+        self.attributeList.setSortingEnabled(False)
+        self.attributeList.setItemDelegateForColumn(AM.AttributeModel.ValueColumn, AttributeDelegate(self.attributeList))
         self.attributeList.setMinimumWidth(120)
 
         self.lightSBar.setPlaceholderText("Light filter")
+        self.lightSBar.setToolTip("Space separated terms, \"type:\" restricts a term to the light type")
+        self.lightFilterTimer = QtCore.QTimer(self)
+        self.lightFilterTimer.setSingleShot(True)
+        self.lightFilterTimer.setInterval(120)
         self.attributeSBar.setPlaceholderText("Attribute filter")
+        self.attributeSBar.setToolTip("Space separated terms all match, comma separated alternatives any,\n"
+                                      "\"cat:\" matches an attribute category, \"=\" an exact attribute name")
+
+        self.ioProgress.setMaximumHeight(14)
+        self.ioProgress.hide()
+        self.ioCancel.setText("Cancel")
+        self.ioCancel.hide()
+        self.statusBar().addPermanentWidget(self.ioProgress)
+        self.statusBar().addPermanentWidget(self.ioCancel)
 
         # self.splitter.insertWidget(0, self.lightList)
         # self.splitter.insertWidget(1, self.attributeList)
@@ -221,7 +417,8 @@ class LightListerWindow(MayaQWidgetDockableMixin, QtWidgets.QMainWindow):
         lightWidget = QtWidgets.QWidget()
         lightVBox = QtWidgets.QVBoxLayout(lightWidget)
         lightVBox.addWidget(self.lightSBar)
-        lightVBox.addWidget(self.lightList)
+        self.lightStack.addWidget(self.lightList)
+        lightVBox.addWidget(self.lightStack)
         lightVBox.setContentsMargins(0, 0, 0, 0)
         self.splitter.insertWidget(0, lightWidget)
 
@@ -245,46 +442,135 @@ class LightListerWindow(MayaQWidgetDockableMixin, QtWidgets.QMainWindow):
         mainHorizontal.addWidget(self.splitter)
 
         # connections
-        self.lightSBar.textChanged.connect(self.updateLightFilter)
+        self.lightSBar.textChanged.connect(self.lightFilterTimer.start)
         self.lightSBar.returnPressed.connect(self.updateLightFilter)
+        self.lightFilterTimer.timeout.connect(self.updateLightFilter)
+        # answered from the attribute index, no maya query per keystroke
+        self.attributeSBar.textChanged.connect(self.attributeModel.setFilterText)
+        self.sceneWatcher.changed.connect(self.sceneChanged)
+        self.ioCancel.clicked.connect(lambda: self.presetIO.cancelAll())
+        self.lightList.selectionModel().selectionChanged.connect(lambda *args: self.updateAttributes())
 
         self.setCentralWidget(self.centerWidget)
         self.resizeEvent()
-        self.updateLights()
-        self.updateAttributes()
 
         if cmds.window("tempWindow", ex=True):
             cmds.deleteUI("tempWindow")
 
-    @timeIt
-    def __deleteInstances(self):
-        item = self.__class__.toolName + 'WorkspaceControl'
+    @classmethod
+    def deleteInstances(cls):
+        item = cls.toolName + 'WorkspaceControl'
         if cmds.workspaceControl(item, ex=True, q=True):
             cmds.deleteUI(item)
 
+    def showEvent(self, event):
+        super(LightListerWindow, self).showEvent(event)
+        if not self.populated:
+            # queued behind the paint events of the first show, the empty dock appears before the scene is read
+            QtCore.QTimer.singleShot(0, self.populate)
+
+    @timeIt
+    def populate(self):
+        if self.populated:
+            return
+        self.populated = True
+        handle = self.window().windowHandle()
+        if handle is not None:
+            handle.screenChanged.connect(self.screenChanged)
+        self.updateLights()
+        self.updateAttributes()
+        self.setSyncSelection(self.syncSelectionAction.isChecked())
+        self.sceneWatcher.start()
+        self.sceneWatcher.watch(self.logic.lightShapes + self.logic.lightTransforms)
+
+        self.startupTimes["populated"] = time.time() - self.startupStarted
+        if PRF.profiler.enabled:
+            displayInfo(self.startupReport())
+
+    @property
+    def presetCache(self):
+        if self.__presetCache is None:
+            import PresetCache as PC
+            directory = os.path.join(cmds.internalVar(userAppDir=True), "LightLister", "PresetCache")
+            self.__presetCache = PC.PresetCache(directory)
+        return self.__presetCache
+
+    @property
+    def presetIO(self):
+        if self.__presetIO is None:
+            import PresetIO as PIO
+            self.__presetIO = PIO.PresetIO(self, cache=self.presetCache)
+        return self.__presetIO
+
+    def setSyncSelection(self, enabled):
+        # type: (bool) -> None
+        if self.selectionSync is None:
+            if not self.populated:
+                return
+            import SelectionSync as SS
+            self.selectionSync = SS.SelectionSync(self.lightList, self.lightModel, self.lightProxy, self)
+        self.selectionSync.setEnabled(enabled)
+
+    def startupReport(self):
+        # type: () -> str
+        return "LightLister startup: " + ", ".join(
+            "%s %.0f ms" % (name, self.startupTimes[name] * 1000.0)
+            for name in ("import", "construct", "show", "populated") if name in self.startupTimes)
+
     @staticmethod
-    def __initTable(table, cols):
+    def __initTable(table):
         table.setMinimumWidth(50)
         table.setSelectionMode(QTableWidget.ExtendedSelection)
         table.setSelectionBehavior(QTableWidget.SelectRows)
         table.setShowGrid(False)
         table.setSortingEnabled(True)
         table.setWordWrap(False)
-        table.setColumnCount(cols)
-        table.setRowCount(0)
         table.verticalHeader().hide()
+        table.verticalHeader().setSectionResizeMode(QtWidgets.QHeaderView.Fixed)
         table.verticalHeader().setDefaultSectionSize(24)
         table.horizontalHeader().setStretchLastSection(True)
         table.horizontalHeader().setSectionResizeMode(QtWidgets.QHeaderView.Fixed)
 
-    def event(self, event, *args, **kwargs):
-        if event is None or self is None:
-            return False
-        if event.type() == QtCore.QEvent.WindowActivate:
+    def closeEvent(self, event):
+        self.sceneWatcher.stop()
+        if self.__presetIO is not None:
+            self.__presetIO.cancelAll()
+        super(LightListerWindow, self).closeEvent(event)
+
+    def dockCloseEventTriggered(self):
+        self.sceneWatcher.stop()
+        if self.__presetIO is not None:
+            self.__presetIO.cancelAll()
+        super(LightListerWindow, self).dockCloseEventTriggered()
+
+    def sceneChanged(self, changes):
+        # type: (SW.SceneChanges) -> None
+        if changes.attributes:
+            self.logic.attributesChanged(changes.attributes)
+            if self.presetSnapshot is not None:
+                self.presetSnapshot.markDirty(changes.attributes)
+            for node, attributes in changes.attributes.items():
+                self.attributeCache.invalidate(node, attributes)
+        if changes.structural:
+            self.logic.invalidate()
+            for node in changes.removed:
+                self.attributeCache.invalidate(node)
+        if changes.structural or changes.attributes:
             self.updateLights()
-            event.accept()
-        # print event.type()
-        return super(LightListerWindow, self).event(event)
+        if changes.structural:
+            self.sceneWatcher.watch(self.logic.lightShapes + self.logic.lightTransforms)
+            self.updateAttributes()
+        elif changes.attributes:
+            self.attributeModel.refresh(set(changes.attributes))
+        if changes.selection and self.selectionSync is not None:
+            self.selectionSync.sceneSelectionChanged()
+
+    def screenChanged(self, *args):
+        # icons are cached at the pixel ratio of the screen they were first painted on
+        self.iconRenderer.invalidate()
+        self.lightList.viewport().update()
+        if self.lightTree is not None:
+            self.lightTree.viewport().update()
 
     def resizeEvent(self, event=None):
         self.sectionResized(self.splitter.sizes()[0])
@@ -298,111 +584,311 @@ class LightListerWindow(MayaQWidgetDockableMixin, QtWidgets.QMainWindow):
         self.lightList.setColumnWidth(1, pos - 70 - 2*handleWidth)
         self.lightList.setColumnWidth(2, 35)
 
-    def addLight(self, index, lightType, name, status):
-        # type: (int, str, str, LS.LightStatus) -> None
-        if index >= self.lightList.rowCount():
-            cmds.warning("extended list, rowcount went out of index")
-            self.lightList.setRowCount(index + 1)
-
-        icon, name, statusIcon = self.__createListItem(name, lightType)
-
-        if status == LS.LightStatus.Found:
-            statusIcon.setStatus(found=True)
-        if status == LS.LightStatus.Outdated:
-            statusIcon.setStatus(outdated=True)
-        if status == LS.LightStatus.Add:
-            statusIcon.setStatus(add=True)
-        if status == LS.LightStatus.Missing:
-            statusIcon.setStatus(missing=True)
-        if status == LS.LightStatus.Undefined:
-            statusIcon.setStatus(undefined=True)
-
-        self.lightList.setItem(index, 0, icon)
-        self.lightList.setItem(index, 1, name)
-        self.lightList.setItem(index, 2, statusIcon)
-
     @timeIt
     def updateLights(self):
-        time.sleep(1)
-        selection = self.lightList.selectedItems()
-        selection = [selection[i].text() for i in range(1, len(selection), 3)]
-
-        lights, lightShapes, dataLights, dataLightTypes = self.logic.getLights()
-
-        self.lightList.setSortingEnabled(False)
-        self.lightList.setRowCount(0)
-        self.lightList.setRowCount(len(lights) + len(dataLights))
-
-        for i in range(len(lights)):
-            self.addLight(i, cmds.nodeType(lightShapes[i]), lights[i], LS.LightStatus.Found)
-        for i in range(len(dataLights)):
-            self.addLight(len(lights) + i, dataLightTypes[i], dataLights[i], LS.LightStatus.Undefined)
-
-        self.lightList.setSelectionMode(QtWidgets.QAbstractItemView.MultiSelection)
-        for itemName in selection:
-            items = self.lightList.findItems(itemName, QtCore.Qt.MatchExactly)
-            if not items:
-                continue
-            for item in items:
-                self.lightList.selectRow(self.lightList.indexFromItem(item).row())
-        self.lightList.setSelectionMode(QtWidgets.QAbstractItemView.ExtendedSelection)
-        self.lightList.setSortingEnabled(True)
-        self.updateLightFilter()
+        store = self.logic.getLights()
+        # records are keyed by path, untouched rows keep their selection, removed ones leave the scene's alone
+        with self.selectionSuspended():
+            self.lightProxy.updateIndex(store)
+            self.lightModel.updateStore(store)
+            if self.isTreeMode():
+                self.lightTreeModel.updateStore(store)
+
+    @contextlib.contextmanager
+    def selectionSuspended(self):
+        if self.selectionSync is None:
+            yield
+            return
+        with self.selectionSync.suspended():
+            yield
+
+    def isTreeMode(self):
+        return self.lightTree is not None and self.lightStack.currentWidget() is self.lightTree
+
+    def setTreeMode(self, enabled):
+        # type: (bool) -> None
+        if enabled and self.lightTree is None:
+            import LightTreeModel as LTT
+            self.lightTree = QtWidgets.QTreeView()
+            self.lightTreeModel = LTT.LightTreeModel(self.iconRenderer, self)
+            self.lightTree.setModel(self.lightTreeModel)
+            self.lightTree.setSelectionMode(QtWidgets.QAbstractItemView.ExtendedSelection)
+            self.lightTree.setSelectionBehavior(QtWidgets.QAbstractItemView.SelectRows)
+            # every row the same height, the view does not have to measure rows it has not shown
+            self.lightTree.setUniformRowHeights(True)
+            self.lightTree.setIconSize(QtCore.QSize(15, 15))
+            self.lightTree.header().setStretchLastSection(False)
+            self.lightTree.header().setSectionResizeMode(0, QtWidgets.QHeaderView.Stretch)
+            self.lightTree.selectionModel().selectionChanged.connect(lambda *args: self.updateAttributes())
+            self.lightStack.addWidget(self.lightTree)
+
+        self.lightStack.setCurrentWidget(self.lightTree if enabled else self.lightList)
+        # the tree is not kept up to date while the list is shown, it catches up here
+        if enabled and self.populated:
+            self.lightTreeModel.updateStore(self.logic.getLights())
+        self.updateAttributes()
+
+    def selectedRecords(self):
+        # type: () -> list
+        if self.isTreeMode():
+            rows = self.lightTree.selectionModel().selectedRows(self.lightTreeModel.NameColumn)
+            records = [self.lightTreeModel.record(index) for index in rows]
+            # groups have no record
+            return [record for record in records if record is not None]
+        rows = self.lightList.selectionModel().selectedRows(LTM.LightTableModel.NameColumn)
+        return [self.lightModel.row(self.lightProxy.mapToSource(index).row()) for index in rows]
 
     @timeIt
     def updateAttributes(self):
-        selection = self.attributeList.selectedItems()
-        selection = [selection[i].text() for i in range(0, len(selection), 2)]
-
-        self.attributeList.setRowCount(0)
-        self.attributeList.setRowCount(1)
-
-        item = QTableWidgetItem("temp")
-        scroller = AttributeBox(AttributeBox.floatField, 1.0)
-        self.attributeList.setItem(0, 0, item)
-        self.attributeList.setCellWidget(0, 1, scroller)
+        # preset only lights have no shape to read from
+        records = [record for record in self.selectedRecords() if record.shape]
+        self.attributeModel.setNodes([record.shape for record in records], [record.lightType for record in records])
 
     @timeIt
     def updateLightFilter(self):
-        filterText = self.lightSBar.text().lower()
-        if not filterText or len(filterText) == 0:
-            for i in range(self.lightList.rowCount()):
-                self.lightList.setRowHidden(i, False)
+        self.lightFilterTimer.stop()
+        # hidden lights stay selected in the scene
+        with self.selectionSuspended():
+            self.lightProxy.setFilterText(self.lightSBar.text())
+
+    def setLightFilterMode(self, mode):
+        with self.selectionSuspended():
+            self.lightProxy.setFilterMode(mode)
+
+    def openPreset(self):
+        fileName, _ = QtWidgets.QFileDialog.getOpenFileName(self, "Load Light Preset", "",
+                                                            "Light Preset (*.lightpreset *.json)")
+        if fileName:
+            self.loadPreset(fileName)
+
+    def reloadPreset(self):
+        if self.presetFile is None:
+            return
+        # a fully loaded preset whose file did not change has nothing new to read, the load task finds out
+        # on its worker and the loaded preset stays until the first chunk of the new one arrives
+        self.loadPreset(self.presetFile, replace=self.presetLoad is None and bool(self.logic.loadedData))
+
+    def updateRecentMenu(self):
+        self.recentMenu.clear()
+        for fileName in self.presetCache.recent():
+            self.recentMenu.addAction(fileName).setData(fileName)
+        if self.recentMenu.isEmpty():
+            self.recentMenu.addAction("No Recent Presets").setEnabled(False)
+        self.recentMenu.addSeparator()
+        self.recentMenu.addAction("&Clear Cache", self.presetCache.clear)
+
+    def updateAttributeFilterMenu(self):
+        self.attributeFilterMenu.clear()
+        presets = self.filterPresets()
+        for name in presets.names():
+            query = presets.query(name)
+            action = self.attributeFilterMenu.addAction(name.replace("&", "&&"))
+            action.setToolTip(query)
+            action.triggered.connect(lambda checked=False, query=query: self.attributeSBar.setText(query))
+        self.attributeFilterMenu.addSeparator()
+        saveAction = self.attributeFilterMenu.addAction("&Save Current Filter...", self.saveAttributeFilter)
+        saveAction.setEnabled(bool(self.attributeSBar.text().strip()))
+        deleteMenu = self.attributeFilterMenu.addMenu("&Delete")
+        for name in presets.names():
+            deleteMenu.addAction(name.replace("&", "&&"), lambda name=name: presets.remove(name))
+        deleteMenu.setEnabled(not deleteMenu.isEmpty())
+
+    def saveAttributeFilter(self):
+        query = self.attributeSBar.text().strip()
+        if not query:
             return
-        filterText = filterText.split(" ")
-        for i in range(self.lightList.rowCount()):
-            match = False
-            for j in range(self.lightList.columnCount()):
-                item = self.lightList.item(i, j)
-                if isinstance(item, QTWI.QTableWidgetIcon):
-                    targetText = item.name
-                else:
-                    targetText = item.text().lower()
-
-                for text in filterText:
-                    if len(text) == 0:
-                        continue
-                    if text not in targetText:
-                        match = False
-                        break
-                    match = True
-                if match:
-                    break
-            self.lightList.setRowHidden(i, not match)
+        name, accepted = QtWidgets.QInputDialog.getText(self, "Save Attribute Filter", "Preset name:", text=query)
+        if accepted and name.strip():
+            self.filterPresets().save(name.strip(), query)
+
+    def filterPresets(self):
+        if self.attributeFilterPresets is None:
+            import AttributeIndex as AI
+            self.attributeFilterPresets = AI.AttributeFilterPresets()
+        return self.attributeFilterPresets
+
+    def loadPreset(self, fileName, replace=False):
+        # type: (str, bool) -> None
+        """Parses fileName on a worker thread, the light list updates as each chunk of lights arrives.
+
+        replace keeps the loaded preset until the first chunk, and all of it when the file did not change.
+        """
+        if not replace:
+            self.unloadPreset()
+        self.presetFile = fileName
+        self.presetReplaced = replace
+        task = self.presetLoad = self.presetIO.load(fileName, unlessCurrent=replace)
+        task.signals.chunkLoaded.connect(lambda lights: self.presetChunkLoaded(task, lights))
+        task.signals.finished.connect(lambda *args: self.presetLoadDone(task, True))
+        for signal in (task.signals.cancelled, task.signals.failed):
+            signal.connect(lambda *args: self.presetLoadDone(task, False))
+        self.__trackTask(task, "Loading")
+
+    def presetChunkLoaded(self, task, lights):
+        # chunks of a cancelled load can still be queued
+        if task is not self.presetLoad:
+            return
+        if self.presetReplaced:
+            self.__dropReplacedPreset()
+        self.logic.extendLoadedData(lights)
+        self.updateLights()
 
-    def getSelectionList(self):
-        items = self.lightList.selectedItems()
-        selection = [items[i].text() for i in range(1, len(items), 3)]
-        return ['|' + item.replace(" > ", "|") for item in selection]
+    def presetLoadDone(self, task, finished):
+        if task is not self.presetLoad:
+            return
+        self.presetLoad = None
+        # a changed file without lights sent no chunk, a failed or cancelled reload keeps the old preset
+        if finished and self.presetReplaced and not task.unchanged:
+            self.__dropReplacedPreset()
+            self.updateLights()
+        self.presetReplaced = False
+
+    def __dropReplacedPreset(self):
+        self.presetReplaced = False
+        self.presetSnapshot = None
+        self.logic.loadedData = {}
+
+    def unloadPreset(self):
+        if self.presetLoad is not None:
+            self.presetLoad.cancel()
+            self.presetLoad = None
+        # seeded from the data being dropped
+        self.presetSnapshot = None
+        self.logic.loadedData = {}
+        self.updateLights()
 
-    def __createListItem(self, name, lightType):
-        item = QTableWidgetItem()
-        item.setText(name)
-        itemIcon = QTWI.QTableWidgetIcon(path='%s.svg' % lightType)
-        statusIcon = QTWI.QTableWidgetIcon(renderer=self.iconRenderer, rendered=True)
-        return itemIcon, item, statusIcon
+    def savePresetAs(self):
+        data = self.logic.loadedData
+        if not data:
+            cmds.warning("No light preset is loaded")
+            return
+        if self.presetLoad is not None:
+            cmds.warning("The light preset is still loading")
+            return
+        fileName, _ = QtWidgets.QFileDialog.getSaveFileName(self, "Save Light Preset As", "",
+                                                            "Light Preset (*.lightpreset)")
+        if not fileName:
+            return
+        # a shallow copy, later edits of the loaded preset do not race the writer
+        task = self.presetIO.save(fileName, list(data.items()), len(data))
+        task.signals.finished.connect(self.presetSaved)
+        self.__trackTask(task, "Saving")
+
+    def presetSaved(self, fileName):
+        self.presetFile = fileName
+
+    def __trackTask(self, task, label):
+        # type: (PIO.PresetTask, str) -> None
+        self.ioProgress.setFormat("%s %%p%%" % label)
+        self.ioProgress.setRange(0, 0)
+        self.ioProgress.show()
+        self.ioCancel.show()
+        task.signals.progress.connect(self.__taskProgress)
+        task.signals.failed.connect(cmds.warning)
+        for signal in (task.signals.finished, task.signals.cancelled, task.signals.failed):
+            signal.connect(self.__taskDone)
+
+    def __taskProgress(self, done, total):
+        self.ioProgress.setRange(0, max(total, 1))
+        self.ioProgress.setValue(done)
+
+    def __taskDone(self, *args):
+        if not self.presetIO.tasks():
+            self.ioProgress.hide()
+            self.ioCancel.hide()
+
+    def snapshotPreset(self):
+        import PresetSnapshot as PS
+
+        if self.presetLoad is not None:
+            cmds.warning("The light preset is still loading")
+            return
+        chosen = self.presetFile is None
+        if chosen:
+            fileName, _ = QtWidgets.QFileDialog.getSaveFileName(self, "Scene -> Preset", "",
+                                                                "Light Preset (*.lightpreset)")
+            if not fileName:
+                return
+            self.presetFile = fileName
+        if self.presetSnapshot is None or self.presetSnapshot.fileName != self.presetFile:
+            self.presetSnapshot = PS.PresetSnapshot(self.presetFile, self.logic.sceneQuery, self.attributeCache)
+            if not chosen:
+                # the loaded preset is what the file holds, only lights that differ from it are written. Edits
+                # made before the snapshot existed were never marked dirty, their statuses tell them apart
+                self.presetSnapshot.seed(self.logic.loadedData, self.logic.changedLights())
+
+        written, removed = self.presetSnapshot.snapshot()
+        displayInfo("Scene -> Preset: %d lights written, %d removed" % (len(written), len(removed)))
+        # the written records become the loaded preset, the file is not read again
+        self.logic.extendLoadedData(written, removed)
+        self.updateLights()
+
+    def applyPreset(self):
+        import PresetDiff as PD
+        import PresetApply as PA
+
+        if self.applyJob is not None:
+            return
+        plan = PD.computePlan(self.logic)
+        if not plan:
+            cmds.warning("The scene already matches the preset")
+            return
+        self.applyJob = PA.applyWithProgress(plan, self.logic.sceneQuery, self)
+        self.applyJob.finished.connect(self.presetApplied)
+
+    def presetApplied(self, completed):
+        job = self.applyJob
+        self.applyJob = None
+        for attribute, node, error in job.failures:
+            cmds.warning("Could not set %s.%s: %s" % (node, attribute, error))
+        if not completed:
+            cmds.warning("Preset apply cancelled after %d of %d writes, undo reverts it" % (job.written, len(job.plan)))
+        self.logic.markDirty(job.plan.lights)
+        self.updateLights()
+
+    def dryRunPreset(self):
+        import PresetDiff as PD
 
+        report = PD.computePlan(self.logic).report()
+        displayInfo(report)
+        QtWidgets.QMessageBox.information(self, "Preset -> Scene (Dry Run)",
+                                          report.splitlines()[0] + "\nThe full report is in the script editor.")
 
-lightLister = LightListerWindow()
-lightLister.show(dockable=True, retain=False)
+    def printProfile(self):
+        displayInfo(PRF.profiler.report())
+
+    def exportProfile(self):
+        fileName, _ = QtWidgets.QFileDialog.getSaveFileName(self, "Export Chrome Trace", "", "Trace (*.json)")
+        if fileName:
+            PRF.profiler.exportChromeTrace(fileName)
+
+    def sortLights(self, column):
+        # goes through the header so its sort indicator follows
+        self.lightList.sortByColumn(column, QtCore.Qt.AscendingOrder)
+
+    def getSelectionList(self):
+        return [record.path for record in self.selectedRecords()]
+
+
+# the open window, kept here so it is not garbage collected
+lightLister = None
+importTime = time.time() - importStarted
+
+
+def show(dockable=True, **kwargs):
+    # type: (bool, ...) -> LightListerWindow
+    """Opens the light lister in place of an open one, the scene is read once the window has painted.
+
+    kwargs go to the LightListerWindow constructor.
+    """
+    global lightLister
+    started = time.time()
+    LightListerWindow.deleteInstances()
+    lightLister = LightListerWindow(**kwargs)
+    lightLister.startupStarted = started
+    lightLister.startupTimes["import"] = importTime
+    lightLister.startupTimes["construct"] = time.time() - started
+    lightLister.show(dockable=dockable, retain=False)
+    lightLister.startupTimes["show"] = time.time() - started
+    return lightLister
 
@@ -0,0 +1,178 @@
+import re
+import sys
+
+import LightStatus as LS
+
+try:
+    intern = sys.intern
+except AttributeError:
+    pass
+
+digits = re.compile(r'(\d+)')
+
+
+def naturalKey(text):
+    # type: (str) -> tuple
+    # split yields text at even and numbers at odd positions, so keys always compare like with like
+    return tuple(int(part) if i % 2 else part.lower() for i, part in enumerate(digits.split(text)))
+
+
+class LightTypes:
+    __names = []
+    __codes = {}
+    __sortKeys = []
+
+    def __init__(self):
+        pass
+
+    @classmethod
+    def code(cls, name):
+        # type: (str) -> int
+        code = cls.__codes.get(name)
+        if code is None:
+            code = len(cls.__names)
+            cls.__names.append(intern(str(name)))
+            cls.__sortKeys.append(naturalKey(name))
+            cls.__codes[name] = code
+        return code
+
+    @classmethod
+    def sortKey(cls, code):
+        # type: (int) -> tuple
+        return cls.__sortKeys[code]
+
+    @classmethod
+    def name(cls, code):
+        # type: (int) -> str
+        return cls.__names[code]
+
+
+class LightRecord(object):
+    __slots__ = ("path", "shape", "uuid", "typeCode", "status", "_displayName", "_nameKey")
+
+    def __init__(self, path, shape="", uuid="", typeCode=0, status=LS.LightStatus.Undefined):
+        self.path = path
+        self.shape = shape
+        self.uuid = uuid
+        self.typeCode = typeCode
+        self.status = status
+        self._displayName = None
+        self._nameKey = None
+
+    @property
+    def lightType(self):
+        return LightTypes.name(self.typeCode)
+
+    @property
+    def displayName(self):
+        if self._displayName is None:
+            self._displayName = self.path[1:].replace('|', ' > ')
+        return self._displayName
+
+    @property
+    def typeKey(self):
+        return LightTypes.sortKey(self.typeCode)
+
+    @property
+    def nameKey(self):
+        if self._nameKey is None:
+            self._nameKey = naturalKey(self.displayName)
+        return self._nameKey
+
+    def withStatus(self, status):
+        # type: (int) -> LightRecord
+        """A copy of the record with another status, records held by views are never changed in place."""
+        record = LightRecord(self.path, self.shape, self.uuid, self.typeCode, status)
+        record._displayName = self._displayName
+        record._nameKey = self._nameKey
+        return record
+
+    def __eq__(self, other):
+        if not isinstance(other, LightRecord):
+            return NotImplemented
+        return self.path == other.path and self.shape == other.shape and self.uuid == other.uuid \
+            and self.typeCode == other.typeCode and self.status == other.status
+
+    def __ne__(self, other):
+        equal = self.__eq__(other)
+        if equal is NotImplemented:
+            return equal
+        return not equal
+
+    def __hash__(self):
+        return hash(self.path)
+
+    def __repr__(self):
+        return "LightRecord(%r, %s, %s)" % (self.path, self.lightType, self.status)
+
+
+class LightStore:
+    def __init__(self):
+        self.__records = []
+        self.__byPath = {}
+        self.__byUuid = {}
+        # paths of replaced records in order, revision is their count
+        self.__replaced = []
+        self.revision = 0
+
+    def add(self, path, shape="", lightType="", uuid="", status=LS.LightStatus.Undefined):
+        # type: (str, str, str, str, int) -> LightRecord
+        path = intern(str(path))
+        record = self.__byPath.get(path)
+        if record is not None:
+            return record
+
+        record = LightRecord(path, intern(str(shape)) if shape else "", uuid, LightTypes.code(lightType), status)
+        self.__byPath[path] = len(self.__records)
+        if uuid:
+            self.__byUuid[uuid] = len(self.__records)
+        self.__records.append(record)
+        return record
+
+    def replace(self, record):
+        # type: (LightRecord) -> None
+        """Puts record in place of the stored record with its path. Views catch up through replacedSince."""
+        self.__records[self.__byPath[record.path]] = record
+        self.__replaced.append(record.path)
+        self.revision += 1
+
+    def replacedSince(self, revision):
+        # type: (int) -> list
+        return self.__replaced[revision:]
+
+    def __len__(self):
+        return len(self.__records)
+
+    def __iter__(self):
+        return iter(self.__records)
+
+    def __contains__(self, path):
+        return path in self.__byPath
+
+    def records(self):
+        return self.__records
+
+    def row(self, index):
+        # type: (int) -> LightRecord
+        return self.__records[index]
+
+    def rowOf(self, path):
+        # type: (str) -> int
+        return self.__byPath.get(path, -1)
+
+    def find(self, path):
+        # type: (str) -> LightRecord
+        index = self.__byPath.get(path)
+        if index is None:
+            return None
+        return self.__records[index]
+
+    def findUuid(self, uuid):
+        # type: (str) -> LightRecord
+        index = self.__byUuid.get(uuid)
+        if index is None:
+            return None
+        return self.__records[index]
+
+    def paths(self):
+        return [record.path for record in self.__records]
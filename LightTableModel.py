@@ -0,0 +1,237 @@
+from PySide2 import QtCore
+
+import IconRenderer as ICO
+import LightFilter as LF
+import Profiler as PRF
+
+
+def rowRanges(rows):
+    # type: (list) -> list
+    """Sorted rows as (first, last) runs of consecutive rows."""
+    runs = []
+    for row in rows:
+        if runs and row == runs[-1][1] + 1:
+            runs[-1][1] = row
+        elif not runs or row != runs[-1][1]:
+            runs.append([row, row])
+    return [tuple(run) for run in runs]
+
+
+class LightTableModel(QtCore.QAbstractTableModel):
+    TypeColumn = 0
+    NameColumn = 1
+    StatusColumn = 2
+
+    SeverityRole = QtCore.Qt.UserRole + 1
+    IsLightIconRole = QtCore.Qt.UserRole + 2
+    PathRole = QtCore.Qt.UserRole + 3
+    TypeRole = QtCore.Qt.UserRole + 4
+    SortRole = QtCore.Qt.UserRole + 5
+
+    headers = ("", "Name", "")
+
+    def __init__(self, renderer=None, parent=None):
+        super(LightTableModel, self).__init__(parent)
+        self.renderer = renderer
+        if self.renderer is None:
+            self.renderer = ICO.IconRenderer.shared()
+
+        self.__store = None
+        self.__revision = 0
+        self.__rows = []
+        self.__pathRows = {}
+
+    def rowCount(self, parent=QtCore.QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self.__rows)
+
+    def columnCount(self, parent=QtCore.QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self.headers)
+
+    def headerData(self, section, orientation, role=QtCore.Qt.DisplayRole):
+        if orientation == QtCore.Qt.Horizontal and role == QtCore.Qt.DisplayRole:
+            return self.headers[section]
+        return None
+
+    def data(self, index, role=QtCore.Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        record = self.__rows[index.row()]
+        column = index.column()
+
+        if role == QtCore.Qt.DisplayRole:
+            if column == self.NameColumn:
+                return record.displayName
+            return None
+        if role == QtCore.Qt.DecorationRole:
+            if column == self.TypeColumn:
+                return self.typeIcon(record.typeCode)
+            if column == self.StatusColumn:
+                return self.statusIcon(record.status)
+            return None
+        if role == QtCore.Qt.ToolTipRole:
+            if column == self.TypeColumn:
+                return record.lightType
+            return record.path
+        if role == self.SeverityRole:
+            return record.status
+        if role == self.IsLightIconRole:
+            return column == self.TypeColumn
+        if role == self.PathRole:
+            return record.path
+        if role == self.TypeRole:
+            return record.lightType
+        if role == self.SortRole:
+            if column == self.TypeColumn:
+                return record.lightType
+            if column == self.StatusColumn:
+                return record.status
+            return record.displayName
+        return None
+
+    def flags(self, index):
+        if not index.isValid():
+            return QtCore.Qt.NoItemFlags
+        return QtCore.Qt.ItemIsEnabled | QtCore.Qt.ItemIsSelectable
+
+    def setStore(self, store):
+        # type: (LSt.LightStore) -> None
+        self.beginResetModel()
+        self.__store = store
+        self.__revision = store.revision
+        self.__rows = list(store)
+        self.__reindex()
+        self.endResetModel()
+
+    def updateStore(self, store):
+        # type: (LSt.LightStore) -> bool
+        if store is self.__store:
+            return self.__updateReplaced(store)
+        self.__store = store
+        self.__revision = store.revision
+
+        removed = [i for i, record in enumerate(self.__rows) if record.path not in store]
+        for first, last in reversed(rowRanges(removed)):
+            self.beginRemoveRows(QtCore.QModelIndex(), first, last)
+            del self.__rows[first:last + 1]
+            self.endRemoveRows()
+        if removed:
+            self.__reindex()
+
+        changed = []
+        for i, record in enumerate(self.__rows):
+            newRecord = store.find(record.path)
+            if newRecord is not record:
+                self.__rows[i] = newRecord
+                if newRecord != record:
+                    changed.append(i)
+        lastColumn = self.columnCount() - 1
+        for first, last in rowRanges(changed):
+            self.dataChanged.emit(self.index(first, 0), self.index(last, lastColumn))
+
+        added = [record for record in store if record.path not in self.__pathRows]
+        if added:
+            first = len(self.__rows)
+            self.beginInsertRows(QtCore.QModelIndex(), first, first + len(added) - 1)
+            for record in added:
+                self.__pathRows[record.path] = len(self.__rows)
+                self.__rows.append(record)
+            self.endInsertRows()
+        PRF.count("rowsTouched", len(removed) + len(changed) + len(added))
+        return bool(removed or changed or added)
+
+    def __updateReplaced(self, store):
+        # records replaced in the same store, only their rows are looked at
+        paths = store.replacedSince(self.__revision)
+        self.__revision = store.revision
+        changed = sorted(set(self.__pathRows[path] for path in paths if path in self.__pathRows))
+        for i in changed:
+            self.__rows[i] = store.find(self.__rows[i].path)
+        lastColumn = self.columnCount() - 1
+        for first, last in rowRanges(changed):
+            self.dataChanged.emit(self.index(first, 0), self.index(last, lastColumn))
+        PRF.count("rowsTouched", len(changed))
+        return bool(changed)
+
+    def store(self):
+        return self.__store
+
+    def row(self, index):
+        # type: (int) -> LSt.LightRecord
+        return self.__rows[index]
+
+    def rows(self):
+        return self.__rows
+
+    def rowForPath(self, path):
+        # type: (str) -> int
+        return self.__pathRows.get(path, -1)
+
+    def __reindex(self):
+        self.__pathRows = dict((record.path, i) for i, record in enumerate(self.__rows))
+
+    @staticmethod
+    def typeIcon(self, typeCode):
+        return self.renderer.typeIcon(typeCode)
+
+    def statusIcon(self, status):
+        return self.renderer.statusIcon(status)
+
+
+class LightFilterProxyModel(QtCore.QSortFilterProxyModel):
+    # per sort column: type, then status, then name; the keys are cached on the records
+    sortKeys = {
+        LightTableModel.TypeColumn: lambda record: (record.typeKey, record.status, record.nameKey),
+        LightTableModel.NameColumn: lambda record: (record.nameKey, record.typeKey, record.status),
+        LightTableModel.StatusColumn: lambda record: (record.status, record.typeKey, record.nameKey),
+    }
+
+    def __init__(self, parent=None):
+        super(LightFilterProxyModel, self).__init__(parent)
+        self.searchIndex = LF.LightSearchIndex()
+        self.__filterText = ""
+        self.__filterMode = LF.LightFilterQuery.Substring
+        self.__matches = None
+        self.setSortRole(LightTableModel.SortRole)
+        self.setDynamicSortFilter(True)
+
+    def setFilterText(self, text):
+        if text == self.__filterText:
+            return
+        self.__filterText = text
+        self.refreshFilter()
+
+    def setFilterMode(self, mode):
+        if mode == self.__filterMode:
+            return
+        self.__filterMode = mode
+        self.refreshFilter()
+
+    def filterMode(self):
+        return self.__filterMode
+
+    def updateIndex(self, store):
+        # type: (LSt.LightStore) -> None
+        if self.searchIndex.update(store):
+            self.refreshFilter()
+
+    def refreshFilter(self):
+        matches = self.searchIndex.query(self.__filterText, self.__filterMode)
+        if matches == self.__matches:
+            return
+        self.__matches = matches
+        # only rows whose acceptance flips are removed from or inserted into the proxy
+        self.invalidateFilter()
+
+    def filterAcceptsRow(self, sourceRow, sourceParent):
+        if self.__matches is None:
+            return True
+        return self.sourceModel().row(sourceRow).path in self.__matches
+
+    def lessThan(self, left, right):
+        model = self.sourceModel()
+        keys = self.sortKeys[left.column()]
+        return keys(model.row(left.row())) < keys(model.row(right.row()))
@@ -0,0 +1,330 @@
+from PySide2 import QtCore
+
+import IconRenderer as ICO
+import LightStatus as LS
+import LightStore as LSt
+import LightTableModel as LTM
+import Profiler as PRF
+
+
+statusCount = LS.LightStatus.Undefined + 1
+
+
+class LightTreeNode(object):
+    __slots__ = ("name", "path", "parent", "row", "children", "childNames", "fetched", "record", "counts")
+
+    def __init__(self, name, path, parent=None):
+        self.name = name
+        self.path = path
+        self.parent = parent
+        self.row = -1
+        # every child, only the first `fetched` are rows of the model yet
+        self.children = []
+        self.childNames = {}
+        self.fetched = 0
+        # the light on this dag path, None for a group
+        self.record = None
+        # lights per status in this subtree, this node's own light included
+        self.counts = [0] * statusCount
+
+
+class LightTreeModel(QtCore.QAbstractItemModel):
+    """Lights grouped by dag hierarchy, children become rows only when a view expands their parent.
+
+    Status counts are kept per group and updated along the ancestors of a changed light, rows that were
+    never fetched do not emit anything.
+    """
+
+    NameColumn = 0
+    StatusColumn = 1
+
+    SeverityRole = LTM.LightTableModel.SeverityRole
+    PathRole = LTM.LightTableModel.PathRole
+    CountsRole = QtCore.Qt.UserRole + 10
+
+    headers = ("Name", "Status")
+    fetchBatch = 256
+
+    countedStatuses = ((LS.LightStatus.Found, "found"), (LS.LightStatus.Outdated, "outdated"),
+                       (LS.LightStatus.Add, "new"), (LS.LightStatus.Missing, "missing"))
+    # the icon of a group is the one of its most severe light
+    severityOrder = (LS.LightStatus.Missing, LS.LightStatus.Outdated, LS.LightStatus.Add, LS.LightStatus.Found)
+
+    def __init__(self, renderer=None, parent=None):
+        super(LightTreeModel, self).__init__(parent)
+        self.renderer = renderer
+        if self.renderer is None:
+            self.renderer = ICO.IconRenderer.shared()
+
+        self.root = LightTreeNode("", "")
+        self.__store = None
+        self.__revision = 0
+        # path -> node of every light
+        self.__lights = {}
+        # nodes whose data changed during an update, emitted once at the end
+        self.__touched = set()
+
+    def index(self, row, column, parent=QtCore.QModelIndex()):
+        node = self.node(parent)
+        if row < 0 or row >= node.fetched or column < 0 or column >= len(self.headers):
+            return QtCore.QModelIndex()
+        return self.createIndex(row, column, node.children[row])
+
+    def parent(self, index=None):
+        if index is None:
+            return super(LightTreeModel, self).parent()
+        if not index.isValid():
+            return QtCore.QModelIndex()
+        parent = index.internalPointer().parent
+        if parent is None or parent is self.root:
+            return QtCore.QModelIndex()
+        return self.createIndex(parent.row, 0, parent)
+
+    def rowCount(self, parent=QtCore.QModelIndex()):
+        if parent.column() > 0:
+            return 0
+        return self.node(parent).fetched
+
+    def columnCount(self, parent=QtCore.QModelIndex()):
+        return len(self.headers)
+
+    def hasChildren(self, parent=QtCore.QModelIndex()):
+        if parent.column() > 0:
+            return False
+        # answered without fetching, so collapsed groups still show their expand arrow
+        return bool(self.node(parent).children)
+
+    def canFetchMore(self, parent):
+        node = self.node(parent)
+        return node.fetched < len(node.children)
+
+    def fetchMore(self, parent):
+        node = self.node(parent)
+        count = min(self.fetchBatch, len(node.children) - node.fetched)
+        if count <= 0:
+            return
+        self.beginInsertRows(parent, node.fetched, node.fetched + count - 1)
+        node.fetched += count
+        self.endInsertRows()
+        PRF.count("treeRowsFetched", count)
+
+    def headerData(self, section, orientation, role=QtCore.Qt.DisplayRole):
+        if orientation == QtCore.Qt.Horizontal and role == QtCore.Qt.DisplayRole:
+            return self.headers[section]
+        return None
+
+    def data(self, index, role=QtCore.Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        node = index.internalPointer()
+        record = node.record
+        column = index.column()
+
+        if role == QtCore.Qt.DisplayRole:
+            if column == self.NameColumn:
+                return node.name
+            if node.children:
+                return self.countsText(node.counts)
+            return None
+        if role == QtCore.Qt.DecorationRole:
+            if column == self.NameColumn:
+                return self.renderer.typeIcon(record.typeCode) if record is not None else None
+            return self.renderer.statusIcon(self.severity(node))
+        if role == QtCore.Qt.ToolTipRole:
+            if node.children:
+                return "%s\n%s" % (node.path, self.countsText(node.counts))
+            return node.path
+        if role == self.SeverityRole:
+            return self.severity(node)
+        if role == self.PathRole:
+            return node.path
+        if role == self.CountsRole:
+            return list(node.counts)
+        return None
+
+    def flags(self, index):
+        if not index.isValid():
+            return QtCore.Qt.NoItemFlags
+        return QtCore.Qt.ItemIsEnabled | QtCore.Qt.ItemIsSelectable
+
+    def node(self, index):
+        # type: (QtCore.QModelIndex) -> LightTreeNode
+        if index.isValid():
+            return index.internalPointer()
+        return self.root
+
+    def record(self, index):
+        # type: (QtCore.QModelIndex) -> LSt.LightRecord
+        return self.node(index).record
+
+    def store(self):
+        return self.__store
+
+    def setStore(self, store):
+        # type: (LSt.LightStore) -> None
+        self.beginResetModel()
+        self.__store = store
+        self.__revision = store.revision
+        self.root = LightTreeNode("", "")
+        self.__lights = {}
+        for record in store:
+            self.__add(record, False)
+        self.__sort(self.root)
+        self.__touched.clear()
+        self.endResetModel()
+
+    def updateStore(self, store):
+        # type: (LSt.LightStore) -> bool
+        if store is self.__store:
+            return self.__updateReplaced(store)
+        if self.__store is None:
+            self.setStore(store)
+            return True
+        self.__store = store
+        self.__revision = store.revision
+
+        with PRF.span("LightTreeModel.updateStore"):
+            removed = [node for path, node in self.__lights.items() if path not in store]
+            for node in removed:
+                self.__remove(node)
+
+            added = 0
+            changed = 0
+            for record in store:
+                node = self.__lights.get(record.path)
+                if node is None:
+                    self.__add(record, True)
+                    added += 1
+                elif node.record is not record:
+                    previous = node.record
+                    node.record = record
+                    if previous.status != record.status:
+                        self.__count(node, previous.status, -1)
+                        self.__count(node, record.status, 1)
+                    if previous != record:
+                        self.__touched.add(node)
+                        changed += 1
+
+            self.__emitTouched()
+            PRF.count("rowsTouched", len(removed) + added + changed)
+        return bool(removed or added or changed)
+
+    def __updateReplaced(self, store):
+        # records replaced in the same store, only their nodes and ancestors are touched
+        paths = set(store.replacedSince(self.__revision))
+        self.__revision = store.revision
+        for path in paths:
+            node = self.__lights.get(path)
+            record = store.find(path)
+            if node is None or record is None or node.record is record:
+                continue
+            if node.record.status != record.status:
+                self.__count(node, node.record.status, -1)
+                self.__count(node, record.status, 1)
+            node.record = record
+            self.__touched.add(node)
+        changed = bool(self.__touched)
+        self.__emitTouched()
+        return changed
+
+    @classmethod
+    def countsText(cls, counts):
+        # type: (list) -> str
+        return "  ".join("%d %s" % (counts[status], label) for status, label in cls.countedStatuses if counts[status])
+
+    @classmethod
+    def severity(cls, node):
+        # type: (LightTreeNode) -> int
+        if node.record is not None and not node.children:
+            return node.record.status
+        for status in cls.severityOrder:
+            if node.counts[status]:
+                return status
+        return LS.LightStatus.Undefined
+
+    def __add(self, record, notify):
+        parent = self.root
+        for name in record.path.split("|")[1:]:
+            child = parent.childNames.get(name)
+            if child is None:
+                child = LightTreeNode(name, parent.path + "|" + name, parent)
+                self.__insert(parent, child, notify)
+            parent = child
+        parent.record = record
+        self.__lights[record.path] = parent
+        self.__count(parent, record.status, 1)
+
+    def __insert(self, parent, child, notify):
+        child.row = len(parent.children)
+        parent.childNames[child.name] = child
+        # a parent that has fetched all its children gets the new one as a row right away,
+        # otherwise it waits in the unfetched tail for fetchMore
+        if notify and parent.fetched == len(parent.children) and self.__isExposed(parent):
+            self.beginInsertRows(self.__index(parent), child.row, child.row)
+            parent.children.append(child)
+            parent.fetched += 1
+            self.endInsertRows()
+        else:
+            parent.children.append(child)
+
+    def __remove(self, node):
+        self.__count(node, node.record.status, -1)
+        del self.__lights[node.path]
+        node.record = None
+        # the light's node and every group it leaves empty
+        while node is not self.root and node.record is None and not node.children:
+            parent = node.parent
+            row = node.row
+            exposed = row < parent.fetched and self.__isExposed(parent)
+            if exposed:
+                self.beginRemoveRows(self.__index(parent), row, row)
+            del parent.children[row]
+            del parent.childNames[node.name]
+            if row < parent.fetched:
+                parent.fetched -= 1
+            for sibling in parent.children[row:]:
+                sibling.row -= 1
+            if exposed:
+                self.endRemoveRows()
+            node.parent = None
+            self.__touched.discard(node)
+            node = parent
+
+    def __count(self, node, status, delta):
+        # O(depth), the rest of the tree is not looked at
+        while node is not None:
+            node.counts[status] += delta
+            if node is not self.root:
+                self.__touched.add(node)
+            node = node.parent
+
+    def __emitTouched(self):
+        lastColumn = len(self.headers) - 1
+        for node in self.__touched:
+            if node.parent is not None and self.__isExposed(node):
+                index = self.createIndex(node.row, 0, node)
+                self.dataChanged.emit(index, index.sibling(node.row, lastColumn))
+        self.__touched.clear()
+
+    def __isExposed(self, node):
+        # a node is a row when every node on its way up has fetched it
+        while node is not self.root:
+            parent = node.parent
+            if parent is None or node.row >= parent.fetched:
+                return False
+            node = parent
+        return True
+
+    def __index(self, node):
+        if node is self.root:
+            return QtCore.QModelIndex()
+        return self.createIndex(node.row, 0, node)
+
+    def __sort(self, node):
+        # groups first, then lights, both in natural order
+        node.children.sort(key=lambda child: (child.record is not None and not child.children,
+                                              LSt.naturalKey(child.name)))
+        for row, child in enumerate(node.children):
+            child.row = row
+            if child.children:
+                self.__sort(child)
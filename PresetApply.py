@@ -0,0 +1,95 @@
+import time
+
+from PySide2 import QtCore, QtWidgets
+
+import PresetDiff as PD
+import Profiler as PRF
+
+
+class ApplyJob(QtCore.QObject):
+    """Runs an ApplyPlan in time slices, handing control back to the event loop between them.
+
+    Every write goes into one undo chunk, so a finished or cancelled apply undoes in a single step.
+    """
+
+    progress = QtCore.Signal(int, int)
+    finished = QtCore.Signal(bool)
+
+    def __init__(self, plan, sceneQuery, sliceSeconds=0.05, chunkSize=200, parent=None):
+        super(ApplyJob, self).__init__(parent)
+        self.plan = plan
+        self.sceneQuery = sceneQuery
+        self.sliceSeconds = sliceSeconds
+        self.chunkSize = chunkSize
+        self.written = 0
+        self.failures = []
+
+        self.__chunks = None
+        self.__running = False
+        self.__elapsed = 0.0
+        self.__timer = QtCore.QTimer(self)
+        self.__timer.setSingleShot(True)
+        self.__timer.setInterval(0)
+        self.__timer.timeout.connect(self.__step)
+
+    def isRunning(self):
+        return self.__running
+
+    def start(self):
+        if self.__running:
+            return
+        self.__chunks = self.plan.chunks(self.chunkSize)
+        self.__running = True
+        self.sceneQuery.openUndoChunk("LightLister apply preset")
+        self.__timer.start()
+
+    def cancel(self):
+        if self.__running:
+            self.__finish(False)
+
+    def __step(self):
+        if not self.__running:
+            return
+        start = time.time()
+        with PRF.span("ApplyJob.step"):
+            while time.time() - start < self.sliceSeconds:
+                chunk = next(self.__chunks, None)
+                if chunk is None:
+                    self.__elapsed += time.time() - start
+                    self.progress.emit(self.written, len(self.plan))
+                    self.__finish(True)
+                    return
+                attribute, nodes, values = chunk
+                for node, error in self.sceneQuery.writeAttribute(nodes, attribute, values):
+                    self.failures.append((attribute, node, error))
+                self.written += len(nodes)
+        self.__elapsed += time.time() - start
+        self.progress.emit(self.written, len(self.plan))
+        self.__timer.start()
+
+    def __finish(self, completed):
+        self.__timer.stop()
+        self.__running = False
+        self.sceneQuery.closeUndoChunk()
+        if self.written:
+            # the next dry run estimates from what this machine actually did
+            PD.ApplyPlan.secondsPerWrite = self.__elapsed / self.written
+        self.finished.emit(completed)
+
+
+def applyWithProgress(plan, sceneQuery, parent=None):
+    # type: (PD.ApplyPlan, SceneQuery.SceneQuery, QtWidgets.QWidget) -> ApplyJob
+    """Starts plan with a modal progress dialog whose cancel button stops the job."""
+    dialog = QtWidgets.QProgressDialog("Applying preset to %d lights..." % len(plan.lights), "Cancel",
+                                       0, len(plan), parent)
+    dialog.setWindowTitle("Preset -> Scene")
+    dialog.setWindowModality(QtCore.Qt.WindowModal)
+    dialog.setMinimumDuration(250)
+
+    job = ApplyJob(plan, sceneQuery, parent=dialog)
+    job.progress.connect(lambda written, total: dialog.setValue(written))
+    job.finished.connect(lambda completed: dialog.close())
+    job.finished.connect(lambda completed: dialog.deleteLater())
+    dialog.canceled.connect(job.cancel)
+    job.start()
+    return job
@@ -0,0 +1,199 @@
+import hashlib
+import json
+import os
+import threading
+import time
+
+try:
+    import cPickle as pickle
+except ImportError:
+    import pickle
+
+import JSonUtils as JSU
+
+
+class PresetCache:
+    """Parsed presets pickled on disk, reopening a cached preset skips parsing it.
+
+    Entries are keyed by path and checked against the file's size, mtime and content hash. A file whose
+    mtime changed but whose content hash did not is still a hit. Entries are evicted least recently used
+    first once the cache grows past maxBytes. Loads run on worker threads, so every access is locked.
+    """
+
+    manifestName = "manifest.json"
+    hashBlockSize = 1 << 20
+
+    def __init__(self, directory, maxBytes=512 << 20, maxRecent=10):
+        # type: (str, int, int) -> None
+        self.directory = directory
+        self.maxBytes = maxBytes
+        self.maxRecent = maxRecent
+
+        self.__lock = threading.Lock()
+        self.__entries = None
+        self.__recent = None
+
+    def get(self, fileName):
+        # type: (str) -> dict
+        """Returns the parsed preset of fileName, or None when it is not cached or the file changed."""
+        fileName = os.path.normpath(fileName)
+        with self.__lock:
+            entry = self.__current(fileName)
+            if entry is None:
+                return None
+            entryName = entry["entry"]
+        # unpickled outside the lock, recent() and touch() on the UI thread do not wait for it. put replaces
+        # entries by renaming, an entry being read is never written to
+        try:
+            with open(os.path.join(self.directory, entryName), "rb") as entryFile:
+                data = pickle.load(entryFile)
+        except (IOError, OSError, EOFError, pickle.UnpicklingError):
+            data = None
+        with self.__lock:
+            if data is None:
+                self.__remove(fileName)
+            else:
+                entry["used"] = time.time()
+                self.__touch(fileName)
+            self.__saveManifest()
+        return data
+
+    def put(self, fileName, data, key=None):
+        # type: (str, dict, dict) -> None
+        """Caches data, parsed from fileName when its fileKey was key.
+
+        Take the key before parsing, a file edited while it was parsed then no longer matches its entry.
+        """
+        fileName = os.path.normpath(fileName)
+        if key is None:
+            key = self.fileKey(fileName)
+        with self.__lock:
+            entries = self.__load()
+            if not os.path.exists(self.directory):
+                os.makedirs(self.directory)
+            entryName = hashlib.sha1(fileName.encode("utf-8")).hexdigest() + ".pickle"
+            entryPath = os.path.join(self.directory, entryName)
+            with open(entryPath + ".tmp", "wb") as entryFile:
+                pickle.dump(data, entryFile, pickle.HIGHEST_PROTOCOL)
+            JSU.replaceFile(entryPath + ".tmp", entryPath)
+
+            entries[fileName] = {"size": key["size"], "mtime": key["mtime"], "hash": key["hash"],
+                                 "entry": entryName, "bytes": os.path.getsize(entryPath), "used": time.time()}
+            self.__touch(fileName)
+            self.__evict()
+            self.__saveManifest()
+
+    def isCurrent(self, fileName):
+        # type: (str) -> bool
+        """True when the cached entry of fileName still matches the file on disk.
+
+        Hashes fileName when its mtime changed, call it from a worker thread.
+        """
+        with self.__lock:
+            return self.__current(os.path.normpath(fileName)) is not None
+
+    def recent(self):
+        # type: () -> list
+        """Recently opened presets that still exist, most recent first."""
+        with self.__lock:
+            self.__load()
+            return [fileName for fileName in self.__recent if os.path.exists(fileName)]
+
+    def touch(self, fileName):
+        # type: (str) -> None
+        with self.__lock:
+            self.__load()
+            self.__touch(os.path.normpath(fileName))
+            self.__saveManifest()
+
+    def size(self):
+        # type: () -> int
+        with self.__lock:
+            return sum(entry["bytes"] for entry in self.__load().values())
+
+    def clear(self):
+        with self.__lock:
+            for fileName in list(self.__load()):
+                self.__remove(fileName)
+            self.__recent = []
+            self.__saveManifest()
+
+    @classmethod
+    def fileKey(cls, fileName):
+        # type: (str) -> dict
+        """What an entry is checked against, the size, mtime and content hash of fileName."""
+        stat = os.stat(fileName)
+        return {"size": stat.st_size, "mtime": stat.st_mtime, "hash": cls.fileHash(fileName)}
+
+    @classmethod
+    def fileHash(cls, fileName):
+        # type: (str) -> str
+        digest = hashlib.sha1()
+        with open(fileName, "rb") as hashedFile:
+            for block in iter(lambda: hashedFile.read(cls.hashBlockSize), b""):
+                digest.update(block)
+        return digest.hexdigest()
+
+    def __current(self, fileName):
+        entry = self.__load().get(fileName)
+        if entry is None:
+            return None
+        try:
+            stat = os.stat(fileName)
+        except OSError:
+            return None
+        if stat.st_size != entry["size"]:
+            return None
+        if stat.st_mtime != entry["mtime"]:
+            # touched, copied or checked out again, only the content decides
+            if self.fileHash(fileName) != entry["hash"]:
+                return None
+            entry["mtime"] = stat.st_mtime
+        return entry
+
+    def __touch(self, fileName):
+        if fileName in self.__recent:
+            self.__recent.remove(fileName)
+        self.__recent.insert(0, fileName)
+        del self.__recent[self.maxRecent:]
+
+    def __evict(self):
+        entries = self.__entries
+        total = sum(entry["bytes"] for entry in entries.values())
+        for fileName in sorted(entries, key=lambda name: entries[name]["used"]):
+            if total <= self.maxBytes:
+                break
+            total -= entries[fileName]["bytes"]
+            self.__remove(fileName)
+
+    def __remove(self, fileName):
+        entry = self.__entries.pop(fileName, None)
+        if entry is None:
+            return
+        entryPath = os.path.join(self.directory, entry["entry"])
+        if os.path.exists(entryPath):
+            os.remove(entryPath)
+
+    def __load(self):
+        if self.__entries is not None:
+            return self.__entries
+        self.__entries = {}
+        self.__recent = []
+        manifestPath = os.path.join(self.directory, self.manifestName)
+        if os.path.exists(manifestPath):
+            try:
+                with open(manifestPath) as manifestFile:
+                    manifest = json.load(manifestFile)
+                self.__entries = manifest.get("entries", {})
+                self.__recent = manifest.get("recent", [])
+            except (IOError, OSError, ValueError):
+                pass
+        return self.__entries
+
+    def __saveManifest(self):
+        if not os.path.exists(self.directory):
+            os.makedirs(self.directory)
+        manifestPath = os.path.join(self.directory, self.manifestName)
+        with open(manifestPath + ".tmp", "w") as manifestFile:
+            json.dump({"entries": self.__entries, "recent": self.__recent}, manifestFile)
+        JSU.replaceFile(manifestPath + ".tmp", manifestPath)
@@ -0,0 +1,77 @@
+from collections import OrderedDict
+
+import LightStatus as LS
+import Profiler as PRF
+
+
+class ApplyPlan:
+    # refined by every apply that runs, see PresetApply.ApplyJob
+    secondsPerWrite = 5e-5
+
+    def __init__(self):
+        # attribute -> ([node, ...], [value, ...]), grouped so every attribute goes out in one write call
+        self.groups = OrderedDict()
+        self.lights = set()
+        # preset lights with nothing in the scene to write to
+        self.skipped = []
+
+    def __len__(self):
+        return sum(len(nodes) for nodes, values in self.groups.values())
+
+    def __bool__(self):
+        return bool(self.groups)
+
+    __nonzero__ = __bool__
+
+    def add(self, light, node, attribute, value):
+        # type: (str, str, str, object) -> None
+        nodes, values = self.groups.setdefault(attribute, ([], []))
+        nodes.append(node)
+        values.append(value)
+        self.lights.add(light)
+
+    def chunks(self, size):
+        # type: (int) -> iter
+        """Yields (attribute, nodes, values) runs of at most size writes, one attribute per run."""
+        for attribute, (nodes, values) in self.groups.items():
+            for start in range(0, len(nodes), size):
+                yield attribute, nodes[start:start + size], values[start:start + size]
+
+    def estimate(self):
+        # type: () -> float
+        return len(self) * self.secondsPerWrite
+
+    def report(self):
+        # type: () -> str
+        lines = ["%d writes on %d lights across %d attributes, about %.2fs"
+                 % (len(self), len(self.lights), len(self.groups), self.estimate())]
+        for attribute, (nodes, values) in sorted(self.groups.items(), key=lambda item: -len(item[1][0])):
+            lines.append("    %-24s %d" % (attribute, len(nodes)))
+        if self.skipped:
+            lines.append("%d preset lights are not in the scene and were skipped" % len(self.skipped))
+        return "\n".join(lines)
+
+
+def computePlan(logic):
+    # type: (LightLister.LightLister) -> ApplyPlan
+    """Collects the writes that bring the scene to the loaded preset, only the attributes that differ."""
+    plan = ApplyPlan()
+    preset = logic.loadedData
+    if not preset:
+        return plan
+
+    with PRF.span("PresetDiff.computePlan"):
+        # classifies whatever changed since the last pass, differences are then up to date
+        store = logic.getLights()
+        engine = logic.statusEngine
+        for record in store:
+            if record.status == LS.LightStatus.Missing:
+                plan.skipped.append(record.path)
+                continue
+            if record.status != LS.LightStatus.Outdated:
+                continue
+            presetValues = preset[record.path]
+            for attribute in engine.differences(record.path):
+                plan.add(record.path, record.shape, attribute, presetValues[attribute])
+        PRF.count("presetWrites", len(plan))
+    return plan
@@ -0,0 +1,198 @@
+import json
+import os
+
+from PySide2 import QtCore
+
+import JSonUtils as JSU
+
+
+class PresetTaskSignals(QtCore.QObject):
+    # created on the main thread, so emits from a worker reach the UI as queued calls
+    chunkLoaded = QtCore.Signal(object)
+    progress = QtCore.Signal(int, int)
+    finished = QtCore.Signal(str)
+    cancelled = QtCore.Signal()
+    failed = QtCore.Signal(str)
+
+
+class PresetTask(QtCore.QRunnable):
+    """Preset file work for a worker thread. Tasks never touch maya, results only leave through signals."""
+
+    def __init__(self, fileName):
+        super(PresetTask, self).__init__()
+        self.fileName = fileName
+        self.signals = PresetTaskSignals()
+        self.__cancelled = False
+        # PresetIO keeps the python object alive until one of the final signals arrives
+        self.setAutoDelete(False)
+
+    def cancel(self):
+        self.__cancelled = True
+
+    def isCancelled(self):
+        return self.__cancelled
+
+    def run(self):
+        try:
+            completed = self.work()
+        except Exception as error:
+            # anything left uncaught on the worker would leave the task running in the UI forever,
+            # corrupt files raise zlib, struct, pickle and key errors as well
+            self.signals.failed.emit("%s: %s" % (self.fileName, error))
+            return
+        if completed:
+            self.signals.finished.emit(self.fileName)
+        else:
+            self.signals.cancelled.emit()
+
+    def work(self):
+        # type: () -> bool
+        raise NotImplementedError
+
+
+class PresetLoadTask(PresetTask):
+    # the first chunk is small so the list fills quickly, later ones grow to keep the number of UI updates low
+    firstChunkSize = 256
+    maxChunkSize = 16384
+
+    def __init__(self, fileName, lights=None, cache=None, unlessCurrent=False):
+        # type: (str, list, PresetCache.PresetCache, bool) -> None
+        super(PresetLoadTask, self).__init__(fileName)
+        self.lights = lights
+        # only whole presets are cached
+        self.cache = cache if lights is None else None
+        self.cached = False
+        # a reload, nothing is read when the cached preset still matches the file
+        self.unlessCurrent = unlessCurrent and self.cache is not None
+        self.unchanged = False
+
+    def work(self):
+        if self.unlessCurrent:
+            # checked here, the file is hashed when its mtime changed
+            if self.cache.isCurrent(self.fileName):
+                self.unchanged = True
+                return True
+        elif self.cache is not None:
+            data = self.cache.get(self.fileName)
+            if data is not None:
+                self.cached = True
+                return self.__emitChunks(iter(data.items()), len(data))
+
+        loaded = None
+        if self.cache is not None:
+            loaded = {}
+            # taken before parsing, an edit made meanwhile leaves an entry that no longer matches the file
+            key = self.cache.fileKey(self.fileName)
+        if JSU.isPreset(self.fileName):
+            with JSU.PresetReader(self.fileName) as reader:
+                lights = reader.index if self.lights is None else self.lights
+                completed = self.__emitChunks(reader.readMany(lights), len(reader), loaded)
+        else:
+            # plain json presets are parsed in one go, they are still handed over in chunks
+            with open(self.fileName) as presetFile:
+                data = json.load(presetFile)
+            items = [(light, attributes) for light, attributes in data.items()
+                     if self.lights is None or light in self.lights]
+            completed = self.__emitChunks(iter(items), len(items), loaded)
+
+        if completed and loaded is not None:
+            self.cache.put(self.fileName, loaded, key)
+        return completed
+
+    def __emitChunks(self, records, total, loaded=None):
+        chunkSize = self.firstChunkSize
+        chunk = {}
+        done = 0
+        for light, attributes in records:
+            if self.isCancelled():
+                return False
+            chunk[light] = attributes
+            if loaded is not None:
+                loaded[light] = attributes
+            if len(chunk) >= chunkSize:
+                done += len(chunk)
+                self.signals.chunkLoaded.emit(chunk)
+                self.signals.progress.emit(done, total)
+                chunk = {}
+                chunkSize = min(chunkSize * 2, self.maxChunkSize)
+        if chunk:
+            done += len(chunk)
+            self.signals.chunkLoaded.emit(chunk)
+        self.signals.progress.emit(done, total)
+        return not self.isCancelled()
+
+
+class PresetSaveTask(PresetTask):
+    progressInterval = 1024
+
+    def __init__(self, fileName, items, total, compress=False, binary=False, cache=None):
+        # type: (str, iter, int, bool, bool, PresetCache.PresetCache) -> None
+        super(PresetSaveTask, self).__init__(fileName)
+        self.items = items
+        self.total = total
+        self.compress = compress
+        self.binary = binary
+        self.cache = cache
+
+    def work(self):
+        # written next to the target and swapped in at the end, a cancelled save leaves the old file alone
+        temporaryName = self.fileName + ".saving"
+        completed = False
+        try:
+            with JSU.PresetWriter(temporaryName, self.compress, self.binary) as writer:
+                for i, (light, attributes) in enumerate(self.items):
+                    if self.isCancelled():
+                        break
+                    writer.write(light, attributes)
+                    if i % self.progressInterval == 0:
+                        self.signals.progress.emit(i, self.total)
+                else:
+                    completed = True
+            if completed:
+                # the key of what was written, the rename keeps size, mtime and content
+                key = self.cache.fileKey(temporaryName) if self.cache is not None else None
+                JSU.replaceFile(temporaryName, self.fileName)
+                if self.cache is not None:
+                    # what was just written is already parsed, the next open of the file is a cache hit
+                    self.cache.put(self.fileName, dict(self.items), key)
+                self.signals.progress.emit(self.total, self.total)
+        finally:
+            if os.path.exists(temporaryName):
+                os.remove(temporaryName)
+        return completed
+
+
+class PresetIO(QtCore.QObject):
+    def __init__(self, parent=None, maxThreads=2, cache=None):
+        super(PresetIO, self).__init__(parent)
+        self.pool = QtCore.QThreadPool(self)
+        self.pool.setMaxThreadCount(maxThreads)
+        self.cache = cache
+        self.__tasks = set()
+
+    def load(self, fileName, lights=None, unlessCurrent=False):
+        # type: (str, list, bool) -> PresetLoadTask
+        return self.start(PresetLoadTask(fileName, lights, self.cache, unlessCurrent))
+
+    def save(self, fileName, items, total, compress=False, binary=False):
+        # type: (str, iter, int, bool, bool) -> PresetSaveTask
+        return self.start(PresetSaveTask(fileName, items, total, compress, binary, self.cache))
+
+    def start(self, task):
+        # type: (PresetTask) -> PresetTask
+        self.__tasks.add(task)
+        for signal in (task.signals.finished, task.signals.cancelled, task.signals.failed):
+            signal.connect(lambda *args: self.__tasks.discard(task))
+        self.pool.start(task)
+        return task
+
+    def tasks(self):
+        return list(self.__tasks)
+
+    def cancelAll(self):
+        for task in self.__tasks:
+            task.cancel()
+
+    def waitForDone(self, msecs=-1):
+        # type: (int) -> bool
+        return self.pool.waitForDone(msecs)
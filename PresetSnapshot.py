@@ -0,0 +1,127 @@
+import os
+
+import AttributeCache as AC
+import JSonUtils as JSU
+import Profiler as PRF
+import StatusEngine as SE
+
+
+class PresetSnapshot:
+    """Writes the scene lights to a preset file, after the first snapshot only the lights that changed.
+
+    markDirty is fed by scene change notifications. Dirty lights are re-read and hashed, the ones whose
+    hash still matches the file are not written again. New records are appended to the file. Lights that
+    are only in the preset are kept, a light is removed once it leaves the scene after a snapshot.
+    """
+
+    # compact the file once replaced records outweigh the live ones
+    garbageRatio = 1.0
+
+    def __init__(self, fileName, sceneQuery, attributeCache=None, compress=False, binary=False):
+        self.fileName = fileName
+        self.sceneQuery = sceneQuery
+        self.attributeCache = attributeCache
+        if self.attributeCache is None:
+            self.attributeCache = AC.AttributeCache(sceneQuery)
+        self.compress = compress
+        self.binary = binary
+
+        # light -> hash of the record the file holds, known once seeded or written in full
+        self.__hashes = {}
+        self.__known = False
+        # the preset given to seed, its lights that are not in the scene go into a full rewrite
+        self.__preset = {}
+        # scene lights at the last snapshot
+        self.__sceneLights = set()
+        self.__dirty = set()
+
+    def seed(self, preset, dirty=()):
+        # type: (dict, iter) -> None
+        """Takes the hashes of what the file holds from preset, the data loaded from it, instead of a full write.
+
+        dirty are the lights that changed since preset was loaded, no notification marked them before.
+        """
+        with PRF.span("PresetSnapshot.seed"):
+            self.__preset = preset
+            self.__hashes = dict((light, self.recordHash(record)) for light, record in preset.items())
+            self.__known = True
+            self.__dirty.update(dirty)
+
+    def markDirty(self, paths):
+        # attribute changes arrive on shapes as well as transforms, presets are keyed by transform
+        scene = self.sceneQuery.lights()
+        index = self.sceneQuery.lightIndex()
+        self.__dirty.update(scene.transforms[index[path]] if path in index else path for path in paths)
+
+    def markAllDirty(self):
+        self.__hashes.clear()
+        self.__known = False
+        self.__dirty.clear()
+
+    def snapshot(self, verify=False):
+        # type: (bool) -> tuple
+        """Returns (written, removed), {light: record} of the lights written and the lights removed.
+
+        verify re-reads every light instead of the dirty ones.
+        """
+        with PRF.span("PresetSnapshot.snapshot"):
+            scene = self.sceneQuery.lights()
+            full = not self.__known or not os.path.exists(self.fileName) or not JSU.isPreset(self.fileName)
+
+            candidates = []
+            for i, light in enumerate(scene.transforms):
+                if full or verify or light in self.__dirty or light not in self.__hashes:
+                    candidates.append(i)
+            inScene = set(scene.transforms)
+            removed = [light for light in self.__sceneLights if light not in inScene and light in self.__hashes]
+
+            records = self.__read(scene, candidates)
+            if not full:
+                records = [(light, record, recordHash) for light, record, recordHash in records
+                           if self.__hashes.get(light) != recordHash]
+            PRF.count("snapshotLights", len(records))
+
+            # a full rewrite keeps the preset's own lights, they are written as loaded
+            kept = []
+            if full:
+                kept = [(light, record) for light, record in self.__preset.items()
+                        if light not in inScene and light not in removed]
+                self.__hashes = dict((light, self.__hashes[light]) for light, record in kept
+                                     if light in self.__hashes)
+            if records or removed or full:
+                with JSU.PresetWriter(self.fileName, self.compress, self.binary, append=not full) as writer:
+                    for light, record in kept:
+                        writer.write(light, record)
+                    for light, record, recordHash in records:
+                        writer.write(light, record)
+                        self.__hashes[light] = recordHash
+                    for light in removed:
+                        if not full:
+                            writer.remove(light)
+                        self.__hashes.pop(light, None)
+                    compact = not full and writer.garbage > writer.live * self.garbageRatio
+                if compact:
+                    JSU.JSonUtils().compact(self.fileName)
+
+            self.__known = True
+            self.__sceneLights = inScene
+            self.__dirty.clear()
+            return dict((light, record) for light, record, recordHash in records), removed
+
+    def __read(self, scene, candidates):
+        shapes = [scene.shapes[i] for i in candidates]
+        attributes = [self.attributeCache.attributes(scene.types[i], scene.shapes[i]) for i in candidates]
+        values = self.sceneQuery.readAttributes(shapes, attributes)
+
+        records = []
+        for i, nodeValues in zip(candidates, values):
+            record = dict(nodeValues)
+            record["Type"] = scene.types[i]
+            records.append((scene.transforms[i], record, self.recordHash(record)))
+        return records
+
+    @staticmethod
+    def recordHash(record):
+        # type: (dict) -> int
+        # the same for a record read from the scene and the record loaded back from the file
+        return SE.contentHash(sorted(record), record)
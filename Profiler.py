@@ -0,0 +1,211 @@
+import functools
+import json
+import os
+import threading
+import time
+from collections import deque
+
+
+timer = getattr(time, "perf_counter", time.time)
+
+
+class SpanStats(object):
+    __slots__ = ("name", "count", "total", "max", "samples", "counters")
+
+    def __init__(self, name, window):
+        self.name = name
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.samples = deque(maxlen=window)
+        self.counters = {}
+
+    def add(self, duration, counters):
+        self.count += 1
+        self.total += duration
+        self.max = max(self.max, duration)
+        self.samples.append(duration)
+        for name, value in counters.items():
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def percentile(self, percent):
+        # type: (float) -> float
+        if not self.samples:
+            return 0.0
+        samples = sorted(self.samples)
+        index = int(round((len(samples) - 1) * percent / 100.0))
+        return samples[index]
+
+    @property
+    def mean(self):
+        return self.total / self.count if self.count else 0.0
+
+    def summary(self):
+        # type: () -> dict
+        summary = {"count": self.count, "total": self.total, "mean": self.mean,
+                   "p50": self.percentile(50), "p95": self.percentile(95), "max": self.max}
+        for name, value in self.counters.items():
+            summary[name + "PerCall"] = float(value) / self.count
+        return summary
+
+
+class Span(object):
+    __slots__ = ("profiler", "name", "start", "counters")
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+        self.start = 0.0
+        self.counters = {}
+
+    def __enter__(self):
+        self.profiler._push(self)
+        self.start = timer()
+        return self
+
+    def __exit__(self, *args):
+        self.profiler._pop(self, timer())
+        return False
+
+
+class NullSpan(object):
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+
+nullSpan = NullSpan()
+
+
+class Profiler:
+    def __init__(self, window=256, maxEvents=200000):
+        self.enabled = False
+        self.tracing = False
+        self.window = window
+        self.maxEvents = maxEvents
+        self.__origin = timer()
+        self.__local = threading.local()
+        self.__lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self.__lock:
+            self.spans = {}
+            self.counters = {}
+            self.events = []
+
+    def setEnabled(self, enabled, tracing=None):
+        self.enabled = bool(enabled)
+        if tracing is not None:
+            self.tracing = bool(tracing)
+
+    def span(self, name):
+        if not self.enabled:
+            return nullSpan
+        return Span(self, name)
+
+    def count(self, name, value=1):
+        if not self.enabled:
+            return
+        stack = self.__stack()
+        if stack:
+            counters = stack[-1].counters
+            counters[name] = counters.get(name, 0) + value
+        with self.__lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+            if self.tracing and len(self.events) < self.maxEvents:
+                self.events.append({"name": name, "ph": "C", "ts": self.__microseconds(timer()),
+                                    "pid": os.getpid(), "tid": threading.current_thread().ident,
+                                    "args": {name: self.counters[name]}})
+
+    def _push(self, span):
+        self.__stack().append(span)
+
+    def _pop(self, span, end):
+        stack = self.__stack()
+        if stack and stack[-1] is span:
+            stack.pop()
+        # counters are inclusive, a parent span also owns what its children counted
+        if stack:
+            parentCounters = stack[-1].counters
+            for name, value in span.counters.items():
+                parentCounters[name] = parentCounters.get(name, 0) + value
+
+        duration = end - span.start
+        with self.__lock:
+            stats = self.spans.get(span.name)
+            if stats is None:
+                stats = self.spans[span.name] = SpanStats(span.name, self.window)
+            stats.add(duration, span.counters)
+            if self.tracing and len(self.events) < self.maxEvents:
+                self.events.append({"name": span.name, "ph": "X", "ts": self.__microseconds(span.start),
+                                    "dur": duration * 1000000.0, "pid": os.getpid(),
+                                    "tid": threading.current_thread().ident, "args": dict(span.counters)})
+
+    def summary(self):
+        # type: () -> dict
+        with self.__lock:
+            return {"spans": dict((name, stats.summary()) for name, stats in self.spans.items()),
+                    "counters": dict(self.counters)}
+
+    def report(self):
+        # type: () -> str
+        lines = ["%-40s %7s %10s %10s %10s %10s" % ("span", "calls", "mean ms", "p50 ms", "p95 ms", "max ms")]
+        with self.__lock:
+            spans = sorted(self.spans.values(), key=lambda stats: -stats.total)
+            for stats in spans:
+                lines.append("%-40s %7d %10.3f %10.3f %10.3f %10.3f" % (
+                    stats.name, stats.count, stats.mean * 1000, stats.percentile(50) * 1000,
+                    stats.percentile(95) * 1000, stats.max * 1000))
+                for name in sorted(stats.counters):
+                    lines.append("    %-36s %10.1f per call" % (name, float(stats.counters[name]) / stats.count))
+            for name in sorted(self.counters):
+                lines.append("%-40s %7d" % (name, self.counters[name]))
+        return "\n".join(lines)
+
+    def exportChromeTrace(self, fileName):
+        # type: (str) -> None
+        # the trace event format read by chrome://tracing and Perfetto
+        with self.__lock:
+            events = list(self.events)
+        with open(fileName, "w") as traceFile:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, traceFile)
+
+    def __stack(self):
+        stack = getattr(self.__local, "stack", None)
+        if stack is None:
+            stack = self.__local.stack = []
+        return stack
+
+    def __microseconds(self, seconds):
+        return (seconds - self.__origin) * 1000000.0
+
+
+profiler = Profiler()
+if os.environ.get("LIGHTLISTER_PROFILE"):
+    profiler.setEnabled(True, tracing=os.environ.get("LIGHTLISTER_PROFILE") == "trace")
+
+
+def span(name):
+    return profiler.span(name)
+
+
+def count(name, value=1):
+    if profiler.enabled:
+        profiler.count(name, value)
+
+
+def timeIt(function):
+    name = getattr(function, "__qualname__", getattr(function, "__name__", "span"))
+
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        if not profiler.enabled:
+            return function(*args, **kwargs)
+        with Span(profiler, name):
+            return function(*args, **kwargs)
+    return wrapper
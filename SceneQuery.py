@@ -0,0 +1,222 @@
+import math
+from collections import namedtuple
+
+from maya import cmds
+from maya import mel
+
+import Profiler as PRF
+
+stringTypes = (str,)
+try:
+    stringTypes += (unicode,)
+except NameError:
+    pass
+
+try:
+    import maya.api.OpenMaya as om
+except ImportError:
+    om = None
+
+
+SceneLights = namedtuple("SceneLights", ["shapes", "transforms", "types", "uuids"])
+
+
+class SceneQuery:
+    def __init__(self):
+        self.generation = 0
+        self.__cached = None
+        self.__cachedGeneration = -1
+        self.__index = None
+
+    def invalidate(self):
+        self.generation += 1
+
+    def lights(self):
+        # type: () -> SceneLights
+        if self.__cached is not None and self.__cachedGeneration == self.generation:
+            return self.__cached
+
+        with PRF.span("SceneQuery.lights"):
+            # two bulk calls, whatever the light count
+            shapesAndTypes = cmds.ls(lights=True, long=True, showType=True) or []
+            shapes = shapesAndTypes[0::2]
+            types = shapesAndTypes[1::2]
+            uuids = cmds.ls(shapes, uuid=True) if shapes else []
+            PRF.count("mayaCalls", 2 if shapes else 1)
+            # a long shape path already contains its parent transform
+            transforms = [shape.rsplit('|', 1)[0] for shape in shapes]
+
+        self.__cached = SceneLights(shapes, transforms, types, uuids)
+        self.__cachedGeneration = self.generation
+        self.__index = None
+        return self.__cached
+
+    def lightIndex(self):
+        # type: () -> dict
+        """Light shape and transform paths -> their index in lights(), built once per scene generation."""
+        scene = self.lights()
+        if self.__index is None:
+            index = dict((transform, i) for i, transform in enumerate(scene.transforms))
+            index.update((shape, i) for i, shape in enumerate(scene.shapes))
+            self.__index = index
+        return self.__index
+
+    def readAttributes(self, nodes, attributes):
+        # type: (list, list) -> list
+        """Reads attributes[i] of nodes[i] and returns one {attribute: value} dict per node."""
+        with PRF.span("SceneQuery.readAttributes"):
+            if om is not None:
+                return self.__readPlugs(nodes, attributes)
+
+            values = []
+            for node, nodeAttributes in zip(nodes, attributes):
+                nodeValues = {}
+                for attribute in nodeAttributes:
+                    try:
+                        nodeValues[attribute] = self.commandValue(cmds.getAttr("%s.%s" % (node, attribute)))
+                    except (RuntimeError, ValueError, KeyError):
+                        continue
+                PRF.count("mayaCalls", len(nodeAttributes))
+                values.append(nodeValues)
+            return values
+
+    def __readPlugs(self, nodes, attributes):
+        # one selection list for every node, then plain plug reads without command parsing
+        selection = om.MSelectionList()
+        found = []
+        for node in nodes:
+            try:
+                selection.add(node)
+                found.append(True)
+            except RuntimeError:
+                found.append(False)
+        PRF.count("mayaCalls")
+
+        values = []
+        selectionIndex = 0
+        for i, nodeAttributes in enumerate(attributes):
+            nodeValues = {}
+            values.append(nodeValues)
+            if not found[i]:
+                continue
+            dependNode = om.MFnDependencyNode(selection.getDependNode(selectionIndex))
+            selectionIndex += 1
+            for attribute in nodeAttributes:
+                try:
+                    nodeValues[attribute] = self.plugValue(dependNode.findPlug(attribute, False))
+                except RuntimeError:
+                    continue
+        return values
+
+    @staticmethod
+    def commandValue(value):
+        # getAttr returns a compound as [(r, g, b)], plug reads and setAttr use [r, g, b]
+        if isinstance(value, list) and len(value) == 1 and isinstance(value[0], tuple):
+            return list(value[0])
+        return value
+
+    @classmethod
+    def plugValue(cls, plug):
+        """The value of plug in UI units, the same value getAttr returns and setAttr takes."""
+        if plug.isCompound:
+            return [cls.plugValue(plug.child(i)) for i in range(plug.numChildren())]
+        attribute = plug.attribute()
+        if attribute.hasFn(om.MFn.kTypedAttribute):
+            return plug.asString()
+        if attribute.hasFn(om.MFn.kNumericAttribute) \
+                and om.MFnNumericAttribute(attribute).numericType() == om.MFnNumericData.kBoolean:
+            return plug.asBool()
+        if attribute.hasFn(om.MFn.kEnumAttribute):
+            return plug.asInt()
+        if attribute.hasFn(om.MFn.kUnitAttribute):
+            # plugs hold internal units, radians for cone angles and centimeters for distances
+            unitType = om.MFnUnitAttribute(attribute).unitType()
+            if unitType == om.MFnUnitAttribute.kAngle:
+                return plug.asMAngle().asUnits(om.MAngle.uiUnit())
+            if unitType == om.MFnUnitAttribute.kDistance:
+                return plug.asMDistance().asUnits(om.MDistance.uiUnit())
+            if unitType == om.MFnUnitAttribute.kTime:
+                return plug.asMTime().asUnits(om.MTime.uiUnit())
+        return plug.asDouble()
+
+    @staticmethod
+    def openUndoChunk(name):
+        # chunks nest, writes made while one is open merge into a single undo step
+        cmds.undoInfo(openChunk=True, chunkName=name)
+
+    @staticmethod
+    def closeUndoChunk():
+        cmds.undoInfo(closeChunk=True)
+
+    def writeAttribute(self, nodes, attribute, values):
+        # type: (list, str, list) -> list
+        """Sets attribute on every node, values[i] for nodes[i] or one value for all, as a single undo step.
+
+        Returns (node, error) of every write that failed, the others are made. Numeric values go to maya as one
+        mel.eval of every setAttr, other values through one cmds.setAttr each. An MDGModifier would skip the
+        undo queue, which only a plugin command could hand it to.
+        """
+        if not isinstance(values, (list, tuple)) or len(values) != len(nodes):
+            values = [values] * len(nodes)
+        failures = []
+        with PRF.span("SceneQuery.writeAttribute"):
+            self.openUndoChunk("LightLister %s" % attribute)
+            try:
+                statements = []
+                for node, value in zip(nodes, values):
+                    plug = "%s.%s" % (node, attribute)
+                    arguments = self.melArguments(value)
+                    if arguments is not None:
+                        statements.append((node, 'setAttr "%s" %s;' % (plug, arguments)))
+                        continue
+                    try:
+                        if isinstance(value, (list, tuple)):
+                            cmds.setAttr(plug, *value)
+                        elif isinstance(value, stringTypes):
+                            cmds.setAttr(plug, value, type="string")
+                        else:
+                            cmds.setAttr(plug, value)
+                    except (RuntimeError, ValueError) as error:
+                        failures.append((node, str(error)))
+                    PRF.count("mayaCalls")
+                if statements:
+                    failures.extend(self.__evalStatements(statements))
+            finally:
+                self.closeUndoChunk()
+        return failures
+
+    @staticmethod
+    def __evalStatements(statements):
+        try:
+            mel.eval("".join(statement for node, statement in statements))
+            PRF.count("mayaCalls")
+            return []
+        except RuntimeError:
+            pass
+        # mel stops at the first statement that fails, one at a time finds every failing plug. Statements
+        # that already ran set the same values again, in the same undo chunk
+        failures = []
+        for node, statement in statements:
+            try:
+                mel.eval(statement)
+            except RuntimeError as error:
+                failures.append((node, str(error)))
+        PRF.count("mayaCalls", 1 + len(statements))
+        return failures
+
+    @classmethod
+    def melArguments(cls, value):
+        # type: (object) -> str
+        """value as setAttr arguments in mel, None for what mel can not take as plain numbers."""
+        if isinstance(value, bool):
+            return "1" if value else "0"
+        if isinstance(value, int):
+            return str(value)
+        if isinstance(value, float):
+            return repr(value) if not (math.isnan(value) or math.isinf(value)) else None
+        if isinstance(value, (list, tuple)) and value:
+            arguments = [cls.melArguments(item) for item in value]
+            if None in arguments or any(isinstance(item, (list, tuple)) for item in value):
+                return None
+            return " ".join(arguments)
+        return None
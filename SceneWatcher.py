@@ -0,0 +1,245 @@
+from PySide2 import QtCore
+
+
+class SceneChanges(object):
+    __slots__ = ("added", "removed", "renamed", "reparented", "attributes", "selection")
+
+    def __init__(self):
+        self.added = set()
+        self.removed = set()
+        self.renamed = set()
+        self.reparented = set()
+        self.attributes = {}
+        # the scene selection changed, what it is now is left to the receiver to query
+        self.selection = False
+
+    @property
+    def structural(self):
+        return bool(self.added or self.removed or self.renamed or self.reparented)
+
+    def __bool__(self):
+        return self.structural or bool(self.attributes) or self.selection
+
+    __nonzero__ = __bool__
+
+
+class MayaCallbackSource(object):
+    """Forwards Maya message callbacks for lights and the dag nodes above them to a SceneWatcher.
+
+    om is maya.api.OpenMaya by default, tests pass a stand-in for it.
+    """
+
+    def __init__(self, om=None):
+        if om is None:
+            import maya.api.OpenMaya as om
+        self.__om = om
+        self.__watcher = None
+        self.__globalIds = []
+        # MObjectHandle hash code -> (handle, attribute callback id), paths change on renames and reparents
+        self.__nodeIds = {}
+
+    def connect(self, watcher):
+        om = self.__om
+        self.__watcher = watcher
+        self.__globalIds = [
+            # "light" is what cmds.ls(lights=True) lists, every type derived from it
+            om.MDGMessage.addNodeAddedCallback(self.__nodeAdded, "light"),
+            om.MDGMessage.addNodeRemovedCallback(self.__nodeRemoved, "light"),
+            om.MNodeMessage.addNameChangedCallback(om.MObject(), self.__nameChanged),
+            om.MDagMessage.addAllDagChangesCallback(self.__dagChanged),
+            om.MEventMessage.addEventCallback("SelectionChanged", self.__selectionChanged),
+        ]
+
+    def disconnect(self):
+        om = self.__om
+        ids = list(self.__globalIds)
+        for handle, callbackId in self.__nodeIds.values():
+            ids.append(callbackId)
+        if ids:
+            om.MMessage.removeCallbacks(ids)
+        self.__globalIds = []
+        self.__nodeIds = {}
+        self.__watcher = None
+
+    def watch(self, paths):
+        om = self.__om
+        self.__removeDeleted()
+        for path in paths:
+            node = self.__node(path)
+            if node is None:
+                continue
+            handle = om.MObjectHandle(node)
+            if handle.hashCode() in self.__nodeIds:
+                continue
+            self.__nodeIds[handle.hashCode()] = (
+                handle, om.MNodeMessage.addAttributeChangedCallback(node, self.__attributeChanged))
+
+    def unwatch(self, paths):
+        # removed nodes no longer resolve by path, their callbacks go with every other deleted node's
+        ids = []
+        for path in paths:
+            node = self.__node(path)
+            if node is not None:
+                entry = self.__nodeIds.pop(self.__om.MObjectHandle(node).hashCode(), None)
+                if entry is not None:
+                    ids.append(entry[1])
+        if ids:
+            self.__om.MMessage.removeCallbacks(ids)
+        self.__removeDeleted()
+
+    def __node(self, path):
+        selection = self.__om.MSelectionList()
+        try:
+            selection.add(path)
+        except RuntimeError:
+            return None
+        return selection.getDependNode(0)
+
+    def __removeDeleted(self):
+        # a deleted node is invalid even while undo could bring it back, watch adds it again then
+        deleted = [key for key, (handle, callbackId) in self.__nodeIds.items() if not handle.isValid()]
+        if deleted:
+            self.__om.MMessage.removeCallbacks([self.__nodeIds.pop(key)[1] for key in deleted])
+
+    def __nodePath(self, node):
+        om = self.__om
+        if node.hasFn(om.MFn.kDagNode):
+            return om.MDagPath.getAPathTo(node).fullPathName()
+        return om.MFnDependencyNode(node).name()
+
+    def __isLight(self, node):
+        return node.hasFn(self.__om.MFn.kLight)
+
+    def __nodeAdded(self, node, *args):
+        if self.__watcher is not None and self.__isLight(node):
+            self.__watcher.nodeAdded(self.__nodePath(node))
+
+    def __nodeRemoved(self, node, *args):
+        if self.__watcher is not None and self.__isLight(node):
+            self.__watcher.nodeRemoved(self.__nodePath(node))
+
+    def __nameChanged(self, node, previousName, *args):
+        if self.__watcher is None or not previousName:
+            return
+        # a renamed group changes the path of every light below it
+        if self.__isLight(node) or self.__hasLightBelow(node):
+            self.__watcher.nodeRenamed(previousName, self.__nodePath(node))
+
+    def __dagChanged(self, message, child, parent, *args):
+        if self.__watcher is None:
+            return
+        node = child.node()
+        if self.__isLight(node) or self.__hasLightBelow(node):
+            self.__watcher.nodeReparented(child.fullPathName())
+
+    def __selectionChanged(self, *args):
+        if self.__watcher is not None:
+            self.__watcher.selectionChanged()
+
+    def __attributeChanged(self, message, plug, otherPlug, *args):
+        if self.__watcher is None or not message & self.__om.MNodeMessage.kAttributeSet:
+            return
+        self.__watcher.attributeChanged(self.__nodePath(plug.node()), plug.partialName(useLongNames=True))
+
+    def __hasLightBelow(self, node):
+        om = self.__om
+        if not node.hasFn(om.MFn.kDagNode):
+            return False
+        # depth first, stops at the first light
+        stack = [node]
+        while stack:
+            dagNode = om.MFnDagNode(stack.pop())
+            for i in range(dagNode.childCount()):
+                child = dagNode.child(i)
+                if child.hasFn(om.MFn.kLight):
+                    return True
+                stack.append(child)
+        return False
+
+
+class SceneWatcher(QtCore.QObject):
+    """Collects scene notifications and emits them as one SceneChanges batch per event loop tick."""
+
+    changed = QtCore.Signal(object)
+
+    def __init__(self, source=None, parent=None):
+        super(SceneWatcher, self).__init__(parent)
+        self.source = source
+        if self.source is None:
+            self.source = MayaCallbackSource()
+
+        self.generation = 0
+        self.__pending = SceneChanges()
+        self.__connected = False
+
+        self.__flushTimer = QtCore.QTimer(self)
+        self.__flushTimer.setSingleShot(True)
+        self.__flushTimer.setInterval(0)
+        self.__flushTimer.timeout.connect(self.flush)
+        # windows torn down by deleteUI never see a closeEvent
+        self.destroyed.connect(self.source.disconnect)
+
+    def start(self):
+        if self.__connected:
+            return
+        self.source.connect(self)
+        self.__connected = True
+
+    def stop(self):
+        if not self.__connected:
+            return
+        self.__flushTimer.stop()
+        self.source.disconnect()
+        self.__connected = False
+        self.__pending = SceneChanges()
+
+    def isRunning(self):
+        return self.__connected
+
+    def watch(self, paths):
+        if self.__connected:
+            self.source.watch(paths)
+
+    def nodeAdded(self, path):
+        self.__pending.added.add(path)
+        self.__pending.removed.discard(path)
+        self.__schedule()
+
+    def nodeRemoved(self, path):
+        self.__pending.removed.add(path)
+        self.__pending.added.discard(path)
+        self.__pending.attributes.pop(path, None)
+        self.__schedule()
+
+    def nodeRenamed(self, previousPath, path):
+        self.__pending.renamed.add(path)
+        self.__schedule()
+
+    def nodeReparented(self, path):
+        self.__pending.reparented.add(path)
+        self.__schedule()
+
+    def attributeChanged(self, path, attribute):
+        self.__pending.attributes.setdefault(path, set()).add(attribute)
+        self.__schedule()
+
+    def selectionChanged(self):
+        self.__pending.selection = True
+        self.__schedule()
+
+    def flush(self):
+        self.__flushTimer.stop()
+        changes = self.__pending
+        if not changes:
+            return
+        self.__pending = SceneChanges()
+
+        if changes.structural:
+            self.generation += 1
+            if changes.removed:
+                self.source.unwatch(changes.removed)
+        self.changed.emit(changes)
+
+    def __schedule(self):
+        if not self.__flushTimer.isActive():
+            self.__flushTimer.start()
@@ -0,0 +1,113 @@
+import contextlib
+
+from PySide2 import QtCore
+
+from maya import cmds
+
+import LightTableModel as LTM
+import Profiler as PRF
+
+
+class SelectionSync(QtCore.QObject):
+    """Keeps the light list selection and the scene selection in step, one bulk update each way.
+
+    List to scene is a single cmds.select of the selected paths. Scene to list maps the selected paths to
+    rows and selects them as ranges of consecutive rows in a single QItemSelection. Only selections the user
+    makes are sent to the scene, rows deselected by filtering or removed by a refresh are not.
+    """
+
+    def __init__(self, view, model, proxy, parent=None):
+        # type: (QtWidgets.QTableView, LTM.LightTableModel, LTM.LightFilterProxyModel, QtCore.QObject) -> None
+        super(SelectionSync, self).__init__(parent)
+        self.view = view
+        self.model = model
+        self.proxy = proxy
+        self.enabled = True
+
+        # set while a sync is being applied, the change it causes must not be synced back
+        self.__syncing = False
+        # what the list last sent to the scene, its SelectionChanged event arrives a tick later
+        self.__sent = None
+
+        self.view.selectionModel().selectionChanged.connect(self.listSelectionChanged)
+
+    def setEnabled(self, enabled):
+        self.enabled = enabled
+        self.__sent = None
+
+    @contextlib.contextmanager
+    def suspended(self):
+        """Selection changes made inside, by filtering or updating the models, are not sent to the scene."""
+        syncing = self.__syncing
+        self.__syncing = True
+        try:
+            yield
+        finally:
+            self.__syncing = syncing
+
+    def listSelectionChanged(self, *args):
+        if self.__syncing or not self.enabled:
+            return
+        with PRF.span("SelectionSync.toScene"):
+            paths = []
+            for index in self.view.selectionModel().selectedRows(LTM.LightTableModel.NameColumn):
+                record = self.model.row(self.proxy.mapToSource(index).row())
+                # preset only lights are not in the scene
+                if record.shape:
+                    paths.append(record.path)
+
+            self.__sent = frozenset(paths)
+            self.__syncing = True
+            try:
+                if paths:
+                    cmds.select(paths, replace=True)
+                else:
+                    cmds.select(clear=True)
+                PRF.count("mayaCalls")
+            finally:
+                self.__syncing = False
+
+    def sceneSelectionChanged(self):
+        if self.__syncing or not self.enabled:
+            return
+        with PRF.span("SelectionSync.toList"):
+            selected = cmds.ls(selection=True, long=True) or []
+            PRF.count("mayaCalls")
+            if self.__sent is not None and self.__sent == frozenset(selected):
+                # the echo of the list's own selection
+                self.__sent = None
+                return
+            self.__sent = None
+
+            proxyRows = []
+            for row in self.sourceRows(selected):
+                proxyRow = self.proxy.mapFromSource(self.model.index(row, 0)).row()
+                # rows hidden by the filter stay unselected
+                if proxyRow >= 0:
+                    proxyRows.append(proxyRow)
+            proxyRows.sort()
+
+            selection = QtCore.QItemSelection()
+            lastColumn = self.proxy.columnCount() - 1
+            for first, last in LTM.rowRanges(proxyRows):
+                selection.select(self.proxy.index(first, 0), self.proxy.index(last, lastColumn))
+
+            self.__syncing = True
+            try:
+                self.view.selectionModel().select(selection, QtCore.QItemSelectionModel.ClearAndSelect)
+            finally:
+                self.__syncing = False
+
+    def sourceRows(self, paths):
+        # type: (list) -> set
+        rows = set()
+        for path in paths:
+            row = self.model.rowForPath(path)
+            if row < 0:
+                # a selected light shape stands for the row of its transform
+                row = self.model.rowForPath(path.rsplit("|", 1)[0])
+                if row >= 0 and self.model.row(row).shape != path:
+                    row = -1
+            if row >= 0:
+                rows.add(row)
+        return rows
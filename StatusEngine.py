@@ -0,0 +1,262 @@
+import LightStatus as LS
+import Profiler as PRF
+
+# importing numpy is a noticeable part of opening the tool, it is only imported once lights are compared
+numpy = None
+numpyImported = False
+
+
+def importNumpy():
+    global numpy, numpyImported
+    if not numpyImported:
+        numpyImported = True
+        try:
+            import numpy as numpyModule
+            numpy = numpyModule
+        except ImportError:
+            numpy = None
+    return numpy
+
+
+numberTypes = (int, float)
+try:
+    numberTypes += (long,)
+except NameError:
+    pass
+
+
+def isNumber(value):
+    return isinstance(value, numberTypes)
+
+
+def contentRow(attributes, values):
+    # type: (list, dict) -> tuple
+    row = tuple(map(values.get, attributes))
+    try:
+        hash(row)
+    except TypeError:
+        row = tuple(tuple(value) if isinstance(value, list) else value for value in row)
+    return row
+
+
+def contentHash(attributes, values):
+    # type: (list, dict) -> int
+    return hash(contentRow(attributes, values))
+
+
+class StatusEngine:
+    def __init__(self, reader, relativeTolerance=1e-5, absoluteTolerance=1e-6):
+        # reader(nodes, attributesPerNode) -> [{attribute: value}, ...], see SceneQuery.readAttributes
+        self.reader = reader
+        self.relativeTolerance = relativeTolerance
+        self.absoluteTolerance = absoluteTolerance
+
+        self.__preset = {}
+        # sorted attributes and content rows of dict presets, lazy presets decode through their own bounded cache
+        self.__keepsRows = True
+        self.__presetAttributes = {}
+        self.__presetRows = {}
+        self.__statuses = {}
+        self.__differences = {}
+        self.__dirty = set()
+        self.__allDirty = True
+
+    def setPreset(self, preset):
+        # type: (dict) -> None
+        self.__preset = preset if preset is not None else {}
+        self.__keepsRows = isinstance(self.__preset, dict)
+        self.__presetAttributes = {}
+        self.__presetRows = {}
+        self.markAllDirty()
+
+    def updatePreset(self, lights):
+        # lights were added to or replaced in the preset given to setPreset
+        for light in lights:
+            self.__presetAttributes.pop(light, None)
+            self.__presetRows.pop(light, None)
+        self.markDirty(lights)
+
+    def markDirty(self, paths):
+        self.__dirty.update(paths)
+
+    def markAllDirty(self):
+        self.__allDirty = True
+        self.__dirty.clear()
+
+    def isAllDirty(self):
+        return self.__allDirty
+
+    def dirty(self):
+        return set(self.__dirty)
+
+    def compares(self, path, attributes):
+        # type: (str, iter) -> bool
+        """Whether a change to attributes of the preset light path can change its status.
+
+        Plugs count for their compound and the compound for its children, colorR for color and back.
+        """
+        compared = self.__attributes(path)
+        return any(attribute.startswith(name) or name.startswith(attribute)
+                   for attribute in attributes for name in compared)
+
+    def status(self, path):
+        # type: (str) -> int
+        return self.__statuses.get(path, LS.LightStatus.Undefined)
+
+    def differences(self, path):
+        # type: (str) -> tuple
+        return self.__differences.get(path, ())
+
+    def classify(self, paths, shapes):
+        # type: (list, list) -> dict
+        """Classifies the scene lights paths[i] (attributes read from shapes[i]) and every preset light.
+
+        Only lights that are new or were marked dirty since the last pass are compared again.
+        """
+        with PRF.span("StatusEngine.classify"):
+            preset = self.__preset
+            statuses = self.__statuses
+            inScene = set(paths)
+
+            for path in [path for path in statuses if path not in inScene]:
+                del statuses[path]
+                self.__differences.pop(path, None)
+
+            compare = []
+            for path, shape in zip(paths, shapes):
+                if not self.__allDirty and path in statuses and path not in self.__dirty:
+                    continue
+                if path not in preset:
+                    statuses[path] = LS.LightStatus.Add
+                    self.__differences.pop(path, None)
+                    continue
+                compare.append((path, shape))
+            PRF.count("lightsClassified", len(compare))
+
+            if compare:
+                self.__compare(compare)
+
+            for path in preset:
+                if path not in inScene:
+                    statuses[path] = LS.LightStatus.Missing
+
+            self.__dirty.clear()
+            self.__allDirty = False
+            return statuses
+
+    def classifyDirty(self, shapes):
+        # type: (dict) -> dict
+        """Classifies only the lights marked dirty, shapes maps scene light paths to their shapes.
+
+        Returns {path: status} of the dirty lights in the scene. Needs a full classify after setPreset.
+        """
+        with PRF.span("StatusEngine.classifyDirty"):
+            lights = []
+            for path in self.__dirty:
+                shape = shapes.get(path)
+                if shape is None:
+                    continue
+                if path not in self.__preset:
+                    self.__statuses[path] = LS.LightStatus.Add
+                    self.__differences.pop(path, None)
+                    continue
+                lights.append((path, shape))
+            PRF.count("lightsClassified", len(lights))
+            if lights:
+                self.__compare(lights)
+
+            statuses = dict((path, self.__statuses[path]) for path in self.__dirty if path in shapes)
+            self.__dirty.clear()
+            return statuses
+
+    def __attributes(self, path):
+        attributes = self.__presetAttributes.get(path)
+        if attributes is None:
+            attributes = sorted(attribute for attribute in self.__preset[path] if attribute != "Type")
+            if self.__keepsRows:
+                self.__presetAttributes[path] = attributes
+        return attributes
+
+    def __presetContent(self, path):
+        content = self.__presetRows.get(path)
+        if content is None:
+            row = contentRow(self.__attributes(path), self.__preset[path])
+            content = (hash(row), row)
+            if self.__keepsRows:
+                self.__presetRows[path] = content
+        return content
+
+    def __compare(self, lights):
+        attributes = [self.__attributes(path) for path, shape in lights]
+        sceneValues = self.reader([shape for path, shape in lights], attributes)
+
+        # fast path, identical content, the hash rejects most changed lights without a tuple compare
+        slow = []
+        for i, (path, shape) in enumerate(lights):
+            row = contentRow(attributes[i], sceneValues[i])
+            presetHash, presetRow = self.__presetContent(path)
+            if hash(row) == presetHash and row == presetRow:
+                self.__statuses[path] = LS.LightStatus.Found
+                self.__differences.pop(path, None)
+            else:
+                slow.append(i)
+        PRF.count("lightsCompared", len(slow))
+        if not slow:
+            return
+
+        # flatten every numeric value of the remaining lights into two parallel columns
+        owners = []
+        sceneColumn = []
+        presetColumn = []
+        differences = dict((i, set()) for i in slow)
+        for i in slow:
+            path = lights[i][0]
+            presetValues = self.__preset[path]
+            values = sceneValues[i]
+            for attribute in attributes[i]:
+                if attribute not in values:
+                    # the light has no such attribute, there is nothing to compare or write
+                    continue
+                sceneValue = values[attribute]
+                presetValue = presetValues[attribute]
+                if isNumber(sceneValue) and isNumber(presetValue):
+                    owners.append((i, attribute))
+                    sceneColumn.append(sceneValue)
+                    presetColumn.append(presetValue)
+                elif isinstance(sceneValue, (list, tuple)) and isinstance(presetValue, (list, tuple)) \
+                        and len(sceneValue) == len(presetValue) \
+                        and all(isNumber(item) for item in sceneValue) and all(isNumber(item) for item in presetValue):
+                    for sceneItem, presetItem in zip(sceneValue, presetValue):
+                        owners.append((i, attribute))
+                        sceneColumn.append(sceneItem)
+                        presetColumn.append(presetItem)
+                elif sceneValue != presetValue:
+                    differences[i].add(attribute)
+
+        for index in self.__mismatches(sceneColumn, presetColumn):
+            i, attribute = owners[index]
+            differences[i].add(attribute)
+
+        for i in slow:
+            path = lights[i][0]
+            if differences[i]:
+                self.__statuses[path] = LS.LightStatus.Outdated
+                self.__differences[path] = tuple(sorted(differences[i]))
+            else:
+                self.__statuses[path] = LS.LightStatus.Found
+                self.__differences.pop(path, None)
+
+    def __mismatches(self, sceneColumn, presetColumn):
+        # type: (list, list) -> list
+        if not sceneColumn:
+            return []
+        if importNumpy() is not None:
+            sceneArray = numpy.asarray(sceneColumn, dtype=numpy.float64)
+            presetArray = numpy.asarray(presetColumn, dtype=numpy.float64)
+            close = numpy.isclose(sceneArray, presetArray, self.relativeTolerance, self.absoluteTolerance)
+            return numpy.flatnonzero(~close).tolist()
+
+        relative = self.relativeTolerance
+        absolute = self.absoluteTolerance
+        return [i for i, (sceneValue, presetValue) in enumerate(zip(sceneColumn, presetColumn))
+                if abs(sceneValue - presetValue) > absolute + relative * abs(presetValue)]
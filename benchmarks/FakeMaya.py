@@ -0,0 +1,358 @@
+"""In-memory stand-in for the parts of maya.cmds the light lister uses.
+
+install() registers fake ``maya`` and ``maya.cmds`` modules, so the tool's modules can be
+imported and measured without a Maya session. Scenes round trip through a small text format,
+one node or attribute per line, which is what cmds.file opens and saves.
+"""
+import json
+import random
+import shlex
+import sys
+import tempfile
+import types
+import uuid as uuidModule
+
+
+lightTypes = ("spotLight", "pointLight", "directionalLight", "areaLight", "aiAreaLight", "VRayLightRectShape")
+baseAttributes = ("intensity", "colorR", "colorG", "colorB", "emitDiffuse", "emitSpecular", "decayRate",
+                  "coneAngle", "penumbraAngle", "dropoff")
+
+
+class FakeNode(object):
+    __slots__ = ("name", "type", "parent", "children", "attributes", "uuid")
+
+    def __init__(self, name, nodeType, parent=None):
+        self.name = name
+        self.type = nodeType
+        self.parent = parent
+        self.children = []
+        self.attributes = {}
+        self.uuid = str(uuidModule.uuid4()).upper()
+        if parent is not None:
+            parent.children.append(self)
+
+    @property
+    def path(self):
+        if self.parent is None:
+            return "|" + self.name
+        return self.parent.path + "|" + self.name
+
+    @property
+    def isLight(self):
+        return self.type in lightTypes
+
+
+class FakeScene(object):
+    def __init__(self):
+        self.nodes = {}
+        self.selection = []
+        self.fileName = ""
+        self.calls = 0
+
+    def add(self, name, nodeType, parent=None):
+        # type: (str, str, FakeNode) -> FakeNode
+        node = FakeNode(name, nodeType, parent)
+        self.nodes[node.path] = node
+        return node
+
+    def remove(self, path):
+        node = self.nodes.pop(path)
+        for child in list(node.children):
+            self.remove(child.path)
+        if node.parent is not None:
+            node.parent.children.remove(node)
+
+    def find(self, name):
+        # type: (str) -> FakeNode
+        node = self.nodes.get(name)
+        if node is not None:
+            return node
+        # short or partial names resolve by suffix, like Maya does for unique names
+        suffix = "|" + name.lstrip("|")
+        for path, node in self.nodes.items():
+            if path.endswith(suffix):
+                return node
+        raise ValueError("No object matches name: %s" % name)
+
+    def lights(self):
+        return [node for node in self.nodes.values() if node.isLight]
+
+    def save(self, fileName):
+        # type: (str) -> None
+        with open(fileName, "w") as sceneFile:
+            sceneFile.write("# FakeMaya scene\n")
+            # parents before children, so loading can resolve every parent path
+            for path in sorted(self.nodes, key=lambda path: path.count("|")):
+                node = self.nodes[path]
+                sceneFile.write("node\t%s\t%s\t%s\n" % (path, node.type, node.uuid))
+                for name, value in node.attributes.items():
+                    sceneFile.write("attr\t%s\t%s\t%s\n" % (path, name, json.dumps(value)))
+        self.fileName = fileName
+
+    @classmethod
+    def load(cls, fileName):
+        # type: (str) -> FakeScene
+        scene = cls()
+        with open(fileName) as sceneFile:
+            for line in sceneFile:
+                fields = line.rstrip("\n").split("\t")
+                if fields[0] == "node":
+                    path, nodeType, uuid = fields[1:4]
+                    parentPath, name = path.rsplit("|", 1)
+                    node = scene.add(name, nodeType, scene.nodes[parentPath] if parentPath else None)
+                    node.uuid = uuid
+                elif fields[0] == "attr":
+                    scene.nodes[fields[1]].attributes[fields[2]] = json.loads(fields[3])
+        scene.fileName = fileName
+        return scene
+
+    @classmethod
+    def generate(cls, lights, depth=3, attributes=20, seed=0):
+        # type: (int, int, int, int) -> FakeScene
+        generator = random.Random(seed)
+        scene = cls()
+        groupsPerLevel = max(1, int(round(lights ** (1.0 / max(depth, 1)) / 2)))
+        for i in range(lights):
+            parent = None
+            for level in range(depth):
+                groupName = "group%d_%d" % (level, generator.randrange(groupsPerLevel))
+                path = (parent.path if parent else "") + "|" + groupName
+                parent = scene.nodes.get(path) or scene.add(groupName, "transform", parent)
+            transform = scene.add("light%d" % i, "transform", parent)
+            shape = scene.add("light%dShape" % i, lightTypes[i % len(lightTypes)], transform)
+            for a in range(attributes):
+                name = baseAttributes[a] if a < len(baseAttributes) else "attr%d" % a
+                shape.attributes[name] = round(generator.uniform(0, 10), 3)
+        return scene
+
+
+class FakeCmds(types.ModuleType):
+    def __init__(self, scene):
+        super(FakeCmds, self).__init__("maya.cmds")
+        self.scene = scene
+        self.undoChunks = 0
+        self.warnings = []
+
+    def __node(self, name):
+        return self.scene.find(name)
+
+    def ls(self, *args, **kwargs):
+        self.scene.calls += 1
+        if kwargs.get("selection") or kwargs.get("sl"):
+            nodes = [self.__node(name) for name in self.scene.selection]
+        elif args:
+            names = args[0] if isinstance(args[0], (list, tuple)) else args
+            nodes = [self.__node(name) for name in names]
+        else:
+            nodes = list(self.scene.nodes.values())
+        if kwargs.get("lights"):
+            nodes = [node for node in nodes if node.isLight]
+        if "type" in kwargs:
+            nodes = [node for node in nodes if node.type == kwargs["type"]]
+        if kwargs.get("uuid"):
+            return [node.uuid for node in nodes]
+        long = kwargs.get("long") or kwargs.get("l")
+        result = []
+        for node in nodes:
+            result.append(node.path if long else node.name)
+            if kwargs.get("showType"):
+                result.append(node.type)
+        return result
+
+    def listRelatives(self, *args, **kwargs):
+        self.scene.calls += 1
+        names = args[0] if args and isinstance(args[0], (list, tuple)) else args
+        fullPath = kwargs.get("fullPath") or kwargs.get("f")
+        result = []
+        for name in names:
+            node = self.__node(name)
+            if kwargs.get("parent") or kwargs.get("p"):
+                relatives = [node.parent] if node.parent else []
+            else:
+                relatives = node.children
+            result.extend(relative.path if fullPath else relative.name for relative in relatives)
+        return result or None
+
+    def nodeType(self, name, **kwargs):
+        self.scene.calls += 1
+        return self.__node(name).type
+
+    def objExists(self, name):
+        try:
+            self.__node(name)
+        except ValueError:
+            return False
+        return True
+
+    def __plug(self, plug):
+        name, attribute = plug.rsplit(".", 1)
+        node = self.__node(name)
+        if node.type == "transform" and attribute not in node.attributes and node.children:
+            node = node.children[0]
+        return node, attribute
+
+    def getAttr(self, plug, **kwargs):
+        self.scene.calls += 1
+        node, attribute = self.__plug(plug)
+        if kwargs.get("type"):
+            return type(node.attributes[attribute]).__name__
+        return node.attributes[attribute]
+
+    def setAttr(self, plug, *values, **kwargs):
+        self.scene.calls += 1
+        node, attribute = self.__plug(plug)
+        if attribute not in node.attributes:
+            raise RuntimeError("No object matches name: %s" % plug)
+        node.attributes[attribute] = values[0] if len(values) == 1 else list(values)
+
+    def listAttr(self, name=None, **kwargs):
+        self.scene.calls += 1
+        return list(self.__node(name).attributes)
+
+    def attributeInfo(self, **kwargs):
+        self.scene.calls += 1
+        for node in self.scene.nodes.values():
+            if node.type == kwargs.get("type"):
+                return list(node.attributes)
+        return []
+
+    def attributeQuery(self, attribute, **kwargs):
+        self.scene.calls += 1
+        if kwargs.get("niceName"):
+            return attribute[:1].upper() + "".join(" " + c if c.isupper() else c for c in attribute[1:])
+        if kwargs.get("shortName"):
+            return attribute[:3]
+        if kwargs.get("longName"):
+            return attribute
+        if kwargs.get("categories"):
+            return None
+        if kwargs.get("exists"):
+            return True
+        return None
+
+    def select(self, *args, **kwargs):
+        self.scene.calls += 1
+        if kwargs.get("clear"):
+            self.scene.selection = []
+            return
+        names = args[0] if args and isinstance(args[0], (list, tuple)) else list(args)
+        if kwargs.get("add"):
+            self.scene.selection.extend(names)
+        else:
+            self.scene.selection = list(names)
+
+    def undoInfo(self, **kwargs):
+        if kwargs.get("openChunk"):
+            self.undoChunks += 1
+        return None
+
+    def file(self, fileName=None, **kwargs):
+        if kwargs.get("query") or kwargs.get("q"):
+            return self.scene.fileName
+        if kwargs.get("new"):
+            self.scene = FakeScene()
+        elif kwargs.get("open") or kwargs.get("o"):
+            self.scene = FakeScene.load(fileName)
+        elif kwargs.get("rename"):
+            self.scene.fileName = kwargs["rename"]
+        elif kwargs.get("save") or kwargs.get("s"):
+            self.scene.save(self.scene.fileName)
+        return self.scene.fileName
+
+    def workspaceControl(self, name, **kwargs):
+        return False
+
+    def window(self, name, **kwargs):
+        return False
+
+    def deleteUI(self, *args, **kwargs):
+        pass
+
+    def warning(self, message):
+        self.warnings.append(message)
+
+    def internalVar(self, **kwargs):
+        return tempfile.gettempdir()
+
+    def optionVar(self, **kwargs):
+        return 0
+
+
+class FakeMel(types.ModuleType):
+    """maya.mel, only the setAttr statements SceneQuery.writeAttribute batches."""
+
+    def __init__(self):
+        super(FakeMel, self).__init__("maya.mel")
+
+    def eval(self, command):
+        cmds = sys.modules["maya.cmds"]
+        cmds.scene.calls += 1
+        for statement in command.split(";"):
+            words = shlex.split(statement)
+            if not words:
+                continue
+            if words[0] != "setAttr":
+                raise RuntimeError("FakeMel only runs setAttr: %s" % statement)
+            values = [float(word) if "." in word or "e" in word else int(word) for word in words[2:]]
+            # one statement, not one call, like the real mel.eval
+            cmds.scene.calls -= 1
+            cmds.setAttr(words[1], *values)
+
+
+class MayaQWidgetDockableMixin(object):
+    """Stand-in for maya.app.general.mayaMixin, the window is shown undocked."""
+
+    def show(self, dockable=False, retain=True, **kwargs):
+        super(MayaQWidgetDockableMixin, self).show()
+
+    def dockCloseEventTriggered(self):
+        pass
+
+
+class MQtUtil(object):
+    @staticmethod
+    def mainWindow():
+        return 0
+
+
+def install(scene=None):
+    # type: (FakeScene) -> FakeCmds
+    """Registers the fake maya modules. Installed again, only the scene is swapped, as setScene does.
+
+    Modules that imported maya.cmds keep the one they got, forked BatchApply workers install it once more.
+    """
+    if scene is None:
+        scene = FakeScene()
+    if isinstance(sys.modules.get("maya.cmds"), FakeCmds):
+        return setScene(scene)
+    cmds = FakeCmds(scene)
+    maya = sys.modules.get("maya")
+    if maya is None or not getattr(maya, "isFake", False):
+        maya = types.ModuleType("maya")
+        maya.isFake = True
+        sys.modules["maya"] = maya
+    maya.cmds = cmds
+    sys.modules["maya.cmds"] = cmds
+    maya.mel = FakeMel()
+    sys.modules["maya.mel"] = maya.mel
+
+    # enough of maya's ui modules for the window to import, see StartupProbe.py
+    openMayaUI = types.ModuleType("maya.OpenMayaUI")
+    openMayaUI.MQtUtil = MQtUtil
+    mayaMixin = types.ModuleType("maya.app.general.mayaMixin")
+    mayaMixin.MayaQWidgetDockableMixin = MayaQWidgetDockableMixin
+    app = types.ModuleType("maya.app")
+    app.general = types.ModuleType("maya.app.general")
+    app.general.mayaMixin = mayaMixin
+    maya.OpenMayaUI = openMayaUI
+    maya.app = app
+    sys.modules.update({"maya.OpenMayaUI": openMayaUI, "maya.app": app, "maya.app.general": app.general,
+                        "maya.app.general.mayaMixin": mayaMixin})
+    return cmds
+
+
+def setScene(scene):
+    # type: (FakeScene) -> FakeCmds
+    cmds = sys.modules["maya.cmds"]
+    cmds.scene = scene
+    return cmds
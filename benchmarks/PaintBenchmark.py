@@ -0,0 +1,118 @@
+"""Paint throughput of the light list on a synthetic table.
+
+Run from the repository root, with mayapy or any Python that has PySide2:
+    python benchmarks/PaintBenchmark.py --rows 10000
+
+Outside Maya the in-memory FakeMaya stand-in is used and Qt defaults to the offscreen platform.
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+try:
+    import maya.cmds
+except ImportError:
+    maya = None
+if maya is None:
+    import FakeMaya
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    FakeMaya.install()
+
+from PySide2 import QtWidgets
+
+import LightStore as LSt
+import LightTableModel as LTM
+import QTableWidgetIcon as QTWI
+
+
+lightTypes = ("spotLight", "pointLight", "directionalLight", "areaLight", "ambientLight", "volumeLight")
+
+
+def syntheticStore(rows):
+    # type: (int) -> LSt.LightStore
+    store = LSt.LightStore()
+    for i in range(rows):
+        path = "|group%d|light%d" % (i // 100, i)
+        store.add(path, path + "|light%dShape" % i, lightTypes[i % len(lightTypes)], "uuid%d" % i, i % 5)
+    return store
+
+
+def buildView(store):
+    model = LTM.LightTableModel()
+    model.setStore(store)
+    proxy = LTM.LightFilterProxyModel()
+    proxy.setSourceModel(model)
+    proxy.updateIndex(store)
+
+    view = QtWidgets.QTableView()
+    view.setModel(proxy)
+    view.setSelectionMode(QtWidgets.QAbstractItemView.ExtendedSelection)
+    view.setSelectionBehavior(QtWidgets.QAbstractItemView.SelectRows)
+    view.verticalHeader().hide()
+    view.verticalHeader().setSectionResizeMode(QtWidgets.QHeaderView.Fixed)
+    view.verticalHeader().setDefaultSectionSize(24)
+    view.setItemDelegateForColumn(LTM.LightTableModel.TypeColumn, QTWI.QTableWidgetIconDelegate(view))
+    view.setItemDelegateForColumn(LTM.LightTableModel.StatusColumn, QTWI.QTableWidgetIconDelegate(view))
+    view.setColumnWidth(0, 35)
+    view.setColumnWidth(1, 400)
+    view.setColumnWidth(2, 35)
+    view.resize(600, 550)
+    view.show()
+    QtWidgets.QApplication.processEvents()
+    # keep the models alive as long as the view
+    view.lightModel = model
+    view.lightProxy = proxy
+    return view
+
+
+def scrollThrough(view, frames):
+    # type: (QtWidgets.QTableView, int) -> float
+    scrollBar = view.verticalScrollBar()
+    step = max(1, scrollBar.maximum() // frames)
+    start = time.time()
+    painted = 0
+    for value in range(0, scrollBar.maximum() + 1, step):
+        scrollBar.setValue(value)
+        view.viewport().repaint()
+        painted += 1
+    elapsed = time.time() - start
+    return painted / elapsed if elapsed else float("inf")
+
+
+def run(rows, frames):
+    view = buildView(syntheticStore(rows))
+    results = {"rows": rows, "scrollFps": scrollThrough(view, frames)}
+
+    start = time.time()
+    view.selectAll()
+    view.viewport().repaint()
+    results["selectAllSeconds"] = time.time() - start
+    results["selectedScrollFps"] = scrollThrough(view, frames)
+    view.close()
+    return results
+
+
+# kept referenced for the whole run, Qt tears a collected application down
+application = None
+
+
+def main(arguments=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--frames", type=int, default=300)
+    options = parser.parse_args(arguments)
+
+    global application
+    application = QtWidgets.QApplication.instance() or QtWidgets.QApplication(sys.argv)
+    results = run(options.rows, options.frames)
+    print("rows: %(rows)d  scroll: %(scrollFps).1f fps  select all: %(selectAllSeconds).3f s  "
+          "selected scroll: %(selectedScrollFps).1f fps" % results)
+    return results
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,262 @@
+"""Headless light lister benchmarks against an in-memory scene.
+
+    python benchmarks/RunBenchmarks.py --sizes 100 1000 10000 50000 --output results.json
+    python benchmarks/RunBenchmarks.py --compare results.json
+
+Qt benchmarks run on the offscreen platform and are skipped when PySide2 is not importable. Window
+startup is measured by benchmarks/StartupProbe.py, in a new interpreter for every run.
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, root)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+import FakeMaya
+
+cmds = FakeMaya.install()
+
+import JSonUtils as JSU
+import LightFilter as LF
+import LightLister as LL
+
+try:
+    from PySide2 import QtCore, QtWidgets
+except ImportError:
+    QtCore = QtWidgets = None
+
+
+def statistics(timings):
+    # type: (list) -> dict
+    timings = sorted(timings)
+    return {"min": timings[0], "median": timings[len(timings) // 2], "max": timings[-1]}
+
+
+def measure(function, repeat):
+    # type: (callable, int) -> dict
+    timings = []
+    for i in range(repeat):
+        start = time.time()
+        function()
+        timings.append(time.time() - start)
+    return statistics(timings)
+
+
+def presetData(scene):
+    data = {}
+    for node in scene.lights():
+        attributes = dict(node.attributes)
+        attributes["Type"] = node.type
+        data[node.parent.path] = attributes
+    return data
+
+
+def benchmarkScene(size, depth, attributes, repeat):
+    scene = FakeMaya.FakeScene.generate(size, depth, attributes)
+    FakeMaya.setScene(scene)
+    results = {}
+    logic = LL.LightLister()
+
+    def coldGetLights():
+        logic.invalidate()
+        logic.getLights()
+    results["getLights.cold"] = measure(coldGetLights, repeat)
+    results["getLights.warm"] = measure(logic.getLights, repeat)
+
+    store = logic.getLights()
+    searchIndex = LF.LightSearchIndex()
+    results["filter.indexBuild"] = measure(lambda: LF.LightSearchIndex().update(store), repeat)
+    searchIndex.update(store)
+
+    def typing():
+        for text in ("l", "li", "lig", "ligh", "light", "light1", "light12", "type:spot light1"):
+            searchIndex.query(text)
+    results["filter.typing"] = measure(typing, repeat)
+
+    if QtWidgets is not None:
+        results.update(benchmarkQt(logic, repeat))
+        results.update(benchmarkStartup(size, repeat))
+
+    results.update(benchmarkPreset(scene, logic, repeat))
+    return results
+
+
+def benchmarkQt(logic, repeat):
+    import LightTableModel as LTM
+
+    results = {}
+    store = logic.getLights()
+
+    def populate():
+        model = LTM.LightTableModel()
+        model.setStore(store)
+    results["table.populate"] = measure(populate, repeat)
+
+    model = LTM.LightTableModel()
+    proxy = LTM.LightFilterProxyModel()
+    proxy.setSourceModel(model)
+    proxy.updateIndex(store)
+    model.setStore(store)
+
+    def refresh():
+        logic.invalidate()
+        model.updateStore(logic.getLights())
+    results["table.refreshUnchanged"] = measure(refresh, repeat)
+
+    def filtering():
+        for text in ("l", "li", "lig", "light1", "type:spot", ""):
+            proxy.setFilterText(text)
+    results["table.filter"] = measure(filtering, repeat)
+
+    def sorting():
+        for column in (LTM.LightTableModel.TypeColumn, LTM.LightTableModel.StatusColumn,
+                       LTM.LightTableModel.NameColumn):
+            proxy.sort(column, QtCore.Qt.AscendingOrder)
+    results["table.sort"] = measure(sorting, repeat)
+    return results
+
+
+def benchmarkStartup(size, repeat):
+    # a fresh interpreter per run, so imports count as they do when the tool is opened
+    probe = os.path.join(os.path.dirname(os.path.abspath(__file__)), "StartupProbe.py")
+    runs = []
+    for i in range(repeat):
+        output = subprocess.check_output([sys.executable, probe, str(size)])
+        runs.append(json.loads(output.decode().strip().splitlines()[-1]))
+
+    results = {}
+    for name in ("import", "construct", "show", "populated", "total"):
+        timings = [run[name] for run in runs if name in run]
+        if timings:
+            results["startup." + name] = statistics(timings)
+    return results
+
+
+def benchmarkPreset(scene, logic, repeat):
+    results = {}
+    data = presetData(scene)
+    utils = JSU.JSonUtils()
+    fileName = os.path.join(tempfile.mkdtemp(), "benchmark.lightpreset")
+
+    results["preset.save"] = measure(lambda: utils.save(data, fileName), repeat)
+    results["preset.load"] = measure(lambda: utils.load(fileName), repeat)
+
+    def diff():
+        logic.loadedData = data
+        logic.getLights()
+    results["preset.diff"] = measure(diff, repeat)
+
+    if JSU.isPreset(fileName):
+        results["preset.lazyOpen"] = measure(lambda: utils.open(fileName).close(), repeat)
+        lazyPreset = utils.open(fileName)
+
+        def lazyDiff():
+            logic.loadedData = lazyPreset
+            logic.getLights()
+        results["preset.lazyDiff"] = measure(lazyDiff, repeat)
+        lazyPreset.close()
+
+    # every twentieth light drifts away from the preset
+    for i, node in enumerate(scene.lights()):
+        if i % 20 == 0:
+            name = next(iter(node.attributes))
+            node.attributes[name] += 1.0
+    logic.loadedData = data
+    scene.calls = 0
+
+    def classifyAll():
+        logic.statusEngine.markAllDirty()
+        logic.statusGeneration += 1
+        logic.getLights()
+    results["status.classifyAll"] = measure(classifyAll, repeat)
+
+    dirty = [node.path for i, node in enumerate(scene.lights()) if i % 100 == 0]
+
+    def classifyDirty():
+        logic.markDirty(dirty)
+        logic.getLights()
+    results["status.classifyDirty"] = measure(classifyDirty, repeat)
+    logic.loadedData = {}
+    return results
+
+
+def gitRevision():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=root).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+def compare(current, baseline, threshold):
+    # type: (dict, dict, float) -> list
+    regressions = []
+    baselineRuns = dict((run["size"], run["results"]) for run in baseline["runs"])
+    for run in current["runs"]:
+        previous = baselineRuns.get(run["size"])
+        if previous is None:
+            continue
+        for name, timing in sorted(run["results"].items()):
+            if not isinstance(timing, dict) or not isinstance(previous.get(name), dict):
+                continue
+            before = previous[name]["median"]
+            ratio = timing["median"] / before if before else 1.0
+            flag = ""
+            if ratio > 1.0 + threshold:
+                flag = "  REGRESSION"
+                regressions.append((run["size"], name, ratio))
+            print("%7d %-28s %10.4f -> %10.4f s  x%.2f%s" % (run["size"], name, before, timing["median"], ratio, flag))
+    return regressions
+
+
+# kept referenced for the whole run, Qt tears a collected application down
+application = None
+
+
+def main(arguments=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000, 50000])
+    parser.add_argument("--depth", type=int, default=3)
+    parser.add_argument("--attributes", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", help="write the results as json")
+    parser.add_argument("--compare", help="baseline results json to compare against")
+    parser.add_argument("--threshold", type=float, default=0.2, help="slowdown ratio flagged as a regression")
+    options = parser.parse_args(arguments)
+
+    global application
+    if QtWidgets is not None:
+        application = QtWidgets.QApplication.instance() or QtWidgets.QApplication(sys.argv)
+
+    current = {"revision": gitRevision(), "python": platform.python_version(), "time": time.time(),
+               "qt": QtWidgets is not None, "depth": options.depth, "attributes": options.attributes, "runs": []}
+    for size in options.sizes:
+        results = benchmarkScene(size, options.depth, options.attributes, options.repeat)
+        current["runs"].append({"size": size, "results": results})
+        for name, timing in sorted(results.items()):
+            if isinstance(timing, dict):
+                print("%7d %-28s %10.4f s" % (size, name, timing["median"]))
+            else:
+                print("%7d %-28s %s" % (size, name, timing))
+
+    if options.output:
+        with open(options.output, "w") as outputFile:
+            json.dump(current, outputFile, indent=2, sort_keys=True)
+
+    if options.compare:
+        with open(options.compare) as baselineFile:
+            baseline = json.load(baselineFile)
+        if compare(current, baseline, options.threshold):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
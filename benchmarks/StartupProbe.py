@@ -0,0 +1,62 @@
+"""Opens the light lister window once against a generated scene and prints its startup times as json.
+
+    python benchmarks/StartupProbe.py 10000
+
+RunBenchmarks starts a fresh interpreter for every measurement, so the module imports are part of it.
+"""
+import json
+import os
+import sys
+import time
+
+started = time.time()
+root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, root)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+import FakeMaya
+
+
+class NullSource(object):
+    """Scene callback source that never fires, maya.api.OpenMaya is not available here."""
+
+    def connect(self, watcher):
+        pass
+
+    def disconnect(self, *args):
+        pass
+
+    def watch(self, paths):
+        pass
+
+    def unwatch(self, paths):
+        pass
+
+
+def main(arguments=None):
+    arguments = sys.argv[1:] if arguments is None else arguments
+    size = int(arguments[0]) if arguments else 1000
+    FakeMaya.install(FakeMaya.FakeScene.generate(size))
+
+    from PySide2 import QtWidgets
+    application = QtWidgets.QApplication.instance() or QtWidgets.QApplication(sys.argv)
+    applicationTime = time.time() - started
+
+    import SceneWatcher as SW
+    import LightListerWindow as LLW
+
+    host = QtWidgets.QMainWindow()
+    window = LLW.show(parent=host, sceneWatcher=SW.SceneWatcher(NullSource()))
+    while not window.populated:
+        application.processEvents()
+
+    times = dict(window.startupTimes)
+    times["application"] = applicationTime
+    times["total"] = time.time() - started
+    print(json.dumps(times))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
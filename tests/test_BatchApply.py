@@ -0,0 +1,77 @@
+"""BatchApply runs with --fake, worker processes apply a preset to FakeMaya scene files."""
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, root)
+sys.path.insert(0, os.path.join(root, "benchmarks"))
+
+import FakeMaya
+
+FakeMaya.install()
+
+import BatchApply
+import JSonUtils as JSU
+
+
+class BatchApplyTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.scenes = []
+        for i in range(2):
+            scene = FakeMaya.FakeScene.generate(8, attributes=4, seed=i)
+            fileName = os.path.join(self.directory, "shot%d.fma" % i)
+            scene.save(fileName)
+            self.scenes.append(fileName)
+
+        # the preset differs from every scene on the intensity of its first three lights
+        lights = sorted(FakeMaya.FakeScene.load(self.scenes[0]).lights(), key=lambda node: node.path)
+        preset = {}
+        for i, shape in enumerate(lights):
+            record = dict((name, shape.attributes[name]) for name in FakeMaya.baseAttributes[:4])
+            record["Type"] = shape.type
+            if i < 3:
+                record["intensity"] = 100.0 + i
+            preset[shape.parent.path] = record
+        self.preset = os.path.join(self.directory, "preset.lightpreset")
+        JSU.JSonUtils().save(preset, self.preset)
+        self.expected = preset
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def batch(self, scenes, **kwargs):
+        results = BatchApply.runBatch(self.preset, scenes, processes=1, fake=True, **kwargs)
+        for result in results:
+            self.assertTrue(result["ok"], result["error"])
+        return dict((os.path.basename(result["scene"]), result) for result in results)
+
+    def testDryRunPlansWithoutSaving(self):
+        before = [open(fileName).read() for fileName in self.scenes]
+        results = self.batch(self.scenes, dryRun=True)
+        self.assertEqual(results["shot0.fma"]["writes"], 3)
+        self.assertEqual(results["shot0.fma"]["attributes"], {"intensity": 3})
+        self.assertGreater(results["shot1.fma"]["writes"], 3)
+        self.assertEqual([open(fileName).read() for fileName in self.scenes], before)
+
+    def testAppliedScenesMatchThePreset(self):
+        outputDir = os.path.join(self.directory, "out")
+        results = self.batch(self.scenes[:1], outputDir=outputDir)
+        self.assertEqual(results["shot0.fma"]["writes"], 3)
+        self.assertEqual(results["shot0.fma"]["failedWrites"], [])
+
+        applied = FakeMaya.FakeScene.load(os.path.join(outputDir, "shot0.fma"))
+        for light, record in self.expected.items():
+            shape = applied.nodes[light].children[0]
+            self.assertEqual(shape.attributes["intensity"], record["intensity"], light)
+
+        results = BatchApply.runBatch(self.preset, [os.path.join(outputDir, "shot0.fma")], processes=1,
+                                      dryRun=True, fake=True)
+        self.assertEqual(results[0]["writes"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,97 @@
+"""Preset files in every compress and binary mode, appended to, compacted and read lazily."""
+import itertools
+import json
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import JSonUtils as JSU
+
+
+def presetData(count=20):
+    data = {}
+    for i in range(count):
+        data["|group|light%d" % i] = {"Type": "pointLight", "intensity": i * 0.5, "decayRate": i % 3,
+                                       "emitDiffuse": bool(i % 2), "color": [0.1 * i, 0.5, 1.0],
+                                       "label": u"light \u00e9 %d" % i}
+    return data
+
+
+class PresetFileTest(unittest.TestCase):
+    modes = list(itertools.product((False, True), (False, True)))
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def fileName(self, compress, binary):
+        return os.path.join(self.directory, "c%d_b%d.lightpreset" % (compress, binary))
+
+    def testSaveAndLoad(self):
+        data = presetData()
+        for compress, binary in self.modes:
+            fileName = self.fileName(compress, binary)
+            JSU.JSonUtils(compress, binary).save(data, fileName)
+            self.assertTrue(JSU.isPreset(fileName))
+            self.assertEqual(JSU.JSonUtils().load(fileName), data, (compress, binary))
+            lights = ["|group|light3", "|group|light7"]
+            self.assertEqual(JSU.JSonUtils().load(fileName, lights), dict((light, data[light]) for light in lights))
+
+    def testAppendAndCompact(self):
+        data = presetData()
+        for compress, binary in self.modes:
+            fileName = self.fileName(compress, binary)
+            JSU.JSonUtils(compress, binary).save(data, fileName)
+            with JSU.PresetWriter(fileName, append=True) as writer:
+                writer.write("|group|light0", dict(data["|group|light0"], intensity=42.0))
+                writer.write("|new", {"Type": "spotLight", "intensity": 1.0})
+                writer.remove("|group|light1")
+                self.assertGreater(writer.garbage, 0)
+            expected = dict(data)
+            expected["|group|light0"] = dict(data["|group|light0"], intensity=42.0)
+            expected["|new"] = {"Type": "spotLight", "intensity": 1.0}
+            del expected["|group|light1"]
+            self.assertEqual(JSU.JSonUtils().load(fileName), expected, (compress, binary))
+
+            size = os.path.getsize(fileName)
+            JSU.JSonUtils().compact(fileName)
+            self.assertLess(os.path.getsize(fileName), size)
+            self.assertEqual(JSU.JSonUtils().load(fileName), expected, (compress, binary))
+            with JSU.PresetReader(fileName) as reader:
+                self.assertEqual(reader.flags, (JSU.Compressed if compress else 0) | (JSU.Binary if binary else 0))
+
+    def testLazyPresetDecodesOnAccess(self):
+        data = presetData(50)
+        fileName = self.fileName(True, True)
+        JSU.JSonUtils(True, True).save(data, fileName)
+        preset = JSU.JSonUtils().open(fileName, cacheSize=5)
+        try:
+            self.assertEqual(len(preset), 50)
+            self.assertEqual(preset.lightType("|group|light4"), "pointLight")
+            self.assertEqual(preset.cached(), 0)
+            for light in sorted(data):
+                self.assertEqual(preset[light], data[light])
+            self.assertEqual(preset.cached(), 5)
+            self.assertEqual(dict(preset.items()), data)
+            self.assertIsNone(preset.get("|missing"))
+        finally:
+            preset.close()
+
+    def testPlainJsonPresets(self):
+        data = presetData(5)
+        fileName = os.path.join(self.directory, "legacy.json")
+        with open(fileName, "w") as presetFile:
+            json.dump(data, presetFile)
+        self.assertFalse(JSU.isPreset(fileName))
+        self.assertEqual(JSU.JSonUtils().open(fileName), data)
+        self.assertRaises(JSU.PresetFormatError, JSU.PresetReader, fileName)
+
+
+if __name__ == "__main__":
+    unittest.main()
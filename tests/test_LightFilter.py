@@ -0,0 +1,79 @@
+"""LightFilterQuery parsing and narrowing, and LightSearchIndex queries over a LightStore."""
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import LightFilter as LF
+import LightStore as LSt
+
+
+def query(text, mode=LF.LightFilterQuery.Substring):
+    return LF.LightFilterQuery(text, mode)
+
+
+class LightFilterQueryTest(unittest.TestCase):
+    def testLongerSubstringNarrows(self):
+        self.assertTrue(query("keyl").narrows(query("key")))
+        self.assertTrue(query("key type:spot").narrows(query("ke type:sp")))
+        self.assertTrue(query("key fill").narrows(query("key")))
+
+    def testWiderQueriesDoNotNarrow(self):
+        self.assertFalse(query("key").narrows(None))
+        self.assertFalse(query("ke").narrows(query("key")))
+        self.assertFalse(query("key").narrows(query("key fill")))
+        self.assertFalse(query("key").narrows(query("key type:spot")))
+        self.assertFalse(query("key*").narrows(query("key*")))
+        regex = LF.LightFilterQuery.Regex
+        self.assertFalse(query("keyl", regex).narrows(query("key", regex)))
+
+    def testRegexKeepsItsCase(self):
+        kind, pattern = query(r"\D+", LF.LightFilterQuery.Regex).terms[0]
+        self.assertEqual(kind, LF.LightFilterQuery.Regex)
+        self.assertIsNone(pattern.search("123"))
+        self.assertIsNotNone(pattern.search("KEY"))
+
+    def testInvalidRegex(self):
+        invalid = query("key[", LF.LightFilterQuery.Regex)
+        self.assertFalse(invalid.valid)
+        self.assertEqual(invalid.terms, [(LF.LightFilterQuery.Substring, "key[")])
+
+
+class LightSearchIndexTest(unittest.TestCase):
+    def setUp(self):
+        self.store = LSt.LightStore()
+        for path, lightType in (("|set|keyLight", "spotLight"), ("|set|keyFill", "pointLight"),
+                                ("|set|rim2", "spotLight"), ("|props|lamp", "areaLight")):
+            self.store.add(path, path + "Shape", lightType)
+        self.index = LF.LightSearchIndex()
+        self.index.update(self.store)
+
+    def testQueries(self):
+        self.assertIsNone(self.index.query("  "))
+        self.assertEqual(self.index.query("KEY"), {"|set|keyLight", "|set|keyFill"})
+        self.assertEqual(self.index.query("set type:spot"), {"|set|keyLight", "|set|rim2"})
+        self.assertEqual(self.index.query("*2"), {"|set|rim2"})
+        self.assertEqual(self.index.query(r"rim\d", LF.LightFilterQuery.Regex), {"|set|rim2"})
+
+    def testNarrowedQueriesMatchFullOnes(self):
+        for text in ("k", "ke", "key", "keyl", "key", "k", "keyf"):
+            narrowed = self.index.query(text)
+            self.assertEqual(narrowed, self.fresh().query(text), text)
+
+    def testUpdateDropsRemovedLights(self):
+        self.index.query("k")
+        store = LSt.LightStore()
+        store.add("|set|keyFill", "|set|keyFillShape", "pointLight")
+        self.assertTrue(self.index.update(store))
+        self.assertFalse(self.index.update(store))
+        self.assertEqual(self.index.query("key"), {"|set|keyFill"})
+
+    def fresh(self):
+        index = LF.LightSearchIndex()
+        index.update(self.store)
+        return index
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,96 @@
+"""LightLister statuses against a preset, on the in-memory maya.cmds from benchmarks/FakeMaya.py."""
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, root)
+sys.path.insert(0, os.path.join(root, "benchmarks"))
+
+import FakeMaya
+
+FakeMaya.install()
+
+import JSonUtils as JSU
+import LightLister as LL
+import LightStatus as LS
+
+
+def scenePreset(logic):
+    # type: (LL.LightLister) -> dict
+    scene = logic.sceneQuery.lights()
+    attributes = [list(FakeMaya.baseAttributes[:4])] * len(scene.shapes)
+    preset = {}
+    for transform, lightType, values in zip(scene.transforms, scene.types,
+                                            logic.sceneQuery.readAttributes(scene.shapes, attributes)):
+        preset[transform] = dict(values, Type=lightType)
+    return preset
+
+
+class LightListerTest(unittest.TestCase):
+    def setUp(self):
+        self.cmds = FakeMaya.install(FakeMaya.FakeScene.generate(12, attributes=6))
+        self.logic = LL.LightLister()
+        self.preset = scenePreset(self.logic)
+
+    def statuses(self):
+        return dict((record.path, record.status) for record in self.logic.getLights())
+
+    def testWithoutPresetEveryLightIsFound(self):
+        statuses = self.statuses()
+        self.assertEqual(len(statuses), 12)
+        self.assertEqual(set(statuses.values()), {LS.LightStatus.Found})
+
+    def testStatusesAgainstTheLoadedPreset(self):
+        outdated, added = self.logic.lightTransforms[:2]
+        self.preset[outdated]["intensity"] += 1.0
+        del self.preset[added]
+        self.preset["|elsewhere|light"] = {"Type": "pointLight", "intensity": 1.0}
+        self.logic.loadedData = self.preset
+
+        statuses = self.statuses()
+        self.assertEqual(statuses[outdated], LS.LightStatus.Outdated)
+        self.assertEqual(statuses[added], LS.LightStatus.Add)
+        self.assertEqual(statuses["|elsewhere|light"], LS.LightStatus.Missing)
+        self.assertEqual(statuses[self.logic.lightTransforms[2]], LS.LightStatus.Found)
+        self.assertEqual(sorted(self.logic.changedLights()), sorted([outdated, added]))
+
+    def testAttributeChangesUpdateOnlyTheirLights(self):
+        self.logic.loadedData = self.preset
+        store = self.logic.getLights()
+        shape = self.logic.lightShapes[3]
+        self.cmds.setAttr(shape + ".intensity", 777.0)
+        self.logic.attributesChanged({shape: {"intensity"}})
+        self.assertIs(self.logic.getLights(), store)
+        self.assertEqual(self.statuses()[self.logic.lightTransforms[3]], LS.LightStatus.Outdated)
+
+        # attributes the preset does not hold change no status
+        self.cmds.setAttr(shape + ".intensity", self.preset[self.logic.lightTransforms[3]]["intensity"])
+        self.logic.attributesChanged({shape: {"attr5"}})
+        self.assertEqual(self.statuses()[self.logic.lightTransforms[3]], LS.LightStatus.Outdated)
+        self.logic.attributesChanged({shape: {"intensity"}})
+        self.assertEqual(self.statuses()[self.logic.lightTransforms[3]], LS.LightStatus.Found)
+
+    def testExtendingALazyPreset(self):
+        directory = tempfile.mkdtemp()
+        try:
+            fileName = os.path.join(directory, "preset.lightpreset")
+            JSU.JSonUtils().save(self.preset, fileName)
+            lazy = JSU.JSonUtils().open(fileName)
+            self.logic.loadedData = lazy
+            self.assertEqual(set(self.statuses().values()), {LS.LightStatus.Found})
+
+            light = self.logic.lightTransforms[0]
+            self.logic.extendLoadedData({light: dict(self.preset[light], intensity=-1.0)}, [self.logic.lightTransforms[1]])
+            statuses = self.statuses()
+            self.assertEqual(statuses[light], LS.LightStatus.Outdated)
+            self.assertEqual(statuses[self.logic.lightTransforms[1]], LS.LightStatus.Add)
+            lazy.close()
+        finally:
+            shutil.rmtree(directory)
+
+
+if __name__ == "__main__":
+    unittest.main()
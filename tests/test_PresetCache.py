@@ -0,0 +1,98 @@
+"""PresetCache validation against the file on disk, eviction and the recent list."""
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import PresetCache as PC
+
+
+class PresetCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.cache = PC.PresetCache(os.path.join(self.directory, "cache"))
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def preset(self, name, data):
+        fileName = os.path.join(self.directory, name)
+        with open(fileName, "w") as presetFile:
+            json.dump(data, presetFile)
+        return fileName
+
+    def testHit(self):
+        fileName = self.preset("a.json", {"|key": {"intensity": 1.0}})
+        self.assertIsNone(self.cache.get(fileName))
+        self.cache.put(fileName, {"|key": {"intensity": 1.0}})
+        self.assertEqual(self.cache.get(fileName), {"|key": {"intensity": 1.0}})
+        # a fresh instance reads the manifest
+        self.assertTrue(PC.PresetCache(self.cache.directory).isCurrent(fileName))
+
+    def testTouchedFileWithTheSameContentIsAHit(self):
+        fileName = self.preset("a.json", {"|key": {"intensity": 1.0}})
+        self.cache.put(fileName, {"|key": {"intensity": 1.0}})
+        stat = os.stat(fileName)
+        os.utime(fileName, (stat.st_atime, stat.st_mtime + 10))
+        self.assertTrue(self.cache.isCurrent(fileName))
+
+    def testChangedFileIsAMiss(self):
+        fileName = self.preset("a.json", {"|key": {"intensity": 1.0}})
+        self.cache.put(fileName, {"|key": {"intensity": 1.0}})
+        self.preset("a.json", {"|key": {"intensity": 2.0}})
+        stat = os.stat(fileName)
+        os.utime(fileName, (stat.st_atime, stat.st_mtime + 10))
+        self.assertFalse(self.cache.isCurrent(fileName))
+        self.assertIsNone(self.cache.get(fileName))
+
+    def testFileEditedWhileParsedIsAMiss(self):
+        fileName = self.preset("a.json", {"|key": {"intensity": 1.0}})
+        key = self.cache.fileKey(fileName)
+        self.preset("a.json", {"|key": {"intensity": 22.0}})
+        self.cache.put(fileName, {"|key": {"intensity": 1.0}}, key)
+        self.assertIsNone(self.cache.get(fileName))
+
+    def testCorruptEntryIsDropped(self):
+        fileName = self.preset("a.json", {"|key": {"intensity": 1.0}})
+        self.cache.put(fileName, {"|key": {"intensity": 1.0}})
+        for name in os.listdir(self.cache.directory):
+            if name.endswith(".pickle"):
+                with open(os.path.join(self.cache.directory, name), "wb") as entryFile:
+                    entryFile.write(b"not a pickle")
+        self.assertIsNone(self.cache.get(fileName))
+        self.assertEqual(self.cache.size(), 0)
+
+    def testLeastRecentlyUsedIsEvicted(self):
+        data = {"|key": {"intensity": 1.0, "label": "x" * 2000}}
+        names = [self.preset("%s.json" % name, data) for name in "abc"]
+        self.cache.put(names[0], data)
+        entrySize = self.cache.size()
+        self.cache.maxBytes = entrySize * 2
+        self.cache.put(names[1], data)
+        time.sleep(0.01)
+        self.cache.get(names[0])
+        self.cache.put(names[2], data)
+        self.assertTrue(self.cache.isCurrent(names[0]))
+        self.assertFalse(self.cache.isCurrent(names[1]))
+        self.assertTrue(self.cache.isCurrent(names[2]))
+        self.assertLessEqual(self.cache.size(), self.cache.maxBytes)
+
+    def testRecent(self):
+        self.cache.maxRecent = 2
+        names = [self.preset("%s.json" % name, {}) for name in "abc"]
+        for fileName in names:
+            self.cache.touch(fileName)
+        self.assertEqual(self.cache.recent(), [names[2], names[1]])
+        os.remove(names[2])
+        self.assertEqual(self.cache.recent(), [names[1]])
+        self.cache.clear()
+        self.assertEqual(self.cache.recent(), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
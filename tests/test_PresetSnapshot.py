@@ -0,0 +1,94 @@
+"""PresetSnapshot full and incremental writes, on the in-memory maya.cmds from benchmarks/FakeMaya.py."""
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, root)
+sys.path.insert(0, os.path.join(root, "benchmarks"))
+
+import FakeMaya
+
+FakeMaya.install()
+
+import JSonUtils as JSU
+import LightLister as LL
+import PresetSnapshot as PS
+
+
+class PresetSnapshotTest(unittest.TestCase):
+    def setUp(self):
+        self.cmds = FakeMaya.install(FakeMaya.FakeScene.generate(10, attributes=4))
+        self.directory = tempfile.mkdtemp()
+        self.fileName = os.path.join(self.directory, "snapshot.lightpreset")
+        self.logic = LL.LightLister()
+        self.snapshot = PS.PresetSnapshot(self.fileName, self.logic.sceneQuery)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def saved(self):
+        return JSU.JSonUtils().load(self.fileName)
+
+    def testFirstSnapshotWritesEveryLight(self):
+        written, removed = self.snapshot.snapshot()
+        self.assertEqual(sorted(written), sorted(self.logic.lightTransforms))
+        self.assertEqual(removed, [])
+        self.assertEqual(self.saved(), written)
+
+    def testOnlyChangedLightsAreWrittenAgain(self):
+        self.snapshot.snapshot()
+        self.assertEqual(self.snapshot.snapshot(), ({}, []))
+
+        shape, transform = self.logic.lightShapes[2], self.logic.lightTransforms[2]
+        self.snapshot.markDirty([self.logic.lightShapes[5]])
+        self.cmds.setAttr(shape + ".intensity", 555.0)
+        self.snapshot.markDirty([shape])
+        written, removed = self.snapshot.snapshot()
+        self.assertEqual(list(written), [transform])
+        self.assertEqual(self.saved()[transform]["intensity"], 555.0)
+
+    def testSeedKeepsEditsMadeAfterTheLoad(self):
+        self.snapshot.snapshot()
+        self.logic.loadedData = self.saved()
+        self.logic.getLights()
+
+        # edited before any snapshot was there to be marked dirty
+        shape, transform = self.logic.lightShapes[0], self.logic.lightTransforms[0]
+        self.cmds.setAttr(shape + ".intensity", 777.0)
+        self.logic.markDirty([shape])
+        self.logic.getLights()
+
+        snapshot = PS.PresetSnapshot(self.fileName, self.logic.sceneQuery)
+        snapshot.seed(self.logic.loadedData, self.logic.changedLights())
+        written, removed = snapshot.snapshot()
+        self.assertEqual(list(written), [transform])
+        self.assertEqual(self.saved()[transform]["intensity"], 777.0)
+
+    def testLightLeavingTheSceneIsRemoved(self):
+        self.snapshot.snapshot()
+        transform = self.logic.lightTransforms[4]
+        self.cmds.scene.remove(transform)
+        self.logic.sceneQuery.invalidate()
+        written, removed = self.snapshot.snapshot()
+        self.assertEqual(removed, [transform])
+        self.assertNotIn(transform, self.saved())
+        self.assertEqual(len(self.saved()), 9)
+
+    def testFullRewriteKeepsThePresetOnlyLights(self):
+        self.snapshot.snapshot()
+        preset = self.saved()
+        preset["|elsewhere|light"] = {"Type": "pointLight", "intensity": 1.0}
+        JSU.JSonUtils().save(preset, self.fileName)
+
+        snapshot = PS.PresetSnapshot(self.fileName, self.logic.sceneQuery)
+        snapshot.seed(preset)
+        snapshot.markAllDirty()
+        snapshot.snapshot()
+        self.assertEqual(self.saved(), preset)
+
+
+if __name__ == "__main__":
+    unittest.main()
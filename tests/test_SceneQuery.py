@@ -0,0 +1,57 @@
+"""SceneQuery reads and writes, on the in-memory maya.cmds from benchmarks/FakeMaya.py."""
+import os
+import sys
+import unittest
+
+root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, root)
+sys.path.insert(0, os.path.join(root, "benchmarks"))
+
+import FakeMaya
+
+FakeMaya.install()
+
+import SceneQuery as SQ
+
+
+class SceneQueryTest(unittest.TestCase):
+    def setUp(self):
+        self.cmds = FakeMaya.install(FakeMaya.FakeScene.generate(6, attributes=4))
+        self.query = SQ.SceneQuery()
+        self.shapes = sorted(self.query.lights().shapes)
+
+    def values(self, attribute):
+        return [self.cmds.getAttr("%s.%s" % (shape, attribute)) for shape in self.shapes]
+
+    def testLights(self):
+        scene = self.query.lights()
+        self.assertEqual(len(scene.transforms), 6)
+        index = self.query.lightIndex()
+        for i, (transform, shape) in enumerate(zip(scene.transforms, scene.shapes)):
+            self.assertEqual(index[transform], i)
+            self.assertEqual(index[shape], i)
+
+    def testWriteNumbers(self):
+        self.assertEqual(self.query.writeAttribute(self.shapes, "intensity", [float(i) for i in range(6)]), [])
+        self.assertEqual(self.values("intensity"), [float(i) for i in range(6)])
+        self.assertEqual(self.query.writeAttribute(self.shapes, "intensity", 2.5), [])
+        self.assertEqual(self.values("intensity"), [2.5] * 6)
+
+    def testFailedPlugsDoNotStopTheOthers(self):
+        del self.cmds.scene.nodes[self.shapes[1]].attributes["intensity"]
+        failures = self.query.writeAttribute(self.shapes, "intensity", 9.0)
+        self.assertEqual([node for node, error in failures], [self.shapes[1]])
+        written = self.shapes[:1] + self.shapes[2:]
+        self.assertEqual([self.cmds.getAttr(shape + ".intensity") for shape in written], [9.0] * 5)
+
+    def testWriteStrings(self):
+        for shape in self.shapes:
+            self.cmds.scene.nodes[shape].attributes["label"] = ""
+        self.assertEqual(self.query.writeAttribute(self.shapes, "label", u"key \u00e9"), [])
+        self.assertEqual(self.values("label"), [u"key \u00e9"] * 6)
+        failures = self.query.writeAttribute(self.shapes[:2], "missing", "x")
+        self.assertEqual([node for node, error in failures], self.shapes[:2])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,243 @@
+"""SceneWatcher and MayaCallbackSource without Maya, against a small stand-in for maya.api.OpenMaya."""
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+try:
+    from PySide2 import QtCore
+except ImportError:
+    QtCore = None
+
+if QtCore is not None:
+    import SceneWatcher as SW
+
+
+class FakeNode(object):
+    def __init__(self, name, kinds, parent=None):
+        self.name = name
+        self.kinds = set(kinds) | {FakeOpenMaya.MFn.kDagNode}
+        self.parent = parent
+        self.children = []
+        self.deleted = False
+        if parent is not None:
+            parent.children.append(self)
+        FakeOpenMaya.nodes.append(self)
+
+    def hasFn(self, kind):
+        return kind in self.kinds
+
+    @property
+    def path(self):
+        return (self.parent.path if self.parent is not None else "") + "|" + self.name
+
+
+class FakeDagPath(object):
+    def __init__(self, node):
+        self.__node = node
+
+    @classmethod
+    def getAPathTo(cls, node):
+        return cls(node)
+
+    def node(self):
+        return self.__node
+
+    def fullPathName(self):
+        return self.__node.path
+
+
+class FakeSelectionList(object):
+    def __init__(self):
+        self.nodes = []
+
+    def add(self, path):
+        for node in FakeOpenMaya.nodes:
+            if not node.deleted and node.path == path:
+                self.nodes.append(node)
+                return
+        raise RuntimeError("No object matches name: %s" % path)
+
+    def getDependNode(self, i):
+        return self.nodes[i]
+
+
+class FakeObjectHandle(object):
+    def __init__(self, node):
+        self.node = node
+
+    def hashCode(self):
+        return id(self.node)
+
+    def isValid(self):
+        return not self.node.deleted
+
+
+class FakeFnDagNode(object):
+    def __init__(self, node):
+        self.node = node
+
+    def childCount(self):
+        return len(self.node.children)
+
+    def child(self, i):
+        return self.node.children[i]
+
+
+class FakeMessages(object):
+    """Every add*Callback of the stand-in, callbacks are kept by name so a test can fire them."""
+
+    def __init__(self):
+        self.callbacks = {}
+        # callback id -> node of every attribute changed callback that was not removed
+        self.nodeCallbacks = {}
+        self.nextId = 0
+
+    def add(self, name, callback, node=None):
+        self.callbacks[name] = callback
+        if node is None:
+            return name
+        self.nextId += 1
+        callbackId = self.nextId
+        self.nodeCallbacks[callbackId] = node
+        return callbackId
+
+    def remove(self, ids):
+        for callbackId in ids:
+            self.nodeCallbacks.pop(callbackId, None)
+
+    def watched(self):
+        return sorted(node.path for node in self.nodeCallbacks.values())
+
+
+class FakeOpenMaya(object):
+    class MFn(object):
+        kDagNode = "dag"
+        kTransform = "transform"
+        kLight = "light"
+
+    class MNodeMessage(object):
+        kAttributeSet = 1
+
+        @staticmethod
+        def addNameChangedCallback(node, callback):
+            return FakeOpenMaya.messages.add("nameChanged", callback)
+
+        @staticmethod
+        def addAttributeChangedCallback(node, callback):
+            return FakeOpenMaya.messages.add("attributeChanged", callback, node)
+
+    class MDGMessage(object):
+        @staticmethod
+        def addNodeAddedCallback(callback, nodeType):
+            return FakeOpenMaya.messages.add("nodeAdded", callback)
+
+        @staticmethod
+        def addNodeRemovedCallback(callback, nodeType):
+            return FakeOpenMaya.messages.add("nodeRemoved", callback)
+
+    class MDagMessage(object):
+        @staticmethod
+        def addAllDagChangesCallback(callback):
+            return FakeOpenMaya.messages.add("dagChanged", callback)
+
+    class MEventMessage(object):
+        @staticmethod
+        def addEventCallback(event, callback):
+            return FakeOpenMaya.messages.add(event, callback)
+
+    class MMessage(object):
+        @staticmethod
+        def removeCallbacks(ids):
+            FakeOpenMaya.messages.remove(ids)
+
+    MObject = object
+    MDagPath = FakeDagPath
+    MFnDagNode = FakeFnDagNode
+    MSelectionList = FakeSelectionList
+    MObjectHandle = FakeObjectHandle
+    messages = FakeMessages()
+    nodes = []
+
+
+@unittest.skipIf(QtCore is None, "PySide2 is not available")
+class SceneWatcherTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.application = QtCore.QCoreApplication.instance() or QtCore.QCoreApplication([])
+
+    def setUp(self):
+        FakeOpenMaya.messages = FakeMessages()
+        FakeOpenMaya.nodes = []
+        self.source = SW.MayaCallbackSource(FakeOpenMaya)
+        self.watcher = SW.SceneWatcher(self.source)
+        self.batches = []
+        self.watcher.changed.connect(self.batches.append)
+        self.watcher.start()
+
+        # |set|group|key|keyShape and an unrelated |props|prop
+        self.set = FakeNode("set", [FakeOpenMaya.MFn.kTransform])
+        self.group = FakeNode("group", [FakeOpenMaya.MFn.kTransform], self.set)
+        self.key = FakeNode("key", [FakeOpenMaya.MFn.kTransform], self.group)
+        self.keyShape = FakeNode("keyShape", [FakeOpenMaya.MFn.kLight], self.key)
+        self.props = FakeNode("props", [FakeOpenMaya.MFn.kTransform])
+        FakeNode("prop", [FakeOpenMaya.MFn.kTransform], self.props)
+
+    def fire(self, name, *args):
+        FakeOpenMaya.messages.callbacks[name](*args)
+
+    def testRenamedAncestorIsStructural(self):
+        self.set.name = "renamedSet"
+        self.fire("nameChanged", self.set, "set")
+        self.watcher.flush()
+        self.assertEqual(len(self.batches), 1)
+        self.assertTrue(self.batches[0].structural)
+        self.assertEqual(self.batches[0].renamed, {"|renamedSet"})
+
+    def testReparentedAncestorIsStructural(self):
+        self.fire("dagChanged", 0, FakeDagPath(self.group), FakeDagPath(self.props))
+        self.watcher.flush()
+        self.assertEqual(len(self.batches), 1)
+        self.assertEqual(self.batches[0].reparented, {"|set|group"})
+
+    def testNodesWithoutLightsAreIgnored(self):
+        self.fire("nameChanged", self.props, "oldProps")
+        self.fire("dagChanged", 0, FakeDagPath(self.props.children[0]), FakeDagPath(self.props))
+        self.watcher.flush()
+        self.assertEqual(self.batches, [])
+
+    def testNotificationsCoalesceIntoOneBatch(self):
+        self.fire("nameChanged", self.set, "set")
+        self.fire("dagChanged", 0, FakeDagPath(self.group), FakeDagPath(self.set))
+        self.fire("SelectionChanged")
+        self.watcher.flush()
+        self.assertEqual(len(self.batches), 1)
+        self.assertTrue(self.batches[0].selection)
+        self.assertEqual(self.watcher.generation, 1)
+
+    def testRenamedNodeIsWatchedOnce(self):
+        self.source.watch(["|set|group|key", "|set|group|key|keyShape"])
+        self.set.name = "renamedSet"
+        self.source.watch(["|renamedSet|group|key", "|renamedSet|group|key|keyShape"])
+        self.assertEqual(FakeOpenMaya.messages.watched(),
+                         ["|renamedSet|group|key", "|renamedSet|group|key|keyShape"])
+
+    def testNodeCreatedAtAnOldPathIsWatched(self):
+        self.source.watch(["|set|group|key|keyShape"])
+        self.keyShape.name = "oldKeyShape"
+        FakeNode("keyShape", [FakeOpenMaya.MFn.kLight], self.key)
+        self.source.watch(["|set|group|key|oldKeyShape", "|set|group|key|keyShape"])
+        self.assertEqual(FakeOpenMaya.messages.watched(),
+                         ["|set|group|key|keyShape", "|set|group|key|oldKeyShape"])
+
+    def testDeletedNodesAreUnwatched(self):
+        self.source.watch(["|set|group|key", "|set|group|key|keyShape"])
+        self.key.deleted = self.keyShape.deleted = True
+        self.source.unwatch(["|set|group|key|keyShape"])
+        self.assertEqual(FakeOpenMaya.messages.nodeCallbacks, {})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,71 @@
+"""StatusEngine classification against a dict reader, no scene involved."""
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import LightStatus as LS
+import StatusEngine as SE
+
+
+class StatusEngineTest(unittest.TestCase):
+    def setUp(self):
+        # shape -> {attribute: value}, what the scene holds
+        self.scene = {
+            "|key|keyShape": {"intensity": 1.0, "color": [1.0, 0.5, 0.25], "emitDiffuse": True},
+            "|fill|fillShape": {"intensity": 2.0, "color": [1.0, 1.0, 1.0], "emitDiffuse": True},
+            "|rim|rimShape": {"intensity": 3.0},
+        }
+        self.reads = []
+        self.engine = SE.StatusEngine(self.read)
+        self.engine.setPreset({
+            "|key": {"Type": "spotLight", "intensity": 1.0, "color": [1.0, 0.5, 0.25], "emitDiffuse": True},
+            "|fill": {"Type": "spotLight", "intensity": 5.0, "color": [1.0, 1.0, 1.0], "emitDiffuse": True},
+            "|gone": {"Type": "pointLight", "intensity": 1.0},
+        })
+
+    def read(self, nodes, attributes):
+        self.reads.append(list(nodes))
+        return [dict((attribute, self.scene[node][attribute]) for attribute in nodeAttributes
+                     if attribute in self.scene[node]) for node, nodeAttributes in zip(nodes, attributes)]
+
+    def classify(self):
+        paths = ["|key", "|fill", "|rim"]
+        return self.engine.classify(paths, [path + path + "Shape" for path in paths])
+
+    def testClassify(self):
+        statuses = self.classify()
+        self.assertEqual(statuses["|key"], LS.LightStatus.Found)
+        self.assertEqual(statuses["|fill"], LS.LightStatus.Outdated)
+        self.assertEqual(statuses["|rim"], LS.LightStatus.Add)
+        self.assertEqual(statuses["|gone"], LS.LightStatus.Missing)
+        self.assertEqual(self.engine.differences("|fill"), ("intensity",))
+
+    def testTolerance(self):
+        self.scene["|key|keyShape"]["intensity"] = 1.0 + 1e-9
+        self.scene["|key|keyShape"]["color"] = [1.0, 0.5, 0.25 + 1e-9]
+        self.assertEqual(self.classify()["|key"], LS.LightStatus.Found)
+
+    def testMissingAttributeIsNoDifference(self):
+        del self.scene["|key|keyShape"]["emitDiffuse"]
+        self.assertEqual(self.classify()["|key"], LS.LightStatus.Found)
+        self.assertEqual(self.engine.differences("|key"), ())
+
+    def testOnlyDirtyLightsAreReadAgain(self):
+        self.classify()
+        self.scene["|key|keyShape"]["intensity"] = 9.0
+        self.engine.markDirty(["|key"])
+        self.reads = []
+        statuses = self.engine.classifyDirty({"|key": "|key|keyShape", "|fill": "|fill|fillShape"})
+        self.assertEqual(statuses, {"|key": LS.LightStatus.Outdated})
+        self.assertEqual(self.reads, [["|key|keyShape"]])
+
+    def testCompares(self):
+        self.assertTrue(self.engine.compares("|key", ["colorR"]))
+        self.assertTrue(self.engine.compares("|key", ["intensity"]))
+        self.assertFalse(self.engine.compares("|key", ["translateX"]))
+
+
+if __name__ == "__main__":
+    unittest.main()